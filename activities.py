@@ -0,0 +1,106 @@
+"""
+Activity parsing and classification.
+
+RuneMetrics reports activities as free text with a ``DD-Mon-YYYY HH:MM``
+date.  The collector runs these helpers once per activity at ingest and
+stores the results (``occurred_at``, ``type_key``, ``skill``), so the read
+paths never re-parse or re-classify rows.
+
+Classification uses two patterns compiled at import: one alternation of
+every type keyword and one of every skill name, so each row is scanned once
+per pattern instead of once per keyword / skill.
+"""
+
+import re
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from skills import ACTIVITY_TYPE_META, RS3_ORDER
+
+# Keywords that mark each type, matched as substrings of the lowered text.
+# When several types match, the one listed first in ACTIVITY_TYPE_META wins;
+# an activity matching none is a plain "activity".
+ACTIVITY_TYPE_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "quest": ("quest",),
+    "clue": ("clue", "treasure trail"),
+    "level": ("levelled", "leveled", "advanced"),
+    "kill": ("killed", "defeated", "slain"),
+    "loot": ("drop", "received", "found"),
+    "achievement": ("achievement", "completed"),
+    "unlock": ("unlocked",),
+}
+DEFAULT_ACTIVITY_TYPE = "activity"
+
+_TYPE_ORDER = [key for key in ACTIVITY_TYPE_META if key in ACTIVITY_TYPE_KEYWORDS]
+_KEYWORD_RANK = {
+    keyword: rank
+    for rank, type_key in enumerate(_TYPE_ORDER)
+    for keyword in ACTIVITY_TYPE_KEYWORDS[type_key]
+}
+# The lookahead reports a keyword at every position it starts, so one that
+# overlaps an earlier match still counts ("achievementreasure trail" is a
+# clue).  Alternatives are in rank order, which settles shared starts.
+_TYPE_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword in _KEYWORD_RANK) + "))"
+)
+_LEVEL_RANK = _TYPE_ORDER.index("level")
+
+# Skill names only match as whole words, which never overlap, so findall
+# sees every mentioned skill; RS3_ORDER decides between several.
+_SKILL_RANK = {skill.lower(): rank for rank, skill in enumerate(RS3_ORDER)}
+_SKILL_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(skill) for skill in _SKILL_RANK) + r")\b"
+)
+
+
+def parse_activity_ts(ts: str | None) -> datetime | None:
+    if not ts:
+        return None
+    for fmt in ("%d-%b-%Y %H:%M", "%d-%b-%Y %H:%M:%S"):
+        try:
+            return datetime.strptime(ts, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def _first_skill(lowered: str) -> str | None:
+    ranks = [_SKILL_RANK[name] for name in _SKILL_PATTERN.findall(lowered)]
+    return RS3_ORDER[min(ranks)] if ranks else None
+
+
+def detect_activity_skill(text: str | None) -> str | None:
+    return _first_skill((text or "").lower())
+
+
+def classify_activity(
+    text: str | None, details: str | None = None
+) -> tuple[str, str | None]:
+    """Return ``(type_key, skill)`` for an activity; skill only for level-ups."""
+    lowered = " ".join(part for part in (details, text) if part).lower()
+
+    keywords = _TYPE_PATTERN.findall(lowered)
+    if not keywords:
+        return DEFAULT_ACTIVITY_TYPE, None
+    rank = min(_KEYWORD_RANK[keyword] for keyword in keywords)
+    if rank != _LEVEL_RANK:
+        return _TYPE_ORDER[rank], None
+    return _TYPE_ORDER[rank], _first_skill(lowered)
+
+
+def classify_activities(
+    rows: Iterable[tuple[str | None, str | None]],
+) -> list[tuple[str, str | None]]:
+    """Classify ``(text, details)`` pairs; see classify_activity.
+
+    Identical pairs are classified once per call; feeds repeat texts such
+    as "Clue scroll completed" often.
+    """
+    seen: dict[tuple[str | None, str | None], tuple[str, str | None]] = {}
+    results = []
+    for row in rows:
+        result = seen.get(row)
+        if result is None:
+            result = seen[row] = classify_activity(*row)
+        results.append(result)
+    return results
@@ -4,7 +4,8 @@ Application composition root.
 This file's only jobs:
   1. Create the FastAPI app and configure its lifespan.
   2. Mount static files.
-  3. Include routers from routes/.
+  3. Include routers from routes/ and the HTTP caching / compression
+     middleware.
 
 All logic lives in services/, routes/, and supporting modules.
 
@@ -24,9 +25,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from db import init_db
+from collector import close_http_client
+from db import async_pool, init_db
 from log import configure_logging, get_logger
 from routes.admin import router as admin_router
+from routes.compression import CompressionMiddleware
+from routes.http_cache import ConditionalGetMiddleware
 from routes.public import router as public_router
 
 logger = get_logger(__name__)
@@ -36,10 +40,16 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     configure_logging()
     init_db()
+    await async_pool.open()
     yield
+    await close_http_client()
+    await async_pool.close()
 
 
 app = FastAPI(lifespan=lifespan, title="RS3 Tracker")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.include_router(public_router)
 app.include_router(admin_router)
+app.add_middleware(ConditionalGetMiddleware)
+# Outermost, so it compresses (and re-tags) what the caching layer sends.
+app.add_middleware(CompressionMiddleware)
@@ -0,0 +1,220 @@
+"""
+Activity search benchmark: GIN full-text search vs scanning the feed.
+
+Copies a synthetic activity feed (a million rows by default) for one player,
+then times three ways of answering a search for each probe query:
+
+* ``python scan`` — fetch the player's whole feed and substring-match it,
+  which is all the unindexed feed API allowed;
+* ``ILIKE scan`` — the same match pushed into SQL, still a sequential read;
+* ``search`` — the ranked, highlighted page /api/activities/search serves,
+  backed by the generated tsvector and idx_activities_search.
+
+Everything happens in one transaction that is rolled back, so run it against
+a scratch database (the table and GIN index keep their grown size until the
+next VACUUM):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_activity_search \\
+        --rows 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.fake_runemetrics import ACTIVITY_TEMPLATES, ITEMS, MONSTERS, QUESTS
+from db import async_pool, get_async_conn, init_db
+from services.dashboard import (
+    _ACTIVITY_META_JOINS,
+    _ACTIVITY_META_PARAMS,
+    _FEED_KEY,
+    _HEADLINE_OPTIONS,
+    _SEARCH_SQL,
+)
+from skills import SKILL_NAMES
+
+BENCH_USERNAME = "bench-activity-search"
+PAGE_SIZE = 50
+# One activity in RARE_EVERY is a drop no other row mentions.
+RARE_EVERY = 10_000
+RARE_ACTIVITY = (
+    "I found a Third age druidic wreath",
+    "I found a Third age druidic wreath.",
+)
+
+# (label, web-search query, substring the scans look for)
+PROBES = (
+    ("rare word", "druidic", "druidic"),
+    ("boss", "araxxor", "araxxor"),
+    ("phrase", '"elder kiln"', "elder kiln"),
+    ("common word", "killed", "killed"),
+)
+
+
+def synthetic_feed(rows: int, seed: int = 1):
+    """Yield (text, date, details, occurred_at, hash) rows, one a minute."""
+    rng = random.Random(seed)
+    skills = list(SKILL_NAMES.values())
+    start = datetime.now(timezone.utc) - timedelta(minutes=rows)
+    for i in range(rows):
+        if i % RARE_EVERY == RARE_EVERY // 2:
+            text, details = RARE_ACTIVITY
+        else:
+            text, details = rng.choice(ACTIVITY_TEMPLATES)
+        skill = rng.choice(skills)
+        fields = {
+            "skill": skill,
+            "skill_lower": skill.lower(),
+            "level": rng.randint(2, 120),
+            "quest": rng.choice(QUESTS),
+            "count": rng.randint(2, 50),
+            "monster": rng.choice(MONSTERS),
+            "item": rng.choice(ITEMS),
+        }
+        occurred_at = start + timedelta(minutes=i)
+        yield (
+            text.format(**fields),
+            occurred_at.strftime("%d-%b-%Y %H:%M"),
+            details.format(**fields),
+            occurred_at,
+            f"{BENCH_USERNAME}:{i}",
+        )
+
+
+async def write_feed(conn, rows: int) -> int:
+    cur = await conn.execute(
+        """
+        INSERT INTO players (username) VALUES (%s)
+        ON CONFLICT (username) DO UPDATE SET username = EXCLUDED.username
+        RETURNING id
+        """,
+        (BENCH_USERNAME,),
+    )
+    player_id = (await cur.fetchone())["id"]
+    cur = conn.cursor()
+    async with cur.copy(
+        "COPY activities (player_id, text, date, details, occurred_at, hash) FROM STDIN"
+    ) as copy:
+        for row in synthetic_feed(rows):
+            await copy.write_row((player_id, *row))
+    # Merge GIN's pending list as autovacuum eventually would, so searches
+    # probe the index proper rather than a multi-megabyte unsorted tail.
+    await conn.execute("SELECT gin_clean_pending_list('idx_activities_search')")
+    await conn.execute("ANALYZE activities")
+    return player_id
+
+
+async def timed(conn, runs: int, sql: str, params) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cur = await conn.execute(sql, params)
+        await cur.fetchall()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def python_scan(conn, player_id: int, needle: str) -> list[dict]:
+    cur = await conn.execute(
+        "SELECT id, text, details FROM activities WHERE player_id = %s",
+        (player_id,),
+    )
+    return [
+        row
+        for row in await cur.fetchall()
+        if needle in f"{row['text']} {row['details']}".lower()
+    ]
+
+
+ILIKE_SQL = f"""
+    SELECT a.id, a.text, a.details FROM activities a
+    WHERE a.player_id = %(player)s
+      AND (a.text ILIKE %(pattern)s OR a.details ILIKE %(pattern)s)
+    ORDER BY {_FEED_KEY} DESC, a.id DESC
+    LIMIT %(limit)s
+"""
+
+
+def ms(timings: list[float]) -> str:
+    return (
+        f"{statistics.median(timings) * 1000:>10.1f}"
+        f"{statistics.fmean(timings) * 1000:>10.1f}"
+    )
+
+
+async def main(rows: int, runs: int, baseline_runs: int):
+    async with async_pool, get_async_conn() as conn:
+        try:
+            started = time.perf_counter()
+            player_id = await write_feed(conn, rows)
+            print(
+                f"{rows:,} activities written in {time.perf_counter() - started:.1f}s"
+            )
+            cur = await conn.execute(
+                "SELECT pg_relation_size('idx_activities_search') AS gin_bytes"
+            )
+            gin_bytes = (await cur.fetchone())["gin_bytes"]
+            print(f"idx_activities_search: {gin_bytes / 1024 / 1024:,.1f} MiB")
+
+            search_sql = _SEARCH_SQL.format(
+                key=_FEED_KEY, meta_joins=_ACTIVITY_META_JOINS
+            )
+            print()
+            print(
+                f"{'probe':<14}{'method':<14}{'matches':>10}"
+                f"{'p50 ms':>10}{'mean ms':>10}"
+            )
+            for label, query, needle in PROBES:
+                timings = []
+                for _ in range(baseline_runs):
+                    scan_started = time.perf_counter()
+                    matches = await python_scan(conn, player_id, needle)
+                    timings.append(time.perf_counter() - scan_started)
+                print(f"{label:<14}{'python scan':<14}{len(matches):>10,}{ms(timings)}")
+
+                timings = await timed(
+                    conn,
+                    runs,
+                    ILIKE_SQL,
+                    {
+                        "player": player_id,
+                        "pattern": f"%{needle}%",
+                        "limit": PAGE_SIZE,
+                    },
+                )
+                print(f"{'':<14}{'ILIKE scan':<14}{'':>10}{ms(timings)}")
+
+                timings = await timed(
+                    conn,
+                    runs,
+                    search_sql,
+                    {
+                        **_ACTIVITY_META_PARAMS,
+                        "q": query,
+                        "username": BENCH_USERNAME,
+                        "headline_options": _HEADLINE_OPTIONS,
+                        "limit": PAGE_SIZE + 1,
+                        "offset": 0,
+                    },
+                )
+                print(f"{'':<14}{'search':<14}{'':>10}{ms(timings)}")
+        finally:
+            await conn.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--baseline-runs",
+        type=int,
+        default=3,
+        help="runs of the python scan, which reads the whole feed each time",
+    )
+    args = parser.parse_args()
+    init_db()
+    asyncio.run(main(args.rows, args.runs, args.baseline_runs))
@@ -0,0 +1,156 @@
+"""
+Activity classification microbenchmark: compiled patterns vs keyword loops.
+
+Classifies a corpus of activities with the previous implementation (a chain
+of ``in`` checks, then one regex search per skill) and with
+``activities.classify_activity`` / ``classify_activities``, checks that all
+three agree row for row, and reports throughput.  The corpus is synthetic
+RuneMetrics-style text by default; ``--from-db`` classifies the stored
+activities instead:
+
+    python -m benchmarks.bench_classify --rows 200000
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_classify --from-db
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from activities import classify_activities, classify_activity
+from benchmarks.fake_runemetrics import ACTIVITY_TEMPLATES, ITEMS, MONSTERS, QUESTS
+from skills import RS3_ORDER
+
+# Extra phrasings seen in real feeds, on top of fake_runemetrics' templates.
+EXTRA_TEMPLATES = (
+    (
+        "Levelled all skills over {level}",
+        "I levelled all my skills to at least {level}.",
+    ),
+    (
+        "{count}XP in {skill}",
+        "I now have at least {count}000000 experience points in the {skill} skill.",
+    ),
+    (
+        "I killed {count} boss monsters in Daemonheim.",
+        "I killed {count} boss monsters whilst Dungeoneering.",
+    ),
+    ("I defeated {monster}.", "I defeated {monster} after a long fight."),
+    ("I unlocked an archaeology collection", "I unlocked the {item} collection."),
+    ("Received a pet", "I received a pet while {skill_lower}."),
+    ("Visited the Wishing Well", "I visited the Wishing Well of Souls."),
+)
+
+
+def legacy_detect_activity_skill(text: str | None) -> str | None:
+    lowered = (text or "").lower()
+    for skill in RS3_ORDER:
+        if re.search(rf"\b{re.escape(skill.lower())}\b", lowered):
+            return skill
+    return None
+
+
+def legacy_classify_activity(
+    text: str | None, details: str | None = None
+) -> tuple[str, str | None]:
+    combined = " ".join(part for part in (details, text) if part)
+    lowered = combined.lower()
+
+    type_key = "activity"
+    if "quest" in lowered:
+        type_key = "quest"
+    elif "clue" in lowered or "treasure trail" in lowered:
+        type_key = "clue"
+    elif "levelled" in lowered or "leveled" in lowered or "advanced" in lowered:
+        type_key = "level"
+    elif "killed" in lowered or "defeated" in lowered or "slain" in lowered:
+        type_key = "kill"
+    elif "drop" in lowered or "received" in lowered or "found" in lowered:
+        type_key = "loot"
+    elif "achievement" in lowered or "completed" in lowered:
+        type_key = "achievement"
+    elif "unlocked" in lowered:
+        type_key = "unlock"
+
+    skill = legacy_detect_activity_skill(combined) if type_key == "level" else None
+    return type_key, skill
+
+
+def synthetic_corpus(rows: int, seed: int = 1) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    templates = ACTIVITY_TEMPLATES + EXTRA_TEMPLATES
+    corpus = []
+    for _ in range(rows):
+        text, details = rng.choice(templates)
+        skill = rng.choice(RS3_ORDER)
+        fields = {
+            "skill": skill,
+            "skill_lower": skill.lower(),
+            "level": rng.randint(2, 120),
+            "quest": rng.choice(QUESTS),
+            "count": rng.randint(2, 500),
+            "monster": rng.choice(MONSTERS),
+            "item": rng.choice(ITEMS),
+        }
+        corpus.append((text.format(**fields), details.format(**fields)))
+    return corpus
+
+
+def stored_corpus() -> list[tuple[str, str]]:
+    from db import get_conn
+
+    with get_conn() as conn:
+        rows = conn.execute("SELECT text, details FROM activities").fetchall()
+    return [(row["text"], row["details"]) for row in rows]
+
+
+def timed(runs: int, classify, corpus) -> tuple[list[float], list]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = classify(corpus)
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def main(corpus: list[tuple[str, str]], runs: int):
+    distinct = len(set(corpus))
+    print(f"{len(corpus):,} activities ({distinct:,} distinct), {runs} runs")
+    print(f"{'implementation':<28}{'rows/s':>14}{'p50 ms':>10}{'speedup':>9}")
+
+    baseline = None
+    expected = None
+    for label, classify in (
+        (
+            "legacy (per keyword/skill)",
+            lambda c: [legacy_classify_activity(*r) for r in c],
+        ),
+        ("classify_activity", lambda c: [classify_activity(*r) for r in c]),
+        ("classify_activities", classify_activities),
+    ):
+        timings, result = timed(runs, classify, corpus)
+        if expected is None:
+            expected = result
+        elif result != expected:
+            mismatches = sum(a != b for a, b in zip(result, expected))
+            raise SystemExit(f"{label}: {mismatches} rows differ from legacy")
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(
+            f"{label:<28}{len(corpus) / median:>14,.0f}"
+            f"{median * 1000:>10.1f}{baseline / median:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--from-db",
+        action="store_true",
+        help="classify the activities stored in DATABASE_URL",
+    )
+    args = parser.parse_args()
+    main(stored_corpus() if args.from_db else synthetic_corpus(args.rows), args.runs)
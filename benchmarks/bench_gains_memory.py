@@ -0,0 +1,112 @@
+"""
+total_xp_gains memory benchmark: fetchall vs a streamed cursor.
+
+Builds hourly gains rollup rows for a history, then doubles it a few times,
+and measures the peak memory (tracemalloc) of bucketing them into gains the
+way /api/total_xp_gains does:
+
+* ``fetchall`` — every row materialized first, then sent to
+  bucket_gains_aggregator in one batch, as the service used to;
+* ``streamed`` — batches of STREAM_BATCH_SIZE rows, made on demand as a
+  named cursor hands them over, sent to bucket_gains_aggregator.
+
+Both return the same points; the points themselves grow with the history
+(one per bucket), so the streamed peak minus the result size is what stays
+flat.  No database access, though importing the services still needs
+DATABASE_URL set:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_gains_memory \\
+        --years 1 --doublings 3 --bucket day
+"""
+
+import argparse
+import json
+import random
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from config import STREAM_BATCH_SIZE
+from services.charts import bucket_gains_aggregator
+
+
+def synthetic_batches(hours: int, batch_size: int, seed: int = 1):
+    """Hourly rollup rows ending now, *batch_size* at a time."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0)
+    xp = rng.randint(1_000_000, 50_000_000)
+    batch = []
+    for i in range(hours, 0, -1):
+        xp += rng.choice((0, 0, rng.randint(1_000, 500_000)))
+        ts = now - timedelta(hours=i)
+        batch.append({"timestamp": ts, "last_seen_at": ts, "total_xp": xp})
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fetchall(hours: int, bucket: str) -> list[dict]:
+    rows = [
+        row for batch in synthetic_batches(hours, STREAM_BATCH_SIZE) for row in batch
+    ]
+    aggregator = bucket_gains_aggregator(bucket, "total_xp")
+    next(aggregator)
+    aggregator.send(rows)
+    return aggregator.send(None)
+
+
+def streamed(hours: int, bucket: str) -> list[dict]:
+    aggregator = bucket_gains_aggregator(bucket, "total_xp")
+    next(aggregator)
+    for batch in synthetic_batches(hours, STREAM_BATCH_SIZE):
+        aggregator.send(batch)
+    return aggregator.send(None)
+
+
+def peak_mib(fn, *args) -> tuple[float, list]:
+    tracemalloc.start()
+    result = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, result
+
+
+def result_mib(points: list[dict]) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    copy = json.loads(json.dumps(points))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copy
+    return (after - before) / 1024 / 1024
+
+
+def main(years: float, doublings: int, bucket: str):
+    print(f"{bucket} gains, batches of {STREAM_BATCH_SIZE:,} rows")
+    print(
+        f"{'rows':>10}{'points':>9}{'fetchall MiB':>14}{'streamed MiB':>14}"
+        f"{'result MiB':>12}"
+    )
+    hours = int(years * 365 * 24)
+    for _ in range(doublings + 1):
+        fetchall_mib, expected = peak_mib(fetchall, hours, bucket)
+        streamed_mib, result = peak_mib(streamed, hours, bucket)
+        if result != expected:
+            raise SystemExit("streamed result differs from fetchall")
+        print(
+            f"{hours:>10,}{len(result):>9,}{fetchall_mib:>14.1f}"
+            f"{streamed_mib:>14.1f}{result_mib(result):>12.1f}"
+        )
+        hours *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--doublings", type=int, default=3)
+    parser.add_argument(
+        "--bucket", choices=("hour", "day", "week", "month"), default="day"
+    )
+    args = parser.parse_args()
+    main(args.years, args.doublings, args.bucket)
@@ -0,0 +1,189 @@
+"""
+Ingest benchmark: per-row loop vs set-based (unnest) snapshot writes.
+
+Compares the pre-bulk ingest (executemany for skills, SELECT + INSERT per
+activity) against ``collector._ingest_profile`` on synthetic RuneMetrics
+payloads, reporting round trips and wall time per snapshot.  Every run is
+rolled back, so it is safe against a scratch copy of the real schema:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_ingest --activities 20
+
+Pass ``--rtt-ms`` to add a simulated network round-trip delay.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from psycopg import AsyncCursor
+
+from collector import _ingest_profile, hash_activity, legacy_hash_activity, to_int
+from db import async_pool, get_async_conn, init_db
+from skills import SKILL_NAMES
+
+BENCH_USERNAME = "bench-ingest"
+
+
+class CountingCursor(AsyncCursor):
+    """Counts client/server round trips.
+
+    executemany() is pipelined by psycopg, so it counts as one round trip.
+    ``rtt`` adds a simulated network delay per trip (a local Postgres has
+    none; Neon from Cloud Run is typically a few milliseconds).
+    """
+
+    round_trips = 0
+    rtt = 0.0
+
+    async def execute(self, *args, **kwargs):
+        await self._trip()
+        return await super().execute(*args, **kwargs)
+
+    async def executemany(self, *args, **kwargs):
+        await self._trip()
+        return await super().executemany(*args, **kwargs)
+
+    async def _trip(self):
+        CountingCursor.round_trips += 1
+        if CountingCursor.rtt:
+            await asyncio.sleep(CountingCursor.rtt)
+
+
+def build_profile(run: int, activity_count: int) -> dict:
+    return {
+        "rank": "1,234",
+        "totalxp": 500_000_000 + run,
+        "totalskill": 2800,
+        "combatlevel": 138,
+        "questsstarted": 3,
+        "questscomplete": 300,
+        "questsnotstarted": 10,
+        "skillvalues": [
+            {"id": skill_id, "level": 99, "xp": 200_000_000 + run, "rank": 1000}
+            for skill_id in SKILL_NAMES
+        ],
+        "activities": [
+            {
+                "date": f"01-Jan-2020 00:{i % 60:02d}",
+                "text": f"bench activity {run}-{i}",
+                "details": f"bench details {run}-{i}",
+            }
+            for i in range(activity_count)
+        ],
+    }
+
+
+async def legacy_ingest(conn, username: str, data: dict) -> int:
+    """The row-at-a-time ingest that predates set-based writes."""
+    await conn.execute(
+        "INSERT INTO players (username) VALUES (%s) ON CONFLICT DO NOTHING",
+        (username,),
+    )
+    cur = await conn.execute("SELECT id FROM players WHERE username = %s", (username,))
+    player_id = (await cur.fetchone())["id"]
+    cur = await conn.execute(
+        """
+        INSERT INTO snapshots (
+            player_id, total_xp, total_level, overall_rank,
+            combat_level, quests_started, quests_complete, quests_not_started
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id, timestamp
+        """,
+        (
+            player_id,
+            to_int(data.get("totalxp")),
+            to_int(data.get("totalskill")),
+            to_int(data.get("rank")),
+            to_int(data.get("combatlevel")),
+            to_int(data.get("questsstarted")),
+            to_int(data.get("questscomplete")),
+            to_int(data.get("questsnotstarted")),
+        ),
+    )
+    snapshot = await cur.fetchone()
+    snapshot_id = snapshot["id"]
+    async with conn.cursor() as cur:
+        await cur.executemany(
+            """
+            INSERT INTO skills (
+                snapshot_id, player_id, taken_at, skill, level, xp, rank
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            [
+                (
+                    snapshot_id,
+                    player_id,
+                    snapshot["timestamp"],
+                    SKILL_NAMES[sk["id"]],
+                    to_int(sk.get("level")),
+                    to_int(sk.get("xp")),
+                    to_int(sk.get("rank")),
+                )
+                for sk in data["skillvalues"]
+            ],
+        )
+    for act in data["activities"]:
+        details = act.get("details")
+        h = hash_activity(act["text"], act["date"], details)
+        legacy_h = legacy_hash_activity(act["text"], act["date"])
+        cur = await conn.execute(
+            "SELECT 1 FROM activities WHERE hash IN (%s, %s) LIMIT 1", (h, legacy_h)
+        )
+        if await cur.fetchone():
+            continue
+        await conn.execute(
+            """
+            INSERT INTO activities (snapshot_id, text, date, details, hash)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT DO NOTHING
+            """,
+            (snapshot_id, act["text"], act["date"], details, h),
+        )
+    return snapshot_id
+
+
+async def measure(ingest, runs: int, activity_count: int) -> tuple[float, list[float]]:
+    timings: list[float] = []
+    CountingCursor.round_trips = 0
+    for run in range(runs):
+        data = build_profile(run, activity_count)
+        async with get_async_conn() as conn:
+            conn.cursor_factory = CountingCursor
+            try:
+                started = time.perf_counter()
+                await ingest(conn, BENCH_USERNAME, data)
+                timings.append(time.perf_counter() - started)
+            finally:
+                await conn.rollback()
+                conn.cursor_factory = AsyncCursor
+    return CountingCursor.round_trips / runs, timings
+
+
+async def main(runs: int, activity_count: int, rtt_ms: float):
+    CountingCursor.rtt = rtt_ms / 1000
+    async with async_pool:
+        print(
+            f"{runs} runs, 29 skills, {activity_count} activities per snapshot, "
+            f"simulated RTT {rtt_ms:g} ms"
+        )
+        print(f"{'ingest':<12}{'round trips':>12}{'p50 ms':>10}{'mean ms':>10}")
+        for name, ingest in (("loop", legacy_ingest), ("set-based", _ingest_profile)):
+            trips, timings = await measure(ingest, runs, activity_count)
+            print(
+                f"{name:<12}{trips:>12.1f}"
+                f"{statistics.median(timings) * 1000:>10.2f}"
+                f"{statistics.fmean(timings) * 1000:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--activities", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    init_db()
+    asyncio.run(main(args.runs, args.activities, args.rtt_ms))
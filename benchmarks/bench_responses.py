@@ -0,0 +1,110 @@
+"""
+Response encoding benchmark: serialization time and bytes on the wire.
+
+Fetches each read endpoint's payload for RS3_USERNAME through its service,
+then times encoding it the way FastAPI does for a returned dict
+(jsonable_encoder, then JSONResponse's json.dumps) against FastJSONResponse
+(orjson when installed, without the encoder walk), checking both decode to
+the same data.  Then it reports the body size as sent raw, gzip-compressed
+and brotli-compressed (if installed), with the compression time, as
+routes.compression would send it.  The dashboard page is HTML, so only its
+bytes are measured.  Read-only; run it against a database with history:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_responses --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import web
+from db import async_pool
+from routes import compression
+from services.charts import (
+    get_chart_data,
+    get_skill_history_data,
+    get_skills_totals_data,
+    get_total_xp_gains_data,
+)
+from services.response_cache import _render_dashboard
+from web import FastJSONResponse
+
+ENDPOINTS = (
+    ("/api/skills_totals/all", get_skills_totals_data, ("all",)),
+    ("/api/skills_totals/hour", get_skills_totals_data, ("hour",)),
+    ("/api/skills_totals/week", get_skills_totals_data, ("week",)),
+    ("/api/total_xp_gains/hour", get_total_xp_gains_data, ("hour",)),
+    ("/api/total_xp_gains/day", get_total_xp_gains_data, ("day",)),
+    ("/api/skill_history/Magic/all", get_skill_history_data, ("Magic", "all")),
+    ("/api/chart/Magic/all", get_chart_data, ("Magic", "all")),
+    ("/api/chart/Total/day", get_chart_data, ("Total", "day")),
+    ("/", _render_dashboard, ()),
+)
+
+
+def default_body(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fast_body(payload) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def timed(runs: int, fn, *args) -> tuple[float, object]:
+    """Median milliseconds and the result of *fn*."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def kib(size: int) -> str:
+    return f"{size / 1024:.1f}"
+
+
+async def main(runs: int):
+    async with async_pool:
+        payloads = [(path, await fn(*args)) for path, fn, args in ENDPOINTS]
+
+    codings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    print(
+        f"{runs} runs; fast JSON via {'orjson' if web.orjson else 'json (no orjson)'}"
+    )
+    header = (
+        f"{'endpoint':<30}{'raw KiB':>9}{'default ms':>12}{'fast ms':>9}{'speedup':>9}"
+    )
+    for coding in codings:
+        header += f"{f'{coding} KiB':>10}{f'{coding} ms':>9}"
+    print(header)
+
+    for path, payload in payloads:
+        if isinstance(payload, str):
+            body = payload.encode()
+            line = f"{path:<30}{kib(len(body)):>9}{'-':>12}{'-':>9}{'-':>9}"
+        else:
+            default_ms, expected = timed(runs, default_body, payload)
+            fast_ms, body = timed(runs, fast_body, payload)
+            if json.loads(body) != json.loads(expected):
+                raise SystemExit(f"{path}: fast body decodes differently")
+            line = (
+                f"{path:<30}{kib(len(body)):>9}{default_ms:>12.2f}{fast_ms:>9.2f}"
+                f"{default_ms / fast_ms:>8.1f}x"
+            )
+        for coding in codings:
+            compress_ms, compressed = timed(runs, compression.compress, body, coding)
+            line += f"{kib(len(compressed)):>10}{compress_ms:>9.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,229 @@
+"""
+Skill storage benchmark: per-skill rows vs per-snapshot arrays.
+
+Writes a synthetic hourly history in "full" mode — a ``skills`` row per
+skill per snapshot alongside the snapshot skill arrays — then reports how
+much each layout grew its table and indexes and how long the chart-style
+reads take against each.  Everything happens in
+one transaction that is rolled back, so run it against a scratch database
+(relation files keep their grown size until the next VACUUM):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_skill_layout \\
+        --snapshots 5000 --changes 2
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import collector
+from collector import _write_snapshots
+from db import async_pool, get_async_conn, init_db
+from skills import SKILL_IDS, SKILL_NAMES
+
+CHUNK_SIZE = 500
+PROBE_SKILL = "Magic"
+
+
+def synthetic_history(snapshots: int, changes: int, seed: int = 1) -> list[dict]:
+    """Hourly profiles ending now, each training *changes* random skills."""
+    rng = random.Random(seed)
+    xp = {skill_id: rng.randint(1_000_000, 50_000_000) for skill_id in SKILL_NAMES}
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    start = now - timedelta(hours=snapshots)
+    history = []
+    for i in range(snapshots):
+        for skill_id in rng.sample(sorted(SKILL_NAMES), changes):
+            xp[skill_id] += rng.randint(1_000, 500_000)
+        history.append(
+            {
+                "timestamp": start + timedelta(hours=i),
+                "data": {
+                    "totalxp": sum(xp.values()) // 10,
+                    "totalskill": 2500,
+                    "rank": "1,000",
+                    "combatlevel": 138,
+                    "skillvalues": [
+                        {"id": skill_id, "level": 99, "xp": value, "rank": 1_000}
+                        for skill_id, value in xp.items()
+                    ],
+                },
+            }
+        )
+    return history
+
+
+async def relation_sizes(conn) -> dict[str, int]:
+    # The tables are partitioned, so sizes are summed over their partitions.
+    cur = await conn.execute(
+        """
+        SELECT
+            SUM(pg_relation_size(relid)) FILTER (WHERE root = 'skills')
+                AS skills_heap,
+            SUM(pg_indexes_size(relid)) FILTER (WHERE root = 'skills')
+                AS skills_indexes,
+            SUM(pg_relation_size(relid)) FILTER (WHERE root = 'snapshots')
+                AS snapshots_heap,
+            SUM(pg_indexes_size(relid)) FILTER (WHERE root = 'snapshots')
+                AS snapshots_indexes
+        FROM unnest(ARRAY['skills', 'snapshots']) AS root
+        CROSS JOIN LATERAL pg_partition_tree(root::regclass)
+        WHERE isleaf
+        """
+    )
+    return await cur.fetchone()
+
+
+async def write_history(conn, username: str, history: list[dict], mode: str):
+    collector.SKILL_STORAGE_MODE = mode
+    entries = [{**entry, "username": username} for entry in history]
+    for i in range(0, len(entries), CHUNK_SIZE):
+        await _write_snapshots(conn, entries[i : i + CHUNK_SIZE])
+    cur = await conn.execute("SELECT id FROM players WHERE username = %s", (username,))
+    return (await cur.fetchone())["id"]
+
+
+async def timed(conn, runs: int, sql: str, params) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cur = await conn.execute(sql, params)
+        await cur.fetchall()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+ROW_QUERIES = {
+    "one skill history": (
+        """
+        SELECT taken_at AS timestamp, xp FROM skills
+        WHERE player_id = %(player)s AND skill = %(skill)s
+        ORDER BY taken_at
+        """
+    ),
+    "all skills history": (
+        """
+        SELECT taken_at AS timestamp, skill, xp FROM skills
+        WHERE player_id = %(player)s
+        ORDER BY taken_at
+        """
+    ),
+    "latest state": (
+        """
+        SELECT st.* FROM unnest(%(names)s::text[]) AS names(skill)
+        CROSS JOIN LATERAL (
+            SELECT skill, level, xp, rank FROM skills
+            WHERE player_id = %(player)s AND skill = names.skill
+            ORDER BY taken_at DESC, snapshot_id DESC
+            LIMIT 1
+        ) st
+        """
+    ),
+}
+
+ARRAY_QUERIES = {
+    "one skill history": (
+        """
+        SELECT timestamp, skill_xp[%(subscript)s] AS xp FROM snapshots
+        WHERE player_id = %(player)s AND skill_xp[%(subscript)s] IS NOT NULL
+        ORDER BY timestamp
+        """
+    ),
+    "all skills history": (
+        """
+        SELECT timestamp, skill_xp FROM snapshots
+        WHERE player_id = %(player)s
+        ORDER BY timestamp
+        """
+    ),
+    "latest state": (
+        """
+        SELECT skill_xp, skill_level, skill_rank FROM snapshots
+        WHERE player_id = %(player)s
+        ORDER BY timestamp DESC
+        LIMIT 1
+        """
+    ),
+}
+
+
+def kib(value: int) -> str:
+    return f"{value / 1024:>12,.0f}"
+
+
+async def main(snapshots: int, changes: int, runs: int):
+    history = synthetic_history(snapshots, changes)
+    async with async_pool:
+        # Partitions are created (and kept) outside the rolled-back transaction.
+        await collector._ensure_partitions([entry["timestamp"] for entry in history])
+        await compare_layouts(history, changes, runs)
+
+
+async def compare_layouts(history: list[dict], changes: int, runs: int):
+    snapshots = len(history)
+    original_mode = collector.SKILL_STORAGE_MODE
+    async with get_async_conn() as conn:
+        try:
+            before = await relation_sizes(conn)
+            player = await write_history(conn, "bench-layout", history, "full")
+            after = await relation_sizes(conn)
+            cur = await conn.execute(
+                """
+                SELECT COALESCE(SUM(
+                    pg_column_size(skill_xp) + pg_column_size(skill_level)
+                    + pg_column_size(skill_rank)
+                ), 0) AS array_bytes
+                FROM snapshots WHERE player_id = %s
+                """,
+                (player,),
+            )
+            array_bytes = (await cur.fetchone())["array_bytes"]
+
+            print(
+                f"{snapshots} snapshots, {changes} skills changed per snapshot "
+                f"(sizes in KiB)"
+            )
+            print(f"{'layout':<22}{'table':>12}{'indexes':>12}")
+            print(
+                f"{'skills rows':<22}"
+                f"{kib(after['skills_heap'] - before['skills_heap'])}"
+                f"{kib(after['skills_indexes'] - before['skills_indexes'])}"
+            )
+            print(f"{'arrays (column data)':<22}{kib(array_bytes)}{kib(0)}")
+            print(
+                f"{'snapshots':<22}"
+                f"{kib(after['snapshots_heap'] - before['snapshots_heap'])}"
+                f"{kib(after['snapshots_indexes'] - before['snapshots_indexes'])}"
+            )
+
+            params = {
+                "skill": PROBE_SKILL,
+                "subscript": SKILL_IDS[PROBE_SKILL] + 1,
+                "names": list(SKILL_NAMES.values()),
+            }
+            print()
+            print(f"{'query':<22}{'layout':<14}{'p50 ms':>10}{'mean ms':>10}")
+            for query, row_sql in ROW_QUERIES.items():
+                for label, sql in (("rows", row_sql), ("arrays", ARRAY_QUERIES[query])):
+                    timings = await timed(conn, runs, sql, {**params, "player": player})
+                    print(
+                        f"{query:<22}{label:<14}"
+                        f"{statistics.median(timings) * 1000:>10.2f}"
+                        f"{statistics.fmean(timings) * 1000:>10.2f}"
+                    )
+        finally:
+            collector.SKILL_STORAGE_MODE = original_mode
+            await conn.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--snapshots", type=int, default=5000)
+    parser.add_argument("--changes", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    init_db()
+    asyncio.run(main(args.snapshots, args.changes, args.runs))
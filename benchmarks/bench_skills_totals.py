@@ -0,0 +1,141 @@
+"""
+skills_totals aggregation benchmark: one pass over all skills vs per skill.
+
+Builds years of skill_xp rollup rows in memory — ``(timestamp, skill_xp)``
+tuples as the cursor returns them — and buckets every skill the way
+/api/skills_totals does, timing and measuring the peak memory (tracemalloc)
+of:
+
+* ``per skill`` — a dict per value grouped by skill, then the per-row
+  bucketing of benchmarks.chart_reference once per skill;
+* ``single pass`` — series_totals_aggregator advancing all skills together.
+
+No database access, though importing the services still needs DATABASE_URL
+set:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_skills_totals \\
+        --years 5 --bucket day
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.chart_reference import aggregate_bucket_totals
+from services.charts import (
+    XP_SCALE_SKILL,
+    bucket_start,
+    build_bucket_starts,
+    scale_skill_xp,
+    series_totals_aggregator,
+)
+from skills import RS3_ORDER, SKILL_IDS, SKILL_NAMES
+
+WIDTH = max(SKILL_NAMES) + 1
+ROW_STEP = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def synthetic_rows(years: float, step: timedelta, seed: int = 1) -> list[tuple]:
+    """One skill_xp row per *step* ending now, a few skills gaining in each."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    count = int(timedelta(days=365 * years) / step)
+    skill_xp = [rng.randint(0, 100_000_000) for _ in range(WIDTH)]
+    rows = []
+    for i in range(count, 0, -1):
+        for skill_id in rng.sample(range(WIDTH), 3):
+            skill_xp[skill_id] += rng.randint(1, 500_000)
+        rows.append((now - step * i, list(skill_xp)))
+    return rows
+
+
+def per_skill(rows, bucket: str, starts: list[datetime]) -> list[dict]:
+    per_skill_rows: dict[str, list] = {}
+    for ts, skill_xp in rows:
+        for skill_id, xp in enumerate(skill_xp or []):
+            if xp is not None and skill_id in SKILL_NAMES:
+                per_skill_rows.setdefault(SKILL_NAMES[skill_id], []).append(
+                    {"timestamp": ts, "xp": xp}
+                )
+    order_map = {name: i for i, name in enumerate(RS3_ORDER)}
+    return [
+        {
+            "skill": skill,
+            "totals": aggregate_bucket_totals(
+                per_skill_rows[skill], bucket, starts, "xp", scale_skill_xp
+            ),
+        }
+        for skill in sorted(per_skill_rows, key=lambda x: order_map.get(x, 999))
+    ]
+
+
+def single_pass(rows, bucket: str, starts: list[datetime]) -> list[dict]:
+    aggregator = series_totals_aggregator(bucket, starts, WIDTH)
+    next(aggregator)
+    aggregator.send(rows)
+    totals, has_data = aggregator.send(None)
+    return [
+        {
+            "skill": skill,
+            "totals": [closes[SKILL_IDS[skill]] / XP_SCALE_SKILL for closes in totals],
+        }
+        for skill in RS3_ORDER
+        if has_data[SKILL_IDS[skill]]
+    ]
+
+
+def measure(runs: int, fn, *args) -> tuple[float, float, list]:
+    """Median milliseconds, peak traced MiB and the result of *fn*."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 1024 / 1024, result
+
+
+def main(years: float, rows_every: str, bucket: str, runs: int):
+    rows = synthetic_rows(years, ROW_STEP[rows_every])
+    now = datetime.now(timezone.utc)
+    start = bucket_start(rows[0][0].replace(tzinfo=timezone.utc), bucket)
+    starts = build_bucket_starts(start, bucket_start(now, bucket), bucket)
+    print(
+        f"{len(rows):,} rows × {WIDTH} skills into {len(starts):,} {bucket} "
+        f"buckets, {runs} runs"
+    )
+    print(f"{'aggregation':<14}{'p50 ms':>10}{'peak MiB':>10}{'speedup':>9}")
+
+    baseline_ms = expected = None
+    for label, fn in (("per skill", per_skill), ("single pass", single_pass)):
+        p50_ms, peak_mib, result = measure(runs, fn, rows, bucket, starts)
+        if expected is None:
+            baseline_ms, expected = p50_ms, result
+        elif result != expected:
+            raise SystemExit(f"{label}: result differs from per skill")
+        print(
+            f"{label:<14}{p50_ms:>10.1f}{peak_mib:>10.1f}{baseline_ms / p50_ms:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument(
+        "--rows-every",
+        choices=tuple(ROW_STEP),
+        default="day",
+        help="one rollup row per hour or per day",
+    )
+    parser.add_argument(
+        "--bucket", choices=("hour", "day", "week", "month"), default="day"
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.years, args.rows_every, args.bucket, args.runs)
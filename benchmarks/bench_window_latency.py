@@ -0,0 +1,194 @@
+"""
+Chart window latency regression benchmark: short windows vs history length.
+
+The chart queries seek the one rollup close before their window and then
+range-scan the buckets inside it, both on the xp_rollups primary key
+(player_id, granularity, bucket_start), so a 24-hour chart should cost the
+same with one year of history behind it as with ten.  This writes synthetic
+rollups for every granularity, times the short chart windows, grows the
+history tenfold further into the past and times them again.  It fails when
+a window reads more xp_rollups rows than before or its p50 grows by more
+than --tolerance.
+
+The rollups are committed — the planner reads the ends of the primary key
+index while estimating, and uncommitted rows would make that, not the
+queries, grow — and deleted again at the end.  Run it against a scratch
+database:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_window_latency \\
+        --years 1 --growth 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from db import ROLLUP_GRANULARITIES, async_pool, get_async_conn, init_db
+from services.charts import (
+    _fetch_bucket_closes,
+    _fetch_skill_totals,
+    get_period_window,
+    get_timeframe_window,
+)
+from skills import SKILL_NAMES
+
+BENCH_USERNAME = "bench-window-latency"
+# Latencies this small are dominated by noise; growth below it always passes.
+SLACK_MS = 0.5
+
+# (label, window helper, timeframe/period, value_sql); no value_sql times the
+# skills_totals read, every skill at once.
+CASES = (
+    ("chart day", get_period_window, "day", "total_xp"),
+    ("chart week", get_period_window, "week", "skill_xp[%(subscript)s]"),
+    ("skill_history day", get_timeframe_window, "day", "skill_xp[%(subscript)s]"),
+    ("skill_history month", get_timeframe_window, "month", "skill_xp[%(subscript)s]"),
+    ("skills_totals week", get_timeframe_window, "week", None),
+)
+
+
+async def write_history(conn, player_id: int, start: datetime, end: datetime) -> int:
+    """Add a close to every rollup bucket from start to end (exclusive)."""
+    cur = await conn.execute(
+        """
+        INSERT INTO xp_rollups (
+            player_id, granularity, bucket_start, snapshot_id, close_at,
+            last_seen_at, total_xp, skill_xp
+        )
+        SELECT
+            %(player_id)s, g, b, 0, b, b,
+            extract(epoch FROM b)::bigint,
+            array_fill(extract(epoch FROM b)::bigint / 30, ARRAY[%(skills)s])
+        FROM unnest(%(granularities)s::text[]) AS g,
+             generate_series(
+                 date_trunc(g, %(start)s::timestamp),
+                 %(end)s::timestamp - interval '1 microsecond',
+                 ('1 ' || g)::interval
+             ) AS b
+        ON CONFLICT (player_id, granularity, bucket_start) DO NOTHING
+        """,
+        {
+            "player_id": player_id,
+            "granularities": list(ROLLUP_GRANULARITIES),
+            "skills": max(SKILL_NAMES) + 1,
+            "start": start,
+            "end": end,
+        },
+    )
+    await conn.execute("ANALYZE xp_rollups")
+    return cur.rowcount
+
+
+async def rollup_rows_read(conn) -> int:
+    """xp_rollups rows read so far in this transaction, by any scan."""
+    cur = await conn.execute(
+        """
+        SELECT COALESCE(seq_tup_read, 0) + COALESCE(idx_tup_fetch, 0) AS rows_read
+        FROM pg_stat_xact_user_tables
+        WHERE relname = 'xp_rollups'
+        """
+    )
+    return (await cur.fetchone())["rows_read"]
+
+
+async def fetch_window(conn, player_id: int, bucket, start, end, value_sql):
+    if value_sql is None:
+        return await _fetch_skill_totals(conn, player_id, bucket, start, end)
+    return await _fetch_bucket_closes(
+        conn.cursor(), player_id, bucket, start, end, value_sql, {"subscript": 1}
+    )
+
+
+async def time_cases(conn, player_id: int, now: datetime, runs: int) -> dict:
+    """Return ``{label: (p50 ms, rollup rows read per query)}``."""
+    results = {}
+    for label, window, name, value_sql in CASES:
+        start, end, bucket = window(name, now, None)
+        args = (conn, player_id, bucket, start, end, value_sql)
+        rows_before = await rollup_rows_read(conn)
+        await fetch_window(*args)
+        rows_read = await rollup_rows_read(conn) - rows_before
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await fetch_window(*args)
+            timings.append(time.perf_counter() - started)
+        results[label] = (statistics.median(timings) * 1000, rows_read)
+    return results
+
+
+async def main(years: float, growth: int, runs: int, tolerance: float) -> bool:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    recent = now - timedelta(days=365 * years)
+    oldest = now - timedelta(days=365 * years * growth)
+    async with async_pool, get_async_conn() as conn:
+        # Plan every run.  psycopg prepares a query after a few runs, and
+        # whether Postgres then keeps a generic plan turns on the table
+        # statistics, not on the rows the query reads.
+        conn.prepare_threshold = None
+        try:
+            cur = await conn.execute(
+                """
+                    INSERT INTO players (username) VALUES (%s)
+                    ON CONFLICT (username) DO UPDATE SET username = EXCLUDED.username
+                    RETURNING id
+                    """,
+                (BENCH_USERNAME,),
+            )
+            player_id = (await cur.fetchone())["id"]
+
+            written = await write_history(conn, player_id, recent, now)
+            await conn.commit()
+            print(f"{years:g} years of history: {written:,} rollup rows")
+            short = await time_cases(conn, player_id, now, runs)
+
+            written += await write_history(conn, player_id, oldest, recent)
+            await conn.commit()
+            print(f"{years * growth:g} years of history: {written:,} rollup rows")
+            long = await time_cases(conn, player_id, now, runs)
+        finally:
+            await conn.rollback()
+            await conn.execute(
+                "DELETE FROM xp_rollups WHERE player_id ="
+                " (SELECT id FROM players WHERE username = %s)",
+                (BENCH_USERNAME,),
+            )
+            await conn.execute(
+                "DELETE FROM players WHERE username = %s", (BENCH_USERNAME,)
+            )
+            await conn.commit()
+
+    print()
+    print(
+        f"{'window':<22}{'rows read':>11}{'1x p50 ms':>11}"
+        f"{f'{growth}x p50 ms':>12}{'ratio':>8}"
+    )
+    flat = True
+    for label, *_ in CASES:
+        (short_ms, short_rows), (long_ms, long_rows) = short[label], long[label]
+        ok = long_rows <= short_rows and long_ms <= short_ms * tolerance + SLACK_MS
+        flat = flat and ok
+        print(
+            f"{label:<22}{f'{short_rows} -> {long_rows}':>11}{short_ms:>11.2f}"
+            f"{long_ms:>12.2f}{long_ms / short_ms:>7.2f}x{'' if ok else '  <- grew'}"
+        )
+    return flat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--growth", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="largest allowed p50 ratio between the grown and the base history",
+    )
+    args = parser.parse_args()
+    init_db()
+    if not asyncio.run(main(args.years, args.growth, args.runs, args.tolerance)):
+        raise SystemExit("short-window latency grew with history length")
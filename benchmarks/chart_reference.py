@@ -0,0 +1,95 @@
+"""
+Per-row chart bucketing, as the chart services computed it before the
+rollups.
+
+One row at a time: the close of a bucket is the last value before its end,
+carried forward through empty buckets.  tests/test_chart_sql.py checks the
+SQL bucketing against these, and benchmarks/bench_skills_totals times them
+against the single pass.
+"""
+
+from datetime import datetime
+
+from services.charts import advance_bucket, parse_snapshot_ts, scale_total_xp
+
+
+def aggregate_bucket_totals(
+    rows, bucket: str, starts: list[datetime], value_key: str, scale_fn=scale_total_xp
+) -> list[float | int]:
+    """Per-bucket close, 0 before the first row."""
+    parsed = [
+        (parse_snapshot_ts(row["timestamp"]), row[value_key])
+        for row in rows
+        if row["timestamp"] is not None
+    ]
+    parsed.sort(key=lambda t: t[0])
+
+    if not starts:
+        return []
+
+    values: list[float | int] = []
+    idx = 0
+    previous_close = None
+    first_start = starts[0]
+
+    while idx < len(parsed) and parsed[idx][0] < first_start:
+        previous_close = parsed[idx][1]
+        idx += 1
+
+    for b_start in starts:
+        b_end = advance_bucket(b_start, bucket)
+        bucket_close = previous_close
+        while idx < len(parsed) and parsed[idx][0] < b_end:
+            bucket_close = parsed[idx][1]
+            idx += 1
+
+        values.append(scale_fn(bucket_close or 0))
+        if bucket_close is not None:
+            previous_close = bucket_close
+
+    return values
+
+
+def aggregate_last_snapshot_totals(
+    rows, bucket: str, starts: list[datetime], value_key: str, scale_fn=scale_total_xp
+) -> list[float | int | None]:
+    """Per-bucket close, None before the first row."""
+    parsed = [
+        (parse_snapshot_ts(row["timestamp"]), row[value_key])
+        for row in rows
+        if row["timestamp"] is not None
+    ]
+    parsed.sort(key=lambda t: t[0])
+
+    if not starts:
+        return []
+
+    values: list[float | int | None] = []
+    idx = 0
+    previous_close = None
+    first_start = starts[0]
+    seen_data = False
+
+    while idx < len(parsed) and parsed[idx][0] < first_start:
+        previous_close = parsed[idx][1]
+        idx += 1
+
+    for b_start in starts:
+        b_end = advance_bucket(b_start, bucket)
+        bucket_close = previous_close
+        while idx < len(parsed) and parsed[idx][0] < b_end:
+            bucket_close = parsed[idx][1]
+            idx += 1
+
+        if bucket_close is None and not seen_data:
+            values.append(None)
+            continue
+
+        seen_data = True
+        values.append(
+            scale_fn(bucket_close if bucket_close is not None else previous_close)
+        )
+        if bucket_close is not None:
+            previous_close = bucket_close
+
+    return values
@@ -0,0 +1,166 @@
+"""
+Local stand-in for the RuneMetrics profile API.
+
+Serves ``GET /profile/profile?user=...&activities=...`` with payloads shaped
+like the real endpoint (skill XP ×10, comma-formatted rank, newest-first
+activity list).  Each player's profile is deterministic per username and a
+couple of skills gain XP on every request, so consecutive collections see
+realistic small changes.
+
+Latency, transient failures and private profiles are injectable:
+
+    python -m benchmarks.fake_runemetrics --port 8765 --latency-ms 80 \\
+        --jitter-ms 40 --error-rate 0.02 --private-rate 0.05
+
+Then point the collector at it with
+``RUNEMETRICS_BASE_URL=http://127.0.0.1:8765``.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from skills import SKILL_NAMES
+
+ACTIVITY_TEMPLATES = (
+    ("Levelled up {skill}.", "I levelled my {skill} skill, I am now level {level}."),
+    ("Quest complete: {quest}", "I have completed the {quest} quest."),
+    ("I killed {count} {monster}.", "I killed {count} {monster}."),
+    ("I found a {item}", "I found a {item} while {skill_lower}."),
+    ("Clue scroll completed", "I completed a hard treasure trail."),
+)
+QUESTS = ("The Elder Kiln", "Sliske's Endgame", "Desperate Times", "Fate of the Gods")
+MONSTERS = ("Vorago", "Telos", "Araxxor", "Nex")
+ITEMS = ("Dragon hatchet", "Crystal triskelion fragment", "Elder rune bar")
+
+
+def _user_rng(user: str, salt: str = "") -> random.Random:
+    digest = hashlib.sha256(f"{user.lower()}|{salt}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def build_profile(user: str, tick: int, activity_count: int = 20) -> dict:
+    """Return the profile *user* would have on their *tick*-th request."""
+    rng = _user_rng(user)
+    trained = set(rng.sample(sorted(SKILL_NAMES), 2))
+    skillvalues = []
+    for skill_id in SKILL_NAMES:
+        level = rng.randint(60, 99)
+        xp = level * level * 2_000 * 10 + rng.randint(0, 100_000)
+        if skill_id in trained:
+            xp += tick * rng.randint(5_000, 50_000)
+        skillvalues.append(
+            {
+                "level": level,
+                "xp": xp,
+                "rank": rng.randint(1_000, 500_000),
+                "id": skill_id,
+            }
+        )
+
+    now = datetime.now(timezone.utc)
+    activities = []
+    for i in range(activity_count):
+        event_rng = _user_rng(user, str(tick - i))
+        text, details = event_rng.choice(ACTIVITY_TEMPLATES)
+        skill = SKILL_NAMES[event_rng.choice(sorted(trained))]
+        fields = {
+            "skill": skill,
+            "skill_lower": skill.lower(),
+            "level": event_rng.randint(60, 99),
+            "quest": event_rng.choice(QUESTS),
+            "count": event_rng.randint(2, 50),
+            "monster": event_rng.choice(MONSTERS),
+            "item": event_rng.choice(ITEMS),
+        }
+        activities.append(
+            {
+                "date": (now - timedelta(hours=i)).strftime("%d-%b-%Y %H:%M"),
+                "details": details.format(**fields),
+                "text": text.format(**fields),
+            }
+        )
+
+    total_xp = sum(s["xp"] for s in skillvalues) // 10
+    return {
+        "magic": rng.randint(1_000_000, 50_000_000),
+        "questsstarted": rng.randint(0, 10),
+        "totalskill": sum(s["level"] for s in skillvalues),
+        "questscomplete": rng.randint(150, 340),
+        "questsnotstarted": rng.randint(0, 30),
+        "totalxp": total_xp,
+        "ranged": rng.randint(1_000_000, 50_000_000),
+        "activities": activities,
+        "skillvalues": skillvalues,
+        "name": user,
+        "rank": f"{rng.randint(1_000, 900_000):,}",
+        "melee": rng.randint(1_000_000, 50_000_000),
+        "combatlevel": rng.randint(100, 138),
+        "loggedIn": "false",
+    }
+
+
+def create_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    private_rate: float = 0.0,
+    seed: int | None = None,
+) -> FastAPI:
+    """Build the fake API.
+
+    *error_rate* is the chance any single request returns 503; a player is
+    private (consistently, across requests) with probability *private_rate*
+    or when their name starts with "private".
+    """
+    app = FastAPI(title="Fake RuneMetrics")
+    rng = random.Random(seed)
+    ticks: dict[str, int] = defaultdict(int)
+
+    @app.get("/profile/profile")
+    async def profile(user: str, activities: int = 20):
+        delay_ms = latency_ms + rng.uniform(0, jitter_ms)
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        if rng.random() < error_rate:
+            return JSONResponse({"error": "Service Unavailable"}, status_code=503)
+        if (
+            user.lower().startswith("private")
+            or _user_rng(user, "private").random() < private_rate
+        ):
+            return {"error": "PROFILE_PRIVATE", "loggedIn": "false"}
+        ticks[user] += 1
+        return build_profile(user, ticks[user], activities)
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake RuneMetrics profile API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--private-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(
+            args.latency_ms,
+            args.jitter_ms,
+            args.error_rate,
+            args.private_rate,
+            args.seed,
+        ),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
@@ -0,0 +1,85 @@
+"""
+Collector load harness.
+
+Drives ``collector.collect_roster`` for N synthetic players × M runs against
+the fake RuneMetrics server and reports p50/p99 fetch latency per player and
+ingest latency per run (the roster is written in one batch), plus failure
+counts and overall throughput.  Writes real snapshots,
+so use a scratch database:
+
+    python -m benchmarks.fake_runemetrics --port 8765 --latency-ms 80 &
+    RUNEMETRICS_BASE_URL=http://127.0.0.1:8765 DATABASE_URL=postgresql://... \\
+        python -m benchmarks.load_collector --players 50 --runs 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+
+from collector import close_http_client, collect_roster
+from config import COLLECT_CONCURRENCY, RUNEMETRICS_BASE_URL
+from db import async_pool, init_db
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def report(label: str, values: list[float]):
+    print(
+        f"{label:<8}{len(values):>8}"
+        f"{percentile(values, 50) * 1000:>10.1f}"
+        f"{percentile(values, 99) * 1000:>10.1f}"
+        f"{(statistics.fmean(values) if values else 0.0) * 1000:>10.1f}"
+    )
+
+
+async def main(players: int, runs: int):
+    usernames = [f"loadtest-{i:04d}" for i in range(players)]
+    fetch_s: list[float] = []
+    ingest_s: list[float] = []
+    statuses: Counter[str] = Counter()
+
+    async with async_pool:
+        started = time.perf_counter()
+        try:
+            for _ in range(runs):
+                results = await collect_roster(usernames)
+                for result in results:
+                    statuses[result["status"]] += 1
+                    fetch_s.append(result["fetch_s"])
+                ingest_s.append(max(result["ingest_s"] for result in results))
+        finally:
+            await close_http_client()
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{players} players × {runs} runs against {RUNEMETRICS_BASE_URL} "
+        f"(concurrency {COLLECT_CONCURRENCY})"
+    )
+    print(f"{'':<8}{'samples':>8}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    report("fetch", fetch_s)
+    report("ingest", ingest_s)
+    print("status  " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items())))
+    print(f"{statuses['ok'] / elapsed:.1f} snapshots/s over {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collector load harness")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    if "runescape.com" in RUNEMETRICS_BASE_URL:
+        sys.exit(
+            "RUNEMETRICS_BASE_URL points at the real API — start "
+            "benchmarks.fake_runemetrics and point it there instead."
+        )
+    init_db()
+    asyncio.run(main(args.players, args.runs))
@@ -1,19 +1,59 @@
+import argparse
 import asyncio
 import hashlib
+import itertools
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
 
 import httpx
 
-from config import RS3_USERNAME
-from db import get_conn, init_db
+from activities import classify_activities, parse_activity_ts
+from config import (
+    COLLECT_CONCURRENCY,
+    HTTP_KEEPALIVE_EXPIRY,
+    IMPORT_CHUNK_SIZE,
+    RS3_ROSTER,
+    RS3_USERNAME,
+    RUNEMETRICS_BASE_URL,
+    SKILL_STORAGE_MODE,
+)
+from db import (
+    ROLLUP_GRANULARITIES,
+    ROLLUP_UPSERT_SQL,
+    async_pool,
+    get_async_conn,
+    init_db,
+)
 from log import get_logger
+from services.cache import service_cache
+from services.response_cache import clear_response_cache, precompute_responses
 from skills import SKILL_NAMES
 
 logger = get_logger(__name__)
 
 USERNAME = RS3_USERNAME
-API_URL = f"https://apps.runescape.com/runemetrics/profile/profile?user={USERNAME}&activities=20"
+API_URL = f"{RUNEMETRICS_BASE_URL}/profile/profile"
+
+# Transient RuneMetrics statuses worth retrying with backoff.
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Profile totals that, with the skill values, make up a snapshot fingerprint.
+_FINGERPRINT_FIELDS = (
+    "totalxp",
+    "totalskill",
+    "rank",
+    "combatlevel",
+    "questsstarted",
+    "questscomplete",
+    "questsnotstarted",
+)
 
 _collection_lock = asyncio.Lock()
+# First days of the months whose snapshot/skills partitions are known to exist.
+_partition_months: set[datetime] = set()
+_http_client: httpx.AsyncClient | None = None
 
 
 def hash_activity(text, date, details):
@@ -24,6 +64,10 @@ def legacy_hash_activity(text, date):
     return hashlib.sha256(f"{text}|{date}".encode()).hexdigest()
 
 
+def _profile_params(username: str) -> dict:
+    return {"user": username, "activities": 20}
+
+
 def to_int(value, default=0):
     if value is None:
         return default
@@ -43,125 +87,684 @@ def to_int(value, default=0):
         return default
 
 
-async def _fetch_runemetrics_data(client: httpx.AsyncClient, retries: int = 3):
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide RuneMetrics client, creating it on first use.
+
+    Reusing one client keeps TLS connections to RuneMetrics alive
+    between collections instead of paying a fresh handshake every run.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=15.0,
+            limits=httpx.Limits(
+                max_connections=COLLECT_CONCURRENCY,
+                max_keepalive_connections=COLLECT_CONCURRENCY,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _fetch_runemetrics_data(
+    client: httpx.AsyncClient, username: str = USERNAME, retries: int = 3
+):
     for attempt in range(retries):
         try:
-            r = await client.get(API_URL, timeout=15.0)
+            r = await client.get(API_URL, params=_profile_params(username))
             r.raise_for_status()
             return r.json()
+        except httpx.HTTPStatusError as e:
+            # 429 and 5xx are transient on RuneMetrics; anything else is a
+            # real error and is surfaced to the caller immediately.
+            if e.response.status_code not in _RETRYABLE_STATUS:
+                raise
+            logger.warning(
+                "RuneMetrics API returned %d for %s (attempt %d/%d)",
+                e.response.status_code,
+                username,
+                attempt + 1,
+                retries,
+            )
         except httpx.RequestError as e:
             logger.warning(
-                "RuneMetrics API request failed (attempt %d/%d): %s",
+                "RuneMetrics API request failed for %s (attempt %d/%d): %s",
+                username,
                 attempt + 1,
                 retries,
                 e,
             )
-            if attempt == retries - 1:
-                logger.error("All retries failed for RuneMetrics API.")
-                return None
-            await asyncio.sleep(2**attempt)
+        if attempt == retries - 1:
+            logger.error("All retries failed for RuneMetrics API (%s).", username)
+            return None
+        await asyncio.sleep(2**attempt)
     return None
 
 
+def _is_valid_profile(data, username: str) -> bool:
+    if not data:
+        return False
+    if "error" in data or "skillvalues" not in data:
+        logger.warning(
+            "Invalid RuneMetrics response for user %s — profile may be private",
+            username,
+        )
+        return False
+    return True
+
+
+def snapshot_fingerprint(data: dict) -> str:
+    """Hash the parts of a profile that a snapshot row stores.
+
+    Activities are excluded — they are deduplicated separately — so two
+    payloads with the same fingerprint would produce identical snapshot and
+    skill rows.
+    """
+    normalized = [
+        [to_int(data.get(field), 0) for field in _FINGERPRINT_FIELDS],
+        sorted(
+            (
+                to_int(skill.get("id"), -1),
+                to_int(skill.get("level"), 0),
+                to_int(skill.get("xp"), 0),
+                to_int(skill.get("rank"), 0),
+            )
+            for skill in data.get("skillvalues", [])
+        ),
+    ]
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+
+def _skill_array_literals(data: dict) -> tuple[str, str, str]:
+    """Return the profile's xp/level/rank as Postgres array literals.
+
+    Position N holds skill id N; skills missing from the payload are NULL.
+    Literals (cast to typed arrays in SQL) let several snapshots' arrays
+    travel through one ``unnest`` without being flattened.
+    """
+    xp: list = [None] * (max(SKILL_NAMES) + 1)
+    level = xp.copy()
+    rank = xp.copy()
+    for skill in data.get("skillvalues", []):
+        skill_id = to_int(skill.get("id"), -1)
+        if 0 <= skill_id < len(xp):
+            xp[skill_id] = to_int(skill.get("xp"), 0)
+            level[skill_id] = to_int(skill.get("level"), 0)
+            rank[skill_id] = to_int(skill.get("rank"), 0)
+    return tuple(
+        "{" + ",".join("NULL" if v is None else str(v) for v in values) + "}"
+        for values in (xp, level, rank)
+    )
+
+
+def _collapse_unchanged(entries: list[dict]) -> tuple[list[dict], list[int]]:
+    """Merge consecutive same-fingerprint profiles of a player.
+
+    Returns the distinct entries to write and, for every input entry, the
+    index of the distinct entry it folded into.  Only a player's first
+    distinct entry needs comparing with the player's latest stored snapshot;
+    later ones already differ from their predecessor.
+    """
+    distinct: list[dict] = []
+    owners: list[int] = []
+    last_for_player: dict[str, int] = {}
+    for entry in entries:
+        fingerprint = snapshot_fingerprint(entry["data"])
+        previous = last_for_player.get(entry["username"])
+        if previous is not None and distinct[previous]["fingerprint"] == fingerprint:
+            distinct[previous]["last_seen_at"] = entry["timestamp"]
+            owners.append(previous)
+            continue
+        last_for_player[entry["username"]] = len(distinct)
+        owners.append(len(distinct))
+        distinct.append(
+            {
+                **entry,
+                "fingerprint": fingerprint,
+                "last_seen_at": entry["timestamp"],
+                "check_previous": previous is None,
+            }
+        )
+    return distinct, owners
+
+
+async def _ensure_partitions(timestamps: list[datetime | None]):
+    """Make sure the monthly partitions for *timestamps* (None = now) exist.
+
+    Runs in its own short transaction, before the caller opens its ingest
+    transaction: creating a partition locks the parent table, and a
+    rolled-back ingest must not take the new partition with it.  Months
+    already ensured by this process are skipped, so live collection pays
+    for the check about once a month.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    months = {
+        (ts or now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        for ts in timestamps
+    }
+    missing = months - _partition_months
+    if not missing:
+        return
+    async with get_async_conn() as conn:
+        await conn.execute(
+            "SELECT ensure_monthly_partitions(%s, %s)", (min(missing), max(missing))
+        )
+        await conn.commit()
+    _partition_months.update(missing)
+
+
+async def _write_snapshots(conn, entries: list[dict]) -> list[tuple[int, bool]]:
+    """Write RuneMetrics profiles as snapshots.
+
+    Each entry is ``{"username", "data", "timestamp"}``; a ``None`` timestamp
+    means "now".  A profile whose fingerprint matches the player's previous
+    snapshot writes no new rows: it only advances that snapshot's
+    ``last_seen_at`` watermark.  Returns ``(snapshot_id, created)`` for each
+    entry, in input order.
+
+    Every table is written with a single set-based statement (array
+    ``unnest``), so the round-trip count is the same for one live profile or
+    a chunk of archived ones.  Each player's ``data_version`` is bumped.
+    Each snapshot carries its full skill state as arrays, which is what
+    every reader uses; ``skills`` rows are only written when
+    SKILL_STORAGE_MODE is "full".
+
+    Runs inside the caller's transaction; the caller commits.  Callers first
+    ensure the monthly partitions for the entries' timestamps exist
+    (``_ensure_partitions``).
+    """
+    distinct, owners = _collapse_unchanged(entries)
+    profiles = [entry["data"] for entry in distinct]
+    skill_arrays = [_skill_array_literals(data) for data in profiles]
+
+    # `unchanged` pairs each entry that matches its player's latest stored
+    # snapshot with that snapshot; everything else gets a fresh id drawn
+    # inside the (materialised) `fresh` CTE so ids can be returned in input
+    # order and reused as the snapshot_id of skill and activity rows.
+    cur = await conn.execute(
+        """
+        WITH names AS (
+            SELECT DISTINCT unnest(%(usernames)s::text[]) AS username
+        ), new_players AS (
+            INSERT INTO players (username)
+            SELECT username FROM names
+            ON CONFLICT (username) DO NOTHING
+            RETURNING id, username
+        ), player_ids AS (
+            SELECT id, username FROM new_players
+            UNION ALL
+            SELECT p.id, p.username FROM players p JOIN names USING (username)
+        ), versions AS (
+            -- Moves the read caches' watermark (services/cache.py), changed
+            -- profile or not; new players start at the default.
+            UPDATE players SET data_version = data_version + 1
+            WHERE id IN (SELECT id FROM player_ids)
+        ), src AS (
+            SELECT player_ids.id AS player_id, t.*
+            FROM unnest(
+                %(usernames)s::text[], %(timestamps)s::timestamp[],
+                %(last_seen_at)s::timestamp[], %(fingerprints)s::text[],
+                %(check_previous)s::boolean[],
+                %(total_xp)s::bigint[], %(total_level)s::int[], %(rank)s::int[],
+                %(combat_level)s::int[], %(quests_started)s::int[],
+                %(quests_complete)s::int[], %(quests_not_started)s::int[],
+                %(skill_xp)s::text[], %(skill_level)s::text[],
+                %(skill_rank)s::text[]
+            ) WITH ORDINALITY AS t(
+                username, ts, last_seen_at, fingerprint, check_previous,
+                total_xp, total_level, overall_rank, combat_level,
+                quests_started, quests_complete, quests_not_started,
+                skill_xp, skill_level, skill_rank, ord
+            )
+            JOIN player_ids USING (username)
+        ), unchanged AS (
+            SELECT src.ord, src.player_id, src.last_seen_at, prev.id, prev.timestamp
+            FROM src
+            CROSS JOIN LATERAL (
+                SELECT s.id, s.timestamp, s.fingerprint
+                FROM snapshots s
+                WHERE s.player_id = src.player_id
+                  AND s.timestamp <= COALESCE(src.ts, LOCALTIMESTAMP)
+                ORDER BY s.timestamp DESC
+                LIMIT 1
+            ) prev
+            WHERE src.check_previous AND prev.fingerprint = src.fingerprint
+        ), touched AS (
+            UPDATE snapshots s
+            SET last_seen_at = GREATEST(
+                s.last_seen_at, COALESCE(unchanged.last_seen_at, LOCALTIMESTAMP)
+            )
+            FROM unchanged
+            WHERE s.id = unchanged.id AND s.timestamp = unchanged.timestamp
+        ), fresh AS (
+            SELECT
+                nextval(pg_get_serial_sequence('snapshots', 'id')) AS id,
+                COALESCE(src.ts, LOCALTIMESTAMP) AS timestamp,
+                src.*
+            FROM src
+            WHERE src.ord NOT IN (SELECT ord FROM unchanged)
+        ), inserted AS (
+            INSERT INTO snapshots (
+                id, player_id, timestamp, last_seen_at, fingerprint, total_xp,
+                total_level, overall_rank, combat_level, quests_started,
+                quests_complete, quests_not_started, skill_xp, skill_level,
+                skill_rank
+            )
+            SELECT
+                id, player_id, timestamp,
+                COALESCE(last_seen_at, LOCALTIMESTAMP), fingerprint, total_xp,
+                total_level, overall_rank, combat_level, quests_started,
+                quests_complete, quests_not_started, skill_xp::bigint[],
+                skill_level::int[], skill_rank::int[]
+            FROM fresh
+        )
+        SELECT ord, id, player_id, timestamp, true AS created FROM fresh
+        UNION ALL
+        SELECT ord, id, player_id, timestamp, false AS created FROM unchanged
+        ORDER BY ord
+        """,
+        {
+            "usernames": [entry["username"] for entry in distinct],
+            "timestamps": [entry["timestamp"] for entry in distinct],
+            "last_seen_at": [entry["last_seen_at"] for entry in distinct],
+            "fingerprints": [entry["fingerprint"] for entry in distinct],
+            "check_previous": [entry["check_previous"] for entry in distinct],
+            "total_xp": [to_int(d.get("totalxp"), 0) for d in profiles],
+            "total_level": [to_int(d.get("totalskill"), 0) for d in profiles],
+            "rank": [to_int(d.get("rank"), 0) for d in profiles],
+            "combat_level": [to_int(d.get("combatlevel"), 0) for d in profiles],
+            "quests_started": [to_int(d.get("questsstarted"), 0) for d in profiles],
+            "quests_complete": [to_int(d.get("questscomplete"), 0) for d in profiles],
+            "quests_not_started": [
+                to_int(d.get("questsnotstarted"), 0) for d in profiles
+            ],
+            "skill_xp": [xp for xp, _, _ in skill_arrays],
+            "skill_level": [level for _, level, _ in skill_arrays],
+            "skill_rank": [rank for _, _, rank in skill_arrays],
+        },
+    )
+    rows = await cur.fetchall()
+    written = [(row["id"], row["created"]) for row in rows]
+    # Snapshots are partitioned by timestamp, so follow-up statements carry
+    # (player_id, timestamp) alongside ids to let the planner prune.
+    placed = {row["id"]: (row["player_id"], row["timestamp"]) for row in rows}
+
+    skill_rows = [
+        (snapshot_id, skill)
+        for (snapshot_id, created), data in zip(written, profiles)
+        if created
+        for skill in data["skillvalues"]
+    ]
+    if skill_rows and SKILL_STORAGE_MODE == "full":
+        await conn.execute(
+            """
+            INSERT INTO skills (
+                snapshot_id, player_id, taken_at, skill, level, xp, rank
+            )
+            SELECT * FROM unnest(
+                %(snapshot_ids)s::bigint[], %(player_ids)s::bigint[],
+                %(taken_at)s::timestamp[], %(skills)s::text[],
+                %(levels)s::int[], %(xps)s::bigint[], %(ranks)s::int[]
+            )
+            """,
+            {
+                "snapshot_ids": [snapshot_id for snapshot_id, _ in skill_rows],
+                "player_ids": [placed[snapshot_id][0] for snapshot_id, _ in skill_rows],
+                "taken_at": [placed[snapshot_id][1] for snapshot_id, _ in skill_rows],
+                "skills": [
+                    SKILL_NAMES.get(sk["id"], f"Unknown-{sk['id']}")
+                    for _, sk in skill_rows
+                ],
+                "levels": [to_int(sk.get("level"), 0) for _, sk in skill_rows],
+                "xps": [to_int(sk.get("xp"), 0) for _, sk in skill_rows],
+                "ranks": [to_int(sk.get("rank"), 0) for _, sk in skill_rows],
+            },
+        )
+
+    # Roll the new closes (and refreshed last_seen_at of unchanged ones) up
+    # into the chart buckets.
+    await conn.execute(
+        ROLLUP_UPSERT_SQL.format(
+            where="s.id = ANY(%(ids)s) AND s.timestamp = ANY(%(timestamps)s)"
+        ),
+        {
+            "ids": list(placed),
+            "timestamps": [ts for _, ts in placed.values()],
+            "granularities": list(ROLLUP_GRANULARITIES),
+        },
+    )
+
+    # Activities of a profile folded into an earlier snapshot still attach to
+    # it; anything already stored is dropped by the hash checks below.  Each
+    # is parsed and classified here, once, so readers never have to.
+    activities = [
+        (written[owner][0], act)
+        for owner, entry in zip(owners, entries)
+        for act in entry["data"].get("activities", [])
+    ]
+    classified = classify_activities(
+        (act["text"], act.get("details")) for _, act in activities
+    )
+    activity_rows = [
+        (snapshot_id, act, meta)
+        for (snapshot_id, act), meta in zip(activities, classified)
+    ]
+    if activity_rows:
+        # Rows stored under the legacy hash (no details) are filtered out by
+        # NOT EXISTS; current-hash duplicates, including races with a
+        # concurrent collection, are dropped by the UNIQUE(hash) conflict.
+        # WITH ORDINALITY keeps ids in payload order, as the old loop did.
+        await conn.execute(
+            """
+            INSERT INTO activities (
+                snapshot_id, player_id, text, date, details, hash,
+                occurred_at, type_key, skill
+            )
+            SELECT
+                a.snapshot_id, a.player_id, a.text, a.date, a.details, a.hash,
+                a.occurred_at, a.type_key, a.skill
+            FROM unnest(
+                %(snapshot_ids)s::bigint[], %(player_ids)s::bigint[],
+                %(texts)s::text[], %(dates)s::text[], %(details)s::text[],
+                %(hashes)s::text[], %(legacy_hashes)s::text[],
+                %(occurred_at)s::timestamptz[], %(type_keys)s::text[],
+                %(skills)s::text[]
+            ) WITH ORDINALITY AS a(
+                snapshot_id, player_id, text, date, details, hash, legacy_hash,
+                occurred_at, type_key, skill, ord
+            )
+            WHERE NOT EXISTS (
+                SELECT 1 FROM activities e WHERE e.hash = a.legacy_hash
+            )
+            ORDER BY a.ord
+            ON CONFLICT (hash) DO NOTHING
+            """,
+            {
+                "snapshot_ids": [snapshot_id for snapshot_id, _, _ in activity_rows],
+                "player_ids": [
+                    placed[snapshot_id][0] for snapshot_id, _, _ in activity_rows
+                ],
+                "texts": [act["text"] for _, act, _ in activity_rows],
+                "dates": [act["date"] for _, act, _ in activity_rows],
+                "details": [act.get("details") for _, act, _ in activity_rows],
+                "hashes": [
+                    hash_activity(act["text"], act["date"], act.get("details"))
+                    for _, act, _ in activity_rows
+                ],
+                "legacy_hashes": [
+                    legacy_hash_activity(act["text"], act["date"])
+                    for _, act, _ in activity_rows
+                ],
+                "occurred_at": [
+                    parse_activity_ts(act["date"]) for _, act, _ in activity_rows
+                ],
+                "type_keys": [type_key for _, _, (type_key, _) in activity_rows],
+                "skills": [skill for _, _, (_, skill) in activity_rows],
+            },
+        )
+
+    return [written[owner] for owner in owners]
+
+
+async def _ingest_profile(conn, username: str, data: dict) -> tuple[int, bool]:
+    """Write one live RuneMetrics profile and return ``(snapshot_id, created)``.
+
+    An unchanged profile only refreshes the previous snapshot's
+    ``last_seen_at``.  Runs inside the caller's transaction; the caller
+    commits.
+    """
+    [(snapshot_id, created)] = await _write_snapshots(
+        conn, [{"username": username, "data": data, "timestamp": None}]
+    )
+    _log_collected(username, data, snapshot_id, created)
+    return snapshot_id, created
+
+
+def _log_collected(username: str, data: dict, snapshot_id: int, created: bool):
+    if created:
+        logger.info(
+            "Snapshot collected for %s — total XP: %s",
+            username,
+            to_int(data.get("totalxp"), 0),
+        )
+    else:
+        logger.info("Profile unchanged for %s — snapshot %s", username, snapshot_id)
+
+
 async def collect_snapshot():
     async with _collection_lock:
-        async with httpx.AsyncClient() as client:
-            data = await _fetch_runemetrics_data(client)
+        data = await _fetch_runemetrics_data(get_http_client())
 
-        if not data:
+        if not _is_valid_profile(data, USERNAME):
             return
 
-        if "error" in data or "skillvalues" not in data:
-            logger.warning(
-                "Invalid RuneMetrics response for user %s — profile may be private",
-                USERNAME,
-            )
-            return
+        await _ensure_partitions([None])
+        async with get_async_conn() as conn:
+            await _ingest_profile(conn, USERNAME, data)
+            await clear_response_cache(conn)
+            await conn.commit()
+        service_cache.invalidate()
+        await precompute_responses()
+
+
+async def collect_roster(usernames: list[str] | None = None) -> list[dict]:
+    """Collect every player in *usernames* (default: RS3_ROSTER) concurrently.
+
+    Profiles are fetched over the shared keep-alive client with at most
+    COLLECT_CONCURRENCY requests in flight, then the valid ones are written
+    together by one _write_snapshots call.  Returns one timing/status record
+    per player; ``ingest_s`` is that shared write's duration.
+    """
+    usernames = usernames or RS3_ROSTER
+    client = get_http_client()
+    semaphore = asyncio.Semaphore(COLLECT_CONCURRENCY)
+
+    async def fetch_one(username: str) -> dict:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                data = await _fetch_runemetrics_data(client, username)
+            except httpx.HTTPError as exc:
+                logger.error("RuneMetrics fetch failed for %s: %s", username, exc)
+                data = None
+            return {
+                "username": username,
+                "data": data,
+                "fetch_s": time.perf_counter() - started,
+                "ingest_s": 0.0,
+            }
+
+    async with _collection_lock:
+        results = await asyncio.gather(*(fetch_one(name) for name in usernames))
+
+        valid, entries = [], []
+        for result in results:
+            data = result.pop("data")
+            if _is_valid_profile(data, result["username"]):
+                valid.append(result)
+                entries.append(
+                    {"username": result["username"], "data": data, "timestamp": None}
+                )
+            else:
+                result["status"] = "failed" if data is None else "invalid"
+
+        if entries:
+            await _ensure_partitions([None])
+            async with get_async_conn() as conn:
+                started = time.perf_counter()
+                written = await _write_snapshots(conn, entries)
+                await clear_response_cache(conn)
+                await conn.commit()
+                ingest_s = time.perf_counter() - started
+            for result, entry, (snapshot_id, created) in zip(valid, entries, written):
+                _log_collected(entry["username"], entry["data"], snapshot_id, created)
+                result["ingest_s"] = ingest_s
+                result["status"] = "ok" if created else "unchanged"
+            service_cache.invalidate()
+            await precompute_responses()
+
+    for result in results:
+        logger.info(
+            "Roster collection %s: %s (fetch %.3fs, ingest %.3fs)",
+            result["username"],
+            result["status"],
+            result["fetch_s"],
+            result["ingest_s"],
+        )
+    return results
+
+
+def _parse_archive_ts(value) -> datetime:
+    """Parse an archived capture time (ISO-8601 or epoch seconds) to naive UTC."""
+    if isinstance(value, int | float):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
 
-        with get_conn() as conn:
-            # INSERT OR IGNORE → ON CONFLICT DO NOTHING
-            conn.execute(
-                "INSERT INTO players (username) VALUES (%s) ON CONFLICT DO NOTHING",
-                (USERNAME,),
+
+def _iter_archive(path: str, after_line: int, default_username: str):
+    """Yield ``(line_no, entry)`` for each importable line past *after_line*.
+
+    Lines are either ``{"timestamp": ..., "profile": {...}}`` or a raw profile
+    carrying its own ``timestamp`` key.  The file is streamed, so memory use
+    does not depend on its size.
+    """
+    with open(path, encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            if line_no <= after_line or not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                profile = record.get("profile", record)
+                timestamp = _parse_archive_ts(record["timestamp"])
+            except (KeyError, TypeError, ValueError) as exc:
+                logger.warning(
+                    "Skipping %s:%d — unreadable record: %s", path, line_no, exc
+                )
+                continue
+            if "error" in profile or "skillvalues" not in profile:
+                continue
+            yield (
+                line_no,
+                {
+                    "username": profile.get("name") or default_username,
+                    "data": profile,
+                    "timestamp": timestamp,
+                },
             )
-            row = conn.execute(
-                "SELECT id FROM players WHERE username = %s", (USERNAME,)
-            ).fetchone()
-            player_id = row["id"]
-
-            rank = to_int(data.get("rank"), 0)
-            total_xp = to_int(data.get("totalxp"), 0)
-            total_level = to_int(data.get("totalskill"), 0)
-            combat_level = to_int(data.get("combatlevel"), 0)
-            quests_started = to_int(data.get("questsstarted"), 0)
-            quests_complete = to_int(data.get("questscomplete"), 0)
-            quests_not_started = to_int(data.get("questsnotstarted"), 0)
-
-            # Use RETURNING id instead of lastrowid
-            row = conn.execute(
+
+
+async def import_archive(
+    path: str, chunk_size: int = IMPORT_CHUNK_SIZE, username: str = USERNAME
+) -> int:
+    """Backfill snapshots from a JSONL dump of RuneMetrics profiles.
+
+    Original capture times are kept.  Each chunk is committed together with
+    its checkpoint, so an interrupted import resumes after the last committed
+    line when re-run on the same file.  Consecutive identical profiles collapse
+    into one snapshot (see ``_write_snapshots``).  Each chunk also clears
+    the stored responses, which are precomputed again once the import ends.
+    Returns the number of new snapshots written by this run.
+    """
+    source = str(Path(path).resolve())
+    async with get_async_conn() as conn:
+        cur = await conn.execute(
+            "SELECT line_no FROM import_checkpoints WHERE source = %s", (source,)
+        )
+        row = await cur.fetchone()
+    after_line = row["line_no"] if row else 0
+    if after_line:
+        logger.info("Resuming import of %s after line %d", source, after_line)
+
+    imported = created = 0
+    for chunk in itertools.batched(
+        _iter_archive(path, after_line, username), chunk_size
+    ):
+        await _ensure_partitions([entry["timestamp"] for _, entry in chunk])
+        async with get_async_conn() as conn:
+            written = await _write_snapshots(conn, [entry for _, entry in chunk])
+            await conn.execute(
                 """
-                INSERT INTO snapshots (
-                    player_id, total_xp, total_level, overall_rank,
-                    combat_level, quests_started, quests_complete, quests_not_started
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
+                INSERT INTO import_checkpoints (source, line_no)
+                VALUES (%s, %s)
+                ON CONFLICT (source) DO UPDATE
+                SET line_no = EXCLUDED.line_no, updated_at = CURRENT_TIMESTAMP
                 """,
-                (
-                    player_id,
-                    total_xp,
-                    total_level,
-                    rank,
-                    combat_level,
-                    quests_started,
-                    quests_complete,
-                    quests_not_started,
-                ),
-            ).fetchone()
-            snapshot_id = row["id"]
-
-            skills_data = [
-                (
-                    snapshot_id,
-                    SKILL_NAMES.get(skill["id"], f"Unknown-{skill['id']}"),
-                    to_int(skill.get("level"), 0),
-                    to_int(skill.get("xp"), 0),
-                    to_int(skill.get("rank"), 0),
-                )
-                for skill in data["skillvalues"]
-            ]
+                (source, chunk[-1][0]),
+            )
+            await clear_response_cache(conn)
+            await conn.commit()
+        imported += len(chunk)
+        created += len({snapshot_id for snapshot_id, new in written if new})
+        logger.info("Imported %d profiles (through line %d)", imported, chunk[-1][0])
+    if imported:
+        service_cache.invalidate()
+        await precompute_responses()
 
-            with conn.cursor() as cur:
-                cur.executemany(
-                    "INSERT INTO skills (snapshot_id, skill, level, xp, rank) VALUES (%s, %s, %s, %s, %s)",
-                    skills_data,
-                )
+    logger.info(
+        "Import of %s complete — %d profiles, %d new snapshots",
+        source,
+        imported,
+        created,
+    )
+    return created
 
-            for act in data.get("activities", []):
-                details = act.get("details")
-                h = hash_activity(act["text"], act["date"], details)
-                legacy_h = legacy_hash_activity(act["text"], act["date"])
-                existing = conn.execute(
-                    "SELECT 1 FROM activities WHERE hash IN (%s, %s) LIMIT 1",
-                    (h, legacy_h),
-                ).fetchone()
-                if existing:
-                    continue
-                # The hash column has a UNIQUE constraint — ON CONFLICT DO NOTHING handles races
-                conn.execute(
-                    """
-                    INSERT INTO activities (snapshot_id, text, date, details, hash)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                    """,
-                    (snapshot_id, act["text"], act["date"], details, h),
-                )
 
-            conn.commit()
+async def _run(args: argparse.Namespace):
+    async with async_pool:
+        try:
+            if args.command == "batch":
+                await collect_roster(args.usernames or None)
+            elif args.command == "import":
+                await import_archive(args.file, args.chunk_size, args.username)
+            else:
+                await collect_snapshot()
+        finally:
+            await close_http_client()
 
-        logger.info("Snapshot collected for %s — total XP: %s", USERNAME, total_xp)
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="RuneMetrics snapshot collector")
+    parser.set_defaults(command="collect")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("collect", help="collect RS3_USERNAME once (default)")
+    batch = commands.add_parser("batch", help="collect a roster concurrently")
+    batch.add_argument(
+        "usernames",
+        nargs="*",
+        help="players to collect (default: RS3_ROSTER)",
+    )
+    importer = commands.add_parser(
+        "import", help="backfill snapshots from a JSONL profile dump"
+    )
+    importer.add_argument("file", help="JSONL file, one profile per line")
+    importer.add_argument(
+        "--chunk-size",
+        type=int,
+        default=IMPORT_CHUNK_SIZE,
+        help="snapshots per transaction (default: IMPORT_CHUNK_SIZE)",
+    )
+    importer.add_argument(
+        "--username",
+        default=USERNAME,
+        help="player for profiles without a name (default: RS3_USERNAME)",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    from log import configure_logging
+
+    configure_logging()
+    args = _parse_args()
     init_db()
-    asyncio.run(collect_snapshot())
+    asyncio.run(_run(args))
@@ -8,6 +8,36 @@ from pathlib import Path
 
 RS3_USERNAME: str = os.getenv("RS3_USERNAME", "Varxis")
 
+# Players collected by `python collector.py batch` (comma-separated).  The
+# dashboard always shows RS3_USERNAME; the roster only widens ingestion.
+RS3_ROSTER: list[str] = [
+    name.strip() for name in os.getenv("RS3_ROSTER", "").split(",") if name.strip()
+] or [RS3_USERNAME]
+
+# ---------------------------------------------------------------------------
+# Collector
+# ---------------------------------------------------------------------------
+
+# RuneMetrics API root.  Point it at `python -m benchmarks.fake_runemetrics`
+# to exercise the collector without touching the real API.
+RUNEMETRICS_BASE_URL: str = os.getenv(
+    "RUNEMETRICS_BASE_URL", "https://apps.runescape.com/runemetrics"
+).rstrip("/")
+
+# Max RuneMetrics requests in flight during a roster collection.
+COLLECT_CONCURRENCY: int = int(os.getenv("COLLECT_CONCURRENCY", "4"))
+
+# Seconds an idle keep-alive connection to RuneMetrics is kept open.
+HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120"))
+
+# Snapshots always carry their full skill state as arrays, which is what the
+# dashboard and charts read.  "full" also writes one `skills` row per skill
+# per snapshot, for ad-hoc SQL over the per-row layout; "wide" writes none.
+SKILL_STORAGE_MODE: str = os.getenv("SKILL_STORAGE_MODE", "wide")
+
+# Snapshots written per transaction by `python collector.py import`.
+IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
 # ---------------------------------------------------------------------------
 # Admin auth
 # ---------------------------------------------------------------------------
@@ -31,3 +61,38 @@ SECRET_KEY: str = os.getenv("SECRET_KEY", secrets.token_hex(32))
 DATA_DIR: Path = Path(os.getenv("DATA_DIR", "data"))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH: Path = DATA_DIR / "tracker.db"
+
+# Retention (`python db.py downsample` / the admin page): snapshots older
+# than RETENTION_DAILY_DAYS are thinned to the last one of each day, older
+# than RETENTION_WEEKLY_DAYS to the last one of each week.  0 disables a
+# tier.  Each batch of RETENTION_BATCH_SIZE removed snapshots is its own
+# transaction.
+RETENTION_DAILY_DAYS: int = int(os.getenv("RETENTION_DAILY_DAYS", "90"))
+RETENTION_WEEKLY_DAYS: int = int(os.getenv("RETENTION_WEEKLY_DAYS", "365"))
+RETENTION_BATCH_SIZE: int = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+
+# Rows fetched per round trip when a full-history chart query streams its
+# server-side cursor through an aggregator.
+STREAM_BATCH_SIZE: int = int(os.getenv("STREAM_BATCH_SIZE", "2000"))
+
+# Chart and dashboard results kept per process (services/cache.py); 0
+# disables the cache.  Keep it above the number of precomputed responses
+# (services.response_cache.RESPONSES, about 300), or each collection's
+# precompute pass evicts its own first results.
+SERVICE_CACHE_SIZE: int = int(os.getenv("SERVICE_CACHE_SIZE", "512"))
+
+# ---------------------------------------------------------------------------
+# HTTP caching
+# ---------------------------------------------------------------------------
+
+# Minute past each hour at which Cloud Scheduler triggers /api/update (see
+# cloudscheduler.yaml).  Read responses are cacheable until the next one.
+COLLECT_MINUTE: int = int(os.getenv("COLLECT_MINUTE", "0"))
+
+# Seconds a cache may keep serving a read response past that while it
+# revalidates, which covers the collection itself.
+HTTP_STALE_WHILE_REVALIDATE: int = int(os.getenv("HTTP_STALE_WHILE_REVALIDATE", "300"))
+
+# Smallest JSON / HTML / CSS / JavaScript body sent compressed (brotli when
+# installed and accepted, else gzip).
+COMPRESS_MIN_SIZE: int = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
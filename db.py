@@ -1,13 +1,25 @@
 import argparse
+import itertools
 import os
+import time
 from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
 
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
-
-from config import DATA_DIR, DB_PATH  # noqa: F401 — kept for API compatibility
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from activities import classify_activities, parse_activity_ts
+from config import (
+    DATA_DIR,  # noqa: F401 — kept for API compatibility
+    DB_PATH,  # noqa: F401
+    RETENTION_BATCH_SIZE,
+    RETENTION_DAILY_DAYS,
+    RETENTION_WEEKLY_DAYS,
+)
 from log import get_logger
+from skills import SKILL_NAMES
 
 logger = get_logger(__name__)
 
@@ -21,6 +33,17 @@ pool = ConnectionPool(
     kwargs={"row_factory": dict_row},
 )
 
+# Async pool used by the collector and the public request handlers.  An
+# AsyncConnectionPool needs a running event loop to open, so it is created
+# closed here and opened by the app lifespan (or by the collector CLI).
+async_pool = AsyncConnectionPool(
+    conninfo=DATABASE_URL,
+    min_size=1,
+    max_size=10,
+    open=False,
+    kwargs={"row_factory": dict_row},
+)
+
 MigrationFn = Callable[[psycopg.Connection], None]
 
 
@@ -28,6 +51,10 @@ def get_conn():
     return pool.connection()
 
 
+def get_async_conn():
+    return async_pool.connection()
+
+
 def _get_table_columns(conn: psycopg.Connection, table_name: str) -> set[str]:
     with conn.cursor() as cur:
         cur.execute(
@@ -67,11 +94,629 @@ def _mark_migration_applied(conn: psycopg.Connection, version: str):
     )
 
 
+# ----------------------
+# XP rollups
+# ----------------------
+
+# Bucket granularities kept in xp_rollups; they match the chart buckets in
+# services/charts.py (Postgres date_trunc weeks start on Monday, as there).
+ROLLUP_GRANULARITIES = ("hour", "day", "week", "month")
+
+# Upsert the closing snapshot of every (player, granularity, bucket) touched
+# by the snapshots matching {where}.  A bucket row only moves forward: an
+# older snapshot (e.g. a backfill) never replaces a later close.
+ROLLUP_UPSERT_SQL = """
+    INSERT INTO xp_rollups (
+        player_id, granularity, bucket_start, snapshot_id, close_at,
+        last_seen_at, total_xp, skill_xp
+    )
+    SELECT DISTINCT ON (s.player_id, g.granularity, bucket_start)
+        s.player_id, g.granularity,
+        date_trunc(g.granularity, s.timestamp) AS bucket_start,
+        s.id, s.timestamp, s.last_seen_at, s.total_xp, s.skill_xp
+    FROM snapshots s
+    CROSS JOIN unnest(%(granularities)s::text[]) AS g(granularity)
+    WHERE {where}
+    ORDER BY s.player_id, g.granularity, bucket_start, s.timestamp DESC, s.id DESC
+    ON CONFLICT (player_id, granularity, bucket_start) DO UPDATE
+    SET snapshot_id = EXCLUDED.snapshot_id,
+        close_at = EXCLUDED.close_at,
+        last_seen_at = EXCLUDED.last_seen_at,
+        total_xp = EXCLUDED.total_xp,
+        skill_xp = EXCLUDED.skill_xp
+    WHERE (EXCLUDED.close_at, EXCLUDED.snapshot_id)
+        >= (xp_rollups.close_at, xp_rollups.snapshot_id)
+"""
+
+
+def mark_history_changed(
+    conn: psycopg.Connection, player_ids: list[int] | None = None
+) -> None:
+    """Invalidate the read caches after changing stored history.
+
+    Bumps the data_version of *player_ids* (default: every player), which
+    moves the cache watermark (services.cache.fetch_watermark) on every
+    instance, and empties response_cache.  Runs in the caller's transaction.
+    The collector's ingest does the same in its own statements.
+    """
+    conn.execute(
+        """
+        UPDATE players SET data_version = data_version + 1
+        WHERE %(ids)s::bigint[] IS NULL OR id = ANY(%(ids)s)
+        """,
+        {"ids": player_ids},
+    )
+    conn.execute("DELETE FROM response_cache")
+
+
+def rebuild_rollups(conn: psycopg.Connection) -> int:
+    """Recompute xp_rollups from snapshots; returns the number of rows."""
+    conn.execute("DELETE FROM xp_rollups")
+    cur = conn.execute(
+        ROLLUP_UPSERT_SQL.format(where="true"),
+        {"granularities": list(ROLLUP_GRANULARITIES)},
+    )
+    return cur.rowcount
+
+
+# ----------------------
+# Monthly partitions
+# ----------------------
+
+# snapshots and skills are range-partitioned by month on their timestamp
+# (snapshots.timestamp, skills.taken_at), in partitions named
+# <table>_pYYYYMM.  init_db creates this many months ahead of the current
+# one; the collector creates any others it needs (backfills) on demand.
+PARTITIONED_TABLES = ("snapshots", "skills")
+PARTITION_PREMAKE_MONTHS = 2
+ARCHIVE_SCHEMA = "archive"
+
+
+def _month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return _month_start(dt).replace(year=index // 12, month=index % 12 + 1)
+
+
+def ensure_partitions(conn: psycopg.Connection, start: datetime, end: datetime) -> int:
+    """Create any missing monthly partitions covering [start, end]."""
+    cur = conn.execute(
+        "SELECT ensure_monthly_partitions(%s, %s) AS created", (start, end)
+    )
+    return cur.fetchone()["created"]
+
+
+def archive_partitions(
+    conn: psycopg.Connection, before: datetime, drop: bool = False
+) -> list[str]:
+    """Detach every monthly partition that ends on or before *before*.
+
+    Detached partitions move to the ``archive`` schema (still queryable,
+    no longer scanned by the app) or are dropped.  Charts keep showing the
+    archived months through xp_rollups.  Activities are not partitioned and
+    the feed selects them by player_id, so those months' activities stay in
+    the feed; their snapshot_id then names an archived snapshot.  The read
+    caches are invalidated (mark_history_changed).
+    """
+    cutoff = _month_start(before)
+    cur = conn.execute(
+        """
+        SELECT child.relname AS partition, parent.relname AS parent
+        FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE parent.relname = ANY(%s)
+        ORDER BY child.relname
+        """,
+        (list(PARTITIONED_TABLES),),
+    )
+    archived = []
+    for row in cur.fetchall():
+        month = datetime.strptime(row["partition"].rsplit("_p", 1)[1], "%Y%m")
+        if month >= cutoff:
+            continue
+        partition = sql.Identifier(row["partition"])
+        conn.execute(
+            sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                sql.Identifier(row["parent"]), partition
+            )
+        )
+        if drop:
+            conn.execute(sql.SQL("DROP TABLE {}").format(partition))
+        else:
+            conn.execute(
+                sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(
+                    sql.Identifier(ARCHIVE_SCHEMA)
+                )
+            )
+            conn.execute(
+                sql.SQL("ALTER TABLE {} SET SCHEMA {}").format(
+                    partition, sql.Identifier(ARCHIVE_SCHEMA)
+                )
+            )
+        archived.append(row["partition"])
+    if archived:
+        mark_history_changed(conn)
+    return archived
+
+
+# ----------------------
+# Retention
+# ----------------------
+
+# Pairs every snapshot that downsampling removes with the one it folds into:
+# the last snapshot of its player's day (older than daily_before) or week
+# (older than weekly_before).  A week that spans two months is split at the
+# month start, so each month's closing snapshot survives along with each
+# week's, and rebuild_rollups reproduces the week and month rollups.
+_DOWNSAMPLE_PLAN_SQL = """
+    WITH tiered AS (
+        SELECT id, player_id, timestamp,
+            CASE
+                WHEN timestamp < %(weekly_before)s::timestamp
+                    THEN GREATEST(
+                        date_trunc('week', timestamp),
+                        date_trunc('month', timestamp)
+                    )
+                WHEN timestamp < %(daily_before)s::timestamp
+                    THEN date_trunc('day', timestamp)
+            END AS bucket_start
+        FROM snapshots
+        WHERE timestamp < GREATEST(
+            %(daily_before)s::timestamp, %(weekly_before)s::timestamp
+        )
+    ), closes AS (
+        SELECT id, player_id, timestamp,
+            first_value(id) OVER bucket AS kept_id,
+            first_value(timestamp) OVER bucket AS kept_at
+        FROM tiered
+        WINDOW bucket AS (
+            PARTITION BY player_id, bucket_start
+            ORDER BY timestamp DESC, id DESC
+        )
+    )
+    SELECT id, player_id, timestamp, kept_id, kept_at
+    FROM closes
+    WHERE id <> kept_id
+    ORDER BY timestamp, id
+"""
+
+# One batch: repoint activities to the kept snapshot, then delete.
+# The `taken_at` / `timestamp` filters let each statement prune partitions.
+_DOWNSAMPLE_BATCH_SQL = {
+    "activities": """
+        UPDATE activities a
+        SET snapshot_id = m.kept_id
+        FROM unnest(%(ids)s::bigint[], %(kept_ids)s::bigint[]) AS m(id, kept_id)
+        WHERE a.snapshot_id = m.id
+    """,
+    "skills": """
+        DELETE FROM skills
+        WHERE snapshot_id = ANY(%(ids)s) AND taken_at = ANY(%(timestamps)s)
+    """,
+    "rollups": """
+        DELETE FROM xp_rollups
+        WHERE granularity = 'hour'
+          AND (player_id, bucket_start) IN (
+              SELECT player_id, date_trunc('hour', taken_at)
+              FROM unnest(%(player_ids)s::bigint[], %(timestamps)s::timestamp[])
+                  AS m(player_id, taken_at)
+          )
+          AND snapshot_id = ANY(%(ids)s)
+    """,
+    "snapshots": """
+        DELETE FROM snapshots
+        WHERE id = ANY(%(ids)s) AND timestamp = ANY(%(timestamps)s)
+    """,
+}
+
+
+def downsample_snapshots(
+    conn: psycopg.Connection,
+    daily_days: int = RETENTION_DAILY_DAYS,
+    weekly_days: int = RETENTION_WEEKLY_DAYS,
+    batch_size: int = RETENTION_BATCH_SIZE,
+) -> dict:
+    """Thin old snapshots to one per day / week and report what was reclaimed.
+
+    Snapshots older than *daily_days* (counted from midnight) keep only the
+    last one of each day, older than *weekly_days* the last one of each
+    week and of each month; 0 disables a tier.  Removed snapshots fold into
+    that survivor: their activities are repointed to it, and their skills
+    rows go with them (the survivor's own rows hold its full state).
+    Hourly rollups of removed snapshots go; daily and coarser rollups stay,
+    so charts over the thinned range do not change.
+    Every *batch_size* snapshots are one transaction, committed before the
+    next starts; each also invalidates the read caches for its players
+    (mark_history_changed).
+
+    Returns row counts (``snapshots``, ``skills``, ``rollups`` reclaimed,
+    ``activities`` repointed), ``batches`` and ``seconds``.
+    """
+    started = time.perf_counter()
+    midnight = datetime.now(timezone.utc).replace(
+        tzinfo=None, hour=0, minute=0, second=0, microsecond=0
+    )
+    daily_before = midnight - timedelta(days=daily_days) if daily_days else None
+    weekly_before = None
+    if weekly_days:
+        day = midnight - timedelta(days=weekly_days)
+        weekly_before = day - timedelta(days=day.weekday())
+
+    plan = conn.execute(
+        _DOWNSAMPLE_PLAN_SQL,
+        {"daily_before": daily_before, "weekly_before": weekly_before},
+    ).fetchall()
+    conn.commit()
+
+    stats = dict.fromkeys(("snapshots", "skills", "rollups", "activities"), 0)
+    stats["batches"] = 0
+    for batch in itertools.batched(plan, batch_size):
+        params = {
+            "ids": [row["id"] for row in batch],
+            "player_ids": [row["player_id"] for row in batch],
+            "timestamps": [row["timestamp"] for row in batch],
+            "kept_ids": [row["kept_id"] for row in batch],
+            "kept_at": [row["kept_at"] for row in batch],
+        }
+        counts = {
+            key: conn.execute(statement, params).rowcount
+            for key, statement in _DOWNSAMPLE_BATCH_SQL.items()
+        }
+        mark_history_changed(conn, sorted(set(params["player_ids"])))
+        conn.commit()
+        stats["activities"] += counts["activities"]
+        stats["skills"] += counts["skills"]
+        stats["rollups"] += counts["rollups"]
+        stats["snapshots"] += counts["snapshots"]
+        stats["batches"] += 1
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
 # ----------------------
 # Migrations
 # ----------------------
 
-MIGRATIONS: list[tuple[str, MigrationFn]] = []
+
+def _migration_import_checkpoints(conn: psycopg.Connection):
+    # Progress of `collector.py import`, committed in the same transaction as
+    # each imported chunk so a resumed import never double-loads a line.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY,
+            line_no BIGINT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def _migration_snapshot_fingerprints(conn: psycopg.Connection):
+    # An unchanged profile no longer writes a new snapshot; it advances the
+    # previous snapshot's last_seen_at instead.  Existing rows were each seen
+    # exactly once, at their own timestamp.
+    conn.execute(
+        """
+        ALTER TABLE snapshots
+            ADD COLUMN IF NOT EXISTS fingerprint TEXT,
+            ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP
+        """
+    )
+    conn.execute(
+        "UPDATE snapshots SET last_seen_at = timestamp WHERE last_seen_at IS NULL"
+    )
+
+
+def _migration_skill_row_owner(conn: psycopg.Connection):
+    # Copy the owning player and snapshot time onto each skills row, so the
+    # table can be partitioned by time and pruned like snapshots.
+    conn.execute(
+        """
+        ALTER TABLE skills
+            ADD COLUMN IF NOT EXISTS player_id BIGINT,
+            ADD COLUMN IF NOT EXISTS taken_at TIMESTAMP
+        """
+    )
+    conn.execute(
+        """
+        UPDATE skills sk
+        SET player_id = s.player_id, taken_at = s.timestamp
+        FROM snapshots s
+        WHERE s.id = sk.snapshot_id AND sk.taken_at IS NULL
+        """
+    )
+
+
+def _migration_snapshot_skill_arrays(conn: psycopg.Connection):
+    # Wide layout: each snapshot carries its full skill state as three
+    # arrays, position N holding skill id N (SQL subscript N + 1).  Readers
+    # unpack these instead of joining ~29 skills rows per snapshot.
+    conn.execute(
+        """
+        ALTER TABLE snapshots
+            ADD COLUMN IF NOT EXISTS skill_xp BIGINT[],
+            ADD COLUMN IF NOT EXISTS skill_level INTEGER[],
+            ADD COLUMN IF NOT EXISTS skill_rank INTEGER[]
+        """
+    )
+    # Backfill from the skills rows: each skill's latest row at or before the
+    # snapshot (databases migrated by an earlier 0003 hold only the rows
+    # that changed).
+    conn.execute(
+        """
+        UPDATE snapshots s
+        SET skill_xp = st.xp, skill_level = st.level, skill_rank = st.rank
+        FROM (
+            SELECT
+                s2.id,
+                array_agg(sk.xp ORDER BY names.ord) AS xp,
+                array_agg(sk.level ORDER BY names.ord) AS level,
+                array_agg(sk.rank ORDER BY names.ord) AS rank
+            FROM snapshots s2
+            CROSS JOIN unnest(%s::text[]) WITH ORDINALITY AS names(skill, ord)
+            LEFT JOIN LATERAL (
+                SELECT x.xp, x.level, x.rank
+                FROM skills x
+                WHERE x.player_id = s2.player_id
+                  AND x.skill = names.skill
+                  AND (x.taken_at, x.snapshot_id) <= (s2.timestamp, s2.id)
+                ORDER BY x.taken_at DESC, x.snapshot_id DESC
+                LIMIT 1
+            ) sk ON true
+            WHERE s2.skill_xp IS NULL
+            GROUP BY s2.id
+        ) st
+        WHERE s.id = st.id
+        """,
+        ([SKILL_NAMES.get(i) for i in range(max(SKILL_NAMES) + 1)],),
+    )
+
+
+def _migration_xp_rollups(conn: psycopg.Connection):
+    # Closing XP per (player, granularity, bucket): total_xp plus the
+    # per-skill skill_xp array, laid out like snapshots.skill_xp.  Maintained
+    # by the collector on ingest so charts read a bounded number of buckets
+    # instead of every raw snapshot.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS xp_rollups (
+            player_id BIGINT NOT NULL,
+            granularity TEXT NOT NULL,
+            bucket_start TIMESTAMP NOT NULL,
+            snapshot_id BIGINT NOT NULL,
+            close_at TIMESTAMP NOT NULL,
+            last_seen_at TIMESTAMP,
+            total_xp BIGINT,
+            skill_xp BIGINT[],
+            PRIMARY KEY (player_id, granularity, bucket_start)
+        )
+        """
+    )
+    logger.info("Built %d rollup rows", rebuild_rollups(conn))
+
+
+def _migration_monthly_partitions(conn: psycopg.Connection):
+    # Rebuild snapshots and skills as monthly range-partitioned tables so
+    # time-windowed reads prune to the months they touch and old months can
+    # be detached cheaply.  Partitioned primary keys must include the
+    # partition key, hence (id, timestamp) / (id, taken_at).
+    conn.execute(
+        """
+        CREATE OR REPLACE FUNCTION ensure_monthly_partitions(
+            from_ts TIMESTAMP, to_ts TIMESTAMP
+        ) RETURNS INTEGER LANGUAGE plpgsql AS $$
+        DECLARE
+            month_start TIMESTAMP := date_trunc('month', from_ts);
+            parent TEXT;
+            part TEXT;
+            created INTEGER := 0;
+        BEGIN
+            WHILE month_start <= to_ts LOOP
+                FOREACH parent IN ARRAY ARRAY['snapshots', 'skills'] LOOP
+                    part := parent || '_p' || to_char(month_start, 'YYYYMM');
+                    IF to_regclass(part) IS NULL THEN
+                        EXECUTE format(
+                            'CREATE TABLE %I PARTITION OF %I '
+                            'FOR VALUES FROM (%L) TO (%L)',
+                            part, parent, month_start,
+                            month_start + INTERVAL '1 month'
+                        );
+                        created := created + 1;
+                    END IF;
+                END LOOP;
+                month_start := month_start + INTERVAL '1 month';
+            END LOOP;
+            RETURN created;
+        END
+        $$
+        """
+    )
+
+    for table, key in (("snapshots", "timestamp"), ("skills", "taken_at")):
+        legacy = f"{table}_unpartitioned"
+        conn.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        conn.execute(
+            f"""
+            CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS)
+            PARTITION BY RANGE ({key})
+            """
+        )
+        # Keep the id sequence alive when the old table is dropped.
+        conn.execute(
+            f"""
+            DO $$
+            BEGIN
+                EXECUTE format(
+                    'ALTER SEQUENCE %s OWNED BY {table}.id',
+                    pg_get_serial_sequence('{legacy}', 'id')
+                );
+            END
+            $$
+            """
+        )
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    bounds = conn.execute(
+        "SELECT MIN(timestamp) AS first FROM snapshots_unpartitioned"
+    ).fetchone()
+    ensure_partitions(
+        conn, bounds["first"] or now, _add_months(now, PARTITION_PREMAKE_MONTHS)
+    )
+
+    conn.execute("INSERT INTO snapshots SELECT * FROM snapshots_unpartitioned")
+    # Skill rows whose snapshot no longer exists have no taken_at and
+    # belong to no partition.
+    cur = conn.execute(
+        """
+        INSERT INTO skills
+        SELECT * FROM skills_unpartitioned WHERE taken_at IS NOT NULL
+        """
+    )
+    logger.info("Moved %d skill rows into monthly partitions", cur.rowcount)
+    conn.execute("DROP TABLE snapshots_unpartitioned, skills_unpartitioned")
+    conn.execute("ALTER TABLE snapshots ADD PRIMARY KEY (id, timestamp)")
+    conn.execute("ALTER TABLE skills ADD PRIMARY KEY (id, taken_at)")
+    _create_history_indexes(conn)
+
+
+# Activities classified per backfill round trip in 0007_activity_metadata.
+ACTIVITY_BACKFILL_BATCH = 1000
+
+
+def _migration_activity_metadata(conn: psycopg.Connection):
+    # Activities are parsed and classified once, at ingest, instead of on
+    # every feed / dashboard read.  player_id lets the feed index its
+    # player's rows directly rather than joining the partitioned snapshots.
+    conn.execute(
+        """
+        ALTER TABLE activities
+            ADD COLUMN IF NOT EXISTS player_id BIGINT,
+            ADD COLUMN IF NOT EXISTS occurred_at TIMESTAMPTZ,
+            ADD COLUMN IF NOT EXISTS type_key TEXT,
+            ADD COLUMN IF NOT EXISTS skill TEXT
+        """
+    )
+    conn.execute(
+        """
+        UPDATE activities a
+        SET player_id = s.player_id
+        FROM snapshots s
+        WHERE s.id = a.snapshot_id AND a.player_id IS NULL
+        """
+    )
+
+    last_id = backfilled = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, text, date, details FROM activities
+            WHERE id > %s AND type_key IS NULL
+            ORDER BY id
+            LIMIT %s
+            """,
+            (last_id, ACTIVITY_BACKFILL_BATCH),
+        ).fetchall()
+        if not rows:
+            break
+        classified = classify_activities((row["text"], row["details"]) for row in rows)
+        conn.execute(
+            """
+            UPDATE activities a
+            SET occurred_at = b.occurred_at, type_key = b.type_key, skill = b.skill
+            FROM unnest(
+                %s::bigint[], %s::timestamptz[], %s::text[], %s::text[]
+            ) AS b(id, occurred_at, type_key, skill)
+            WHERE a.id = b.id
+            """,
+            (
+                [row["id"] for row in rows],
+                [parse_activity_ts(row["date"]) for row in rows],
+                [type_key for type_key, _ in classified],
+                [skill for _, skill in classified],
+            ),
+        )
+        last_id = rows[-1]["id"]
+        backfilled += len(rows)
+    logger.info("Classified %d activities", backfilled)
+
+
+def _migration_activity_feed_index(conn: psycopg.Connection):
+    # Keyset pagination compares (feed key, id) rows, which a NULLS LAST
+    # index on the nullable occurred_at cannot serve; _create_indexes builds
+    # the replacement, idx_activities_player_feed.
+    conn.execute("DROP INDEX IF EXISTS idx_activities_player_occurred")
+
+
+def _migration_activity_search(conn: psycopg.Connection):
+    # Full-text search document, maintained by Postgres on every write.  The
+    # title outranks the details sentence; both use the 'english' config,
+    # which services.dashboard.search_activities_data must match.
+    conn.execute(
+        """
+        ALTER TABLE activities ADD COLUMN IF NOT EXISTS search TSVECTOR
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', COALESCE(text, '')), 'A')
+            || setweight(to_tsvector('english', COALESCE(details, '')), 'B')
+        ) STORED
+        """
+    )
+
+
+def _migration_response_cache(conn: psycopg.Connection):
+    # Response bodies the collector precomputes after each ingest, served by
+    # the public routes for the UTC hour they were computed in (see
+    # services/response_cache.py).  Shared by every instance.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            endpoint TEXT NOT NULL,
+            params TEXT NOT NULL,
+            computed_hour TIMESTAMP NOT NULL,
+            body TEXT NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (endpoint, params)
+        )
+        """
+    )
+
+
+def _migration_player_data_version(conn: psycopg.Connection):
+    # Bumped by every write to a player's history; with the player id it is
+    # the read caches' watermark, a primary-key lookup instead of a search
+    # for the latest snapshot across partitions.
+    conn.execute(
+        """
+        ALTER TABLE players
+            ADD COLUMN IF NOT EXISTS data_version BIGINT NOT NULL DEFAULT 0
+        """
+    )
+
+
+def _migration_drop_skill_history_index(conn: psycopg.Connection):
+    # Only delta-encoded skills rows needed the (player, skill, time) index,
+    # to rebuild a skill's state; no reader or writer looks rows up that way.
+    conn.execute("DROP INDEX IF EXISTS idx_skills_player_skill_taken")
+
+
+MIGRATIONS: list[tuple[str, MigrationFn]] = [
+    ("0001_import_checkpoints", _migration_import_checkpoints),
+    ("0002_snapshot_fingerprints", _migration_snapshot_fingerprints),
+    ("0003_delta_skills", _migration_skill_row_owner),
+    ("0004_snapshot_skill_arrays", _migration_snapshot_skill_arrays),
+    ("0005_xp_rollups", _migration_xp_rollups),
+    ("0006_monthly_partitions", _migration_monthly_partitions),
+    ("0007_activity_metadata", _migration_activity_metadata),
+    ("0008_activity_feed_index", _migration_activity_feed_index),
+    ("0009_activity_search", _migration_activity_search),
+    ("0010_response_cache", _migration_response_cache),
+    ("0011_player_data_version", _migration_player_data_version),
+    ("0012_drop_skill_history_index", _migration_drop_skill_history_index),
+]
 
 
 def run_migrations(conn: psycopg.Connection):
@@ -146,7 +791,7 @@ def _create_base_tables(conn: psycopg.Connection):
     )
 
 
-def _create_indexes(conn: psycopg.Connection):
+def _create_history_indexes(conn: psycopg.Connection):
     # snapshots — primary access patterns: by timestamp (charts/windows) and
     # by player_id (dashboard latest-snapshot lookup)
     conn.execute(
@@ -155,20 +800,39 @@ def _create_indexes(conn: psycopg.Connection):
     conn.execute(
         "CREATE INDEX IF NOT EXISTS idx_snapshots_player_id ON snapshots(player_id)"
     )
+    # previous-snapshot lookup for the collector's unchanged-profile check
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_snapshots_player_ts "
+        "ON snapshots(player_id, timestamp)"
+    )
 
-    # skills — looked up by snapshot_id on every dashboard load and chart query
+    # skills — snapshot_id for per-snapshot lookups
     conn.execute(
         "CREATE INDEX IF NOT EXISTS idx_skills_snapshot_skill ON skills(snapshot_id, skill)"
     )
 
-    # activities — hash for dedup on insert; snapshot_id for any future
-    # per-snapshot lookups; id DESC is the natural fetch order for the feed
+
+def _create_indexes(conn: psycopg.Connection):
+    _create_history_indexes(conn)
+
+    # activities — hash for dedup on insert; snapshot_id for repointing and
+    # per-snapshot lookups; (player, feed key, id) is the feed's keyset order,
+    # with undated activities mapped to -infinity so cursors compare as rows;
+    # GIN over the search document for /api/activities/search
     conn.execute(
         "CREATE UNIQUE INDEX IF NOT EXISTS idx_activities_hash ON activities(hash)"
     )
     conn.execute(
         "CREATE INDEX IF NOT EXISTS idx_activities_snapshot_id ON activities(snapshot_id)"
     )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_activities_player_feed ON activities("
+        "player_id, (COALESCE(occurred_at, '-infinity'::timestamptz)) DESC, id DESC)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_activities_search "
+        "ON activities USING GIN (search)"
+    )
 
 
 def init_db():
@@ -176,6 +840,8 @@ def init_db():
         _create_base_tables(conn)
         run_migrations(conn)
         _create_indexes(conn)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        ensure_partitions(conn, now, _add_months(now, PARTITION_PREMAKE_MONTHS))
         conn.commit()
 
 
@@ -191,10 +857,27 @@ def _parse_args():
     )
     parser.add_argument(
         "command",
-        choices=("init", "migrate"),
+        choices=(
+            "init",
+            "migrate",
+            "rebuild-rollups",
+            "archive-partitions",
+            "downsample",
+        ),
         nargs="?",
         default="init",
     )
+    parser.add_argument(
+        "--before",
+        type=lambda value: datetime.strptime(value, "%Y-%m"),
+        help="archive-partitions: detach months before this one (YYYY-MM)",
+    )
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="archive-partitions: drop detached partitions instead of moving "
+        "them to the archive schema",
+    )
     return parser.parse_args()
 
 
@@ -207,6 +890,37 @@ if __name__ == "__main__":
     if args.command == "migrate":
         migrate_db()
         logger.info("Migrations completed")
+    elif args.command == "rebuild-rollups":
+        with get_conn() as conn:
+            count = rebuild_rollups(conn)
+            mark_history_changed(conn)
+            conn.commit()
+        logger.info("Rebuilt %d rollup rows", count)
+    elif args.command == "archive-partitions":
+        if args.before is None:
+            raise SystemExit("archive-partitions requires --before YYYY-MM")
+        with get_conn() as conn:
+            archived = archive_partitions(conn, args.before, drop=args.drop)
+            conn.commit()
+        logger.info(
+            "%s %d partitions: %s",
+            "Dropped" if args.drop else "Archived",
+            len(archived),
+            ", ".join(archived) or "none",
+        )
+    elif args.command == "downsample":
+        with get_conn() as conn:
+            stats = downsample_snapshots(conn)
+        logger.info(
+            "Downsampling reclaimed %d snapshots, %d skill rows and %d hourly "
+            "rollups in %d batches (%.2fs); %d activities repointed",
+            stats["snapshots"],
+            stats["skills"],
+            stats["rollups"],
+            stats["batches"],
+            stats["seconds"],
+            stats["activities"],
+        )
     else:
         init_db()
         logger.info("Database initialized")
@@ -27,8 +27,10 @@ from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 from collector import collect_snapshot
 from config import ADMIN_PASSWORD, ADMIN_USERNAME
+from db import downsample_snapshots, get_conn
 from log import get_logger
 from services.admin import get_admin_overview
+from services.cache import service_cache
 from web import templates
 
 logger = get_logger(__name__)
@@ -277,6 +279,38 @@ def admin_vacuum(
         )
 
 
+@router.post("/admin/maintenance/downsample", response_class=HTMLResponse)
+def admin_downsample(
+    request: Request,
+    _: Annotated[HTTPBasicCredentials, Depends(require_admin)],
+    csrf_token: str = Form(..., alias=_CSRF_FIELD),
+):
+    _verify_csrf(request, csrf_token)
+    fresh_token = _get_or_create_csrf_token(request)
+    try:
+        # Commits batch by batch, so a failure keeps the batches before it.
+        with get_conn() as conn:
+            stats = downsample_snapshots(conn)
+    except _psycopg.Error as exc:
+        return _render_admin(
+            request, csrf_token=fresh_token, sql_error=f"Downsampling failed: {exc}"
+        )
+    finally:
+        service_cache.invalidate()
+    logger.info("Admin downsampling: %s", stats)
+    return _render_admin(
+        request,
+        csrf_token=fresh_token,
+        message=(
+            f"Downsampling reclaimed {stats['snapshots']:,} snapshots, "
+            f"{stats['skills']:,} skill rows and {stats['rollups']:,} hourly "
+            f"rollups in {stats['seconds']:.2f}s "
+            f"({stats['activities']:,} activities repointed). "
+            "Run VACUUM afterwards to make the freed space reusable."
+        ),
+    )
+
+
 @router.post("/admin/maintenance/checkpoint", response_class=HTMLResponse)
 def admin_checkpoint(
     request: Request,
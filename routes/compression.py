@@ -0,0 +1,152 @@
+"""
+Response compression.
+
+Bodies of a compressible type (JSON, HTML, CSS, JavaScript) of at least
+COMPRESS_MIN_SIZE bytes are sent brotli-compressed when the client accepts
+``br`` and the optional brotli module is installed, gzip-compressed when it
+accepts gzip.  Smaller bodies go out as they are: below about a packet the
+compression costs more than it saves.  The decision needs the body size up
+front, so only responses with a Content-Length are compressed (the body is
+collected first); open-ended streams pass through untouched.  So do partial
+(206, Content-Range) and other non-200 responses: a byte range of the
+uncompressed body must not be re-encoded.
+
+A compressed body is a different representation, so its strong ETag gets
+the coding as a suffix (``"…-br"``).  The app never sees the suffix: it is
+stripped from If-None-Match before the request is passed on, and put back
+on the ETag of a 304 for a tag that had it, so the inner conditional GET
+handling (routes/http_cache.py, StaticFiles) compares its own ETags.
+"""
+
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import COMPRESS_MIN_SIZE
+
+try:
+    import brotli
+except ImportError:  # optional: pip install ".[fast]"
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "text/css",
+    "text/html",
+    "text/javascript",
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _quality(params: str) -> float:
+    name, _, value = params.partition("=")
+    if name.strip() != "q":
+        return 1.0
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def choose_coding(accept_encoding: str) -> str | None:
+    """The coding to send for an Accept-Encoding header, if any."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        if _quality(params) > 0:
+            accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def with_coding(etag: str, coding: str) -> str:
+    return f'{etag[:-1]}-{coding}"'
+
+
+def strip_coding(if_none_match: str, coding: str) -> tuple[str, set[str]]:
+    """*if_none_match* without the *coding* suffixes, and the tags that had one."""
+    suffix = with_coding('"', coding)
+    tags, stripped = [], set()
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.endswith(suffix):
+            tag = tag.removesuffix(suffix) + '"'
+            stripped.add(tag.removeprefix("W/"))
+        tags.append(tag)
+    return ", ".join(tags), stripped
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        coding = choose_coding(request_headers.get("accept-encoding", ""))
+        stripped: set[str] = set()
+        if coding is not None and "if-none-match" in request_headers:
+            if_none_match, stripped = strip_coding(
+                request_headers["if-none-match"], coding
+            )
+            scope = {**scope, "headers": list(scope["headers"])}
+            MutableHeaders(scope=scope)["If-None-Match"] = if_none_match
+        start = None
+        chunks: list[bytes] = []
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if message["status"] == 304:
+                    headers.add_vary_header("Accept-Encoding")
+                    etag = headers.get("etag", "")
+                    if etag.startswith('"') and etag in stripped:
+                        headers["ETag"] = with_coding(etag, coding)
+                    await send(message)
+                    return
+                compressible = (
+                    message["status"] == 200
+                    and "content-range" not in headers
+                    and "content-encoding" not in headers
+                    and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                )
+                if compressible:
+                    headers.add_vary_header("Accept-Encoding")
+                size = int(headers.get("content-length", -1))
+                if compressible and coding is not None and size >= self.minimum_size:
+                    start = message  # held until the body is complete
+                    return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = compress(b"".join(chunks), coding)
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag", "")
+            if etag.startswith('"') and etag.endswith('"'):
+                headers["ETag"] = with_coding(etag, coding)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
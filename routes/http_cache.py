@@ -0,0 +1,82 @@
+"""
+Conditional GET for the public read endpoints.
+
+A read response depends only on the stored data and the current UTC hour
+(the chart windows end at it), so its ETag is derived from the URL, the
+tracked player's data watermark (services.cache.fetch_watermark, one
+primary-key lookup) and the hour — without computing the response.  A request
+whose If-None-Match carries the current ETag gets a 304 straight away.
+Other successful reads get the ETag plus a Cache-Control lifetime running
+to the next scheduled collection.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from config import COLLECT_MINUTE, HTTP_STALE_WHILE_REVALIDATE
+from services.cache import fetch_watermark, request_watermark
+
+
+def is_read_path(path: str) -> bool:
+    """The dashboard page and the JSON APIs; admin and static are excluded."""
+    return path == "/" or path.startswith("/api/")
+
+
+def next_change(now: datetime) -> datetime:
+    """When read responses next change: the next collection or hour start."""
+    hour = now.replace(minute=0, second=0, microsecond=0)
+    collection = hour + timedelta(minutes=COLLECT_MINUTE)
+    if collection <= now:
+        collection += timedelta(hours=1)
+    return min(collection, hour + timedelta(hours=1))
+
+
+def cache_control(now: datetime) -> str:
+    max_age = max(0, int((next_change(now) - now).total_seconds()))
+    return (
+        f"public, max-age={max_age}, "
+        f"stale-while-revalidate={HTTP_STALE_WHILE_REVALIDATE}"
+    )
+
+
+def make_etag(url: str, watermark, hour: datetime) -> str:
+    digest = hashlib.sha256(repr((url, watermark, hour)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match evaluation (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next) -> Response:
+        if request.method != "GET" or not is_read_path(request.url.path):
+            return await call_next(request)
+
+        now = datetime.now(timezone.utc)
+        watermark = await fetch_watermark()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        url = f"{request.url.path}?{request.url.query}"
+        headers = {
+            "ETag": make_etag(url, watermark, hour),
+            "Cache-Control": cache_control(now),
+        }
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        token = request_watermark.set(watermark)
+        try:
+            response = await call_next(request)
+        finally:
+            request_watermark.reset(token)
+        if response.status_code == 200:
+            response.headers.update(headers)
+        return response
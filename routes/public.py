@@ -3,10 +3,15 @@ Public routes: dashboard page and all read-only API endpoints.
 
 No auth, no admin logic, no SQL.  Each handler does exactly three things:
 parse input → call service → return response.
+
+Handlers are coroutines backed by the async connection pool, so they run on
+the event loop rather than in Starlette's worker threadpool.
 """
 
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, Response
 
 from collector import collect_snapshot
 from services.charts import (
@@ -15,8 +20,16 @@ from services.charts import (
     get_skills_totals_data,
     get_total_xp_gains_data,
 )
-from services.dashboard import get_activities_data, get_dashboard_data
-from web import templates
+from services.dashboard import (
+    ACTIVITY_PAGE_MAX,
+    ACTIVITY_PAGE_SIZE,
+    get_activities_data,
+    get_dashboard_data,
+    parse_feed_cursor,
+    search_activities_data,
+)
+from services.response_cache import get_cached_response
+from web import FastJSONResponse, templates
 
 router = APIRouter()
 
@@ -27,35 +40,61 @@ router = APIRouter()
 
 
 @router.get("/", response_class=HTMLResponse)
-def dashboard(request: Request):
+async def dashboard(request: Request):
+    if body := await get_cached_response("dashboard"):
+        return HTMLResponse(body)
     return templates.TemplateResponse(
-        "index.html", {"request": request, "data": get_dashboard_data()}
+        "index.html", {"request": request, "data": await get_dashboard_data()}
     )
 
 
 # ---------------------------------------------------------------------------
 # Chart / history API
+#
+# The standard combinations are precomputed at ingest (services/
+# response_cache.py) and sent as stored; anything else is computed live.
+# The payloads are plain JSON data, so they skip jsonable_encoder.
 # ---------------------------------------------------------------------------
 
 
+def _json(body: str) -> Response:
+    return Response(body, media_type="application/json")
+
+
 @router.get("/api/skill_history/{skill_name}/{timeframe}")
-def api_skill_history(skill_name: str, timeframe: str = "all"):
-    return get_skill_history_data(skill_name, timeframe)
+async def api_skill_history(skill_name: str, timeframe: str = "all"):
+    if body := await get_cached_response("skill_history", skill_name, timeframe):
+        return _json(body)
+    return FastJSONResponse(await get_skill_history_data(skill_name, timeframe))
 
 
 @router.get("/api/skills_totals/{timeframe}")
-def api_skills_totals(timeframe: str = "day"):
-    return get_skills_totals_data(timeframe)
+async def api_skills_totals(timeframe: str = "day"):
+    if body := await get_cached_response("skills_totals", timeframe):
+        return _json(body)
+    return FastJSONResponse(await get_skills_totals_data(timeframe))
 
 
 @router.get("/api/chart/{skill_name}/{period}")
-def api_chart(skill_name: str, period: str = "day"):
-    return get_chart_data(skill_name, period)
+async def api_chart(skill_name: str, period: str = "day"):
+    if body := await get_cached_response("chart", skill_name, period):
+        return _json(body)
+    return FastJSONResponse(await get_chart_data(skill_name, period))
 
 
 @router.get("/api/total_xp_gains/{timeframe}")
-def api_total_xp_gains(timeframe: str = "day"):
-    return get_total_xp_gains_data(timeframe)
+async def api_total_xp_gains(
+    timeframe: str = "day", start: date | None = None, end: date | None = None
+):
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end.")
+    if (
+        start is None
+        and end is None
+        and (body := await get_cached_response("total_xp_gains", timeframe))
+    ):
+        return _json(body)
+    return FastJSONResponse(await get_total_xp_gains_data(timeframe, start, end))
 
 
 # ---------------------------------------------------------------------------
@@ -64,8 +103,33 @@ def api_total_xp_gains(timeframe: str = "day"):
 
 
 @router.get("/api/activities")
-def api_activities():
-    return get_activities_data()
+async def api_activities(
+    limit: int = Query(ACTIVITY_PAGE_SIZE, ge=1, le=ACTIVITY_PAGE_MAX),
+    before: str | None = None,
+    after: str | None = None,
+    type_key: str | None = Query(None, alias="type"),
+    skill: str | None = None,
+):
+    try:
+        before_cursor = parse_feed_cursor(before)
+        after_cursor = parse_feed_cursor(after)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursors must be an activity id or an ISO-8601 timestamp.",
+        )
+    return await get_activities_data(
+        limit, before_cursor, after_cursor, type_key=type_key, skill=skill
+    )
+
+
+@router.get("/api/activities/search")
+async def api_activities_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(ACTIVITY_PAGE_SIZE, ge=1, le=ACTIVITY_PAGE_MAX),
+    offset: int = Query(0, ge=0),
+):
+    return await search_activities_data(q, limit, offset)
 
 
 # ---------------------------------------------------------------------------
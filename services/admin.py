@@ -6,10 +6,11 @@ handler focused on HTTP concerns (auth, CSRF, rendering) rather than SQL.
 """
 
 from db import get_conn
+from services.cache import service_cache
 
 
 def get_admin_overview() -> dict:
-    """Return table counts and latest snapshot timestamp for the admin page."""
+    """Return table counts, latest snapshot timestamp and cache counters."""
     table_counts = []
     with get_conn() as conn:
         cur = conn.cursor()
@@ -31,4 +32,5 @@ def get_admin_overview() -> dict:
         "db_size_mb": "N/A",
         "latest_snapshot_ts": latest_ts,
         "table_counts": table_counts,
+        "service_cache": service_cache.stats(),
     }
@@ -0,0 +1,138 @@
+"""
+In-process cache for the read services.
+
+The chart and dashboard payloads only change when history is written, so
+the services decorated with @cached keep their results in a bounded LRU
+keyed by (function, arguments, watermark).  The watermark is the tracked
+player's id and data_version — a primary-key lookup on players; every
+collection, import chunk and maintenance write bumps the version, changed
+profile or not — plus the current UTC hour, which bounds how stale the
+now-relative windows (the dashboard's 24-hour / 7-day baselines) can get.
+Writes from another instance are picked up through the watermark; the
+collector and the admin page's downsampling also call
+service_cache.invalidate() on this one.
+
+Concurrent misses on the same key share one computation.  Cached results
+are returned as-is to every caller, so they must not be mutated.
+"""
+
+import asyncio
+import functools
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from config import RS3_USERNAME, SERVICE_CACHE_SIZE
+from db import get_async_conn
+
+
+class ServiceCache:
+    """Bounded LRU of service results with single-flight misses."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+        # Bumped by invalidate(), so a computation that started before it
+        # does not store its (possibly stale) result afterwards.
+        self._generation = 0
+
+    async def get_or_compute(self, key, compute):
+        """Return the cached result for *key*, else await ``compute()`` once.
+
+        Callers waiting on another's computation get its result or its
+        exception; if that caller is cancelled instead, they start over.
+        """
+        while key not in self._entries:
+            future = self._inflight.get(key)
+            if future is None:
+                return await self._compute(key, compute)
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue  # the computing caller was cancelled
+                raise
+            self.hits += 1
+            return result
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key]
+
+    async def _compute(self, key, compute):
+        self.misses += 1
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # waiters re-raise it; none is also fine
+            raise
+        except BaseException:
+            future.cancel()  # waiters retry (see get_or_compute)
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(result)
+        if generation == self._generation:
+            self._entries[key] = result
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self) -> None:
+        """Drop every cached result."""
+        self._entries.clear()
+        self._generation += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+service_cache = ServiceCache(SERVICE_CACHE_SIZE)
+
+# The watermark already read for the request being served, set by the
+# conditional-GET middleware (routes/http_cache.py) so it is looked up once.
+request_watermark: ContextVar[tuple | None] = ContextVar(
+    "request_watermark", default=None
+)
+
+
+async def fetch_watermark() -> tuple:
+    """Return the tracked player's (id, data_version)."""
+    async with get_async_conn() as conn:
+        cur = await conn.execute(
+            "SELECT id, data_version FROM players WHERE username = %s",
+            (RS3_USERNAME,),
+        )
+        row = await cur.fetchone()
+    return (row["id"], row["data_version"]) if row else (None, None)
+
+
+def cached(fn):
+    """Serve *fn* (an async service function) through service_cache."""
+    if service_cache.maxsize <= 0:
+        return fn
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        key = (
+            fn.__qualname__,
+            args,
+            tuple(sorted(kwargs.items())),
+            request_watermark.get() or await fetch_watermark(),
+            hour,
+        )
+        return await service_cache.get_or_compute(key, lambda: fn(*args, **kwargs))
+
+    return wrapper
@@ -10,10 +10,14 @@ Chart helpers split into two layers:
                       handlers call.
 """
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from db import get_conn
-from skills import RS3_ORDER
+from psycopg.rows import tuple_row
+
+from config import RS3_USERNAME, STREAM_BATCH_SIZE
+from db import get_async_conn
+from services.cache import cached
+from skills import RS3_ORDER, SKILL_IDS, SKILL_NAMES
 
 # ---------------------------------------------------------------------------
 # XP scaling / formatting
@@ -55,17 +59,6 @@ def parse_snapshot_ts(ts) -> datetime:
     return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
 
 
-def parse_activity_ts(ts: str | None) -> datetime | None:
-    if not ts:
-        return None
-    for fmt in ("%d-%b-%Y %H:%M", "%d-%b-%Y %H:%M:%S"):
-        try:
-            return datetime.strptime(ts, fmt).replace(tzinfo=timezone.utc)
-        except ValueError:
-            continue
-    return None
-
-
 # ---------------------------------------------------------------------------
 # Period / timeframe normalisation
 # ---------------------------------------------------------------------------
@@ -219,151 +212,102 @@ def get_timeframe_window(
 
 
 # ---------------------------------------------------------------------------
-# Aggregators (pure)
+# Streaming aggregators (pure)
+#
+# Generators fed the rollup rows a server-side cursor returns, batch by
+# batch (see _stream_aggregate), for the paths Postgres does not bucket
+# itself: every skill at once and the full-history gains.
 # ---------------------------------------------------------------------------
 
 
-def aggregate_bucket_gains(
-    rows, bucket: str, starts: list[datetime], value_key: str, scale_fn=scale_total_xp
-) -> list[float | int]:
-    parsed = [
-        (parse_snapshot_ts(row["timestamp"]), row[value_key])
-        for row in rows
-        if row["timestamp"] is not None
-    ]
-    parsed.sort(key=lambda t: t[0])
-
-    if not starts:
-        return []
-
-    values: list[float | int] = []
-    idx = 0
-    previous_close = None
-    first_start = starts[0]
-
-    while idx < len(parsed) and parsed[idx][0] < first_start:
-        previous_close = parsed[idx][1]
-        idx += 1
-
-    for b_start in starts:
-        b_end = advance_bucket(b_start, bucket)
-        bucket_close = previous_close
-        while idx < len(parsed) and parsed[idx][0] < b_end:
-            bucket_close = parsed[idx][1]
-            idx += 1
-
-        gain_raw = (
-            0
-            if (bucket_close is None or previous_close is None)
-            else max(0, bucket_close - previous_close)
-        )
-        values.append(scale_fn(gain_raw))
-        if bucket_close is not None:
-            previous_close = bucket_close
-
-    return values
-
-
-def aggregate_bucket_totals(
-    rows, bucket: str, starts: list[datetime], value_key: str, scale_fn=scale_total_xp
-) -> list[float | int]:
-    parsed = [
-        (parse_snapshot_ts(row["timestamp"]), row[value_key])
-        for row in rows
-        if row["timestamp"] is not None
-    ]
-    parsed.sort(key=lambda t: t[0])
-
-    if not starts:
-        return []
-
-    values: list[float | int] = []
-    idx = 0
-    previous_close = None
-    first_start = starts[0]
+def naive_utc(ts: datetime) -> datetime:
+    """*ts* as a naive UTC datetime, as TIMESTAMP columns return them."""
+    return ts if ts.tzinfo is None else ts.astimezone(timezone.utc).replace(tzinfo=None)
 
-    while idx < len(parsed) and parsed[idx][0] < first_start:
-        previous_close = parsed[idx][1]
-        idx += 1
 
-    for b_start in starts:
-        b_end = advance_bucket(b_start, bucket)
-        bucket_close = previous_close
-        while idx < len(parsed) and parsed[idx][0] < b_end:
-            bucket_close = parsed[idx][1]
-            idx += 1
+def series_totals_aggregator(bucket: str, starts: list[datetime], width: int):
+    """Per-bucket closes of *width* series, fed rows in timestamp order.
 
-        values.append(scale_fn(bucket_close or 0))
-        if bucket_close is not None:
-            previous_close = bucket_close
-
-    return values
-
-
-def aggregate_last_snapshot_totals(
-    rows, bucket: str, starts: list[datetime], value_key: str, scale_fn=scale_total_xp
-) -> list[float | int | None]:
-    parsed = [
-        (parse_snapshot_ts(row["timestamp"]), row[value_key])
-        for row in rows
-        if row["timestamp"] is not None
-    ]
-    parsed.sort(key=lambda t: t[0])
-
-    if not starts:
-        return []
-
-    values: list[float | int | None] = []
-    idx = 0
-    previous_close = None
-    first_start = starts[0]
-    seen_data = False
-
-    while idx < len(parsed) and parsed[idx][0] < first_start:
-        previous_close = parsed[idx][1]
-        idx += 1
-
-    for b_start in starts:
-        b_end = advance_bucket(b_start, bucket)
-        bucket_close = previous_close
-        while idx < len(parsed) and parsed[idx][0] < b_end:
-            bucket_close = parsed[idx][1]
-            idx += 1
-
-        if bucket_close is None and not seen_data:
-            values.append(None)
-            continue
-
-        seen_data = True
-        values.append(
-            scale_fn(bucket_close if bucket_close is not None else previous_close)
-        )
-        if bucket_close is not None:
-            previous_close = bucket_close
-
-    return values
-
-
-def build_bucket_gains(rows, bucket: str, value_key: str) -> list[dict]:
-    bucket_closing_xp: dict[datetime, int] = {}
-    for row in rows:
-        ts = parse_snapshot_ts(row["timestamp"])
-        b = bucket_start(ts, bucket)
-        bucket_closing_xp[b] = row[value_key]
-
-    ordered = sorted(bucket_closing_xp.items(), key=lambda t: t[0])
+    A generator: prime it with next(), send() it batches of ``(timestamp,
+    values)`` rows — ``values[i]`` being series i's value or None, the whole
+    of *values* possibly None — then send None for the result.  All series
+    advance together, bucket by bucket, so the rows themselves are never
+    kept.  The result is ``(totals, has_data)``: one list per bucket holding
+    every series' close, carried forward and 0 before its first value, and a
+    list of flags marking the series with any value.  Naive timestamps are
+    read as UTC.
+    """
+    ends = [naive_utc(advance_bucket(b, bucket)) for b in starts]
+    totals: list[list[int]] = []
+    current = [0] * width
+    seen = [False] * width
+    while (rows := (yield)) is not None:
+        for ts, values in rows:
+            if ts.tzinfo is not None:
+                ts = naive_utc(ts)
+            while len(totals) < len(ends) and ts >= ends[len(totals)]:
+                totals.append(current.copy())
+            if len(totals) == len(ends):
+                break  # past the last bucket
+            for series, value in enumerate((values or ())[:width]):
+                if value is not None:
+                    current[series] = value
+                    seen[series] = True
+    totals.extend(current.copy() for _ in range(len(ends) - len(totals)))
+    yield totals, seen
+
+
+def bucket_gains_aggregator(
+    bucket: str,
+    value_key: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """Per-bucket gains of the closing *value_key*, fed rows in bucket order.
+
+    One point per bucket seen.  A generator: prime it with next(), send()
+    it batches of rows, then send None for the points.  A bucket's close is
+    final once a row from a later bucket arrives, so only the buckets a
+    last_seen_at fill reaches ahead are held back.  With *since* / *until*
+    (aware), only the buckets in [since, until) become points; earlier rows
+    still set the first gain.
+    """
     points: list[dict] = []
+    pending: dict[datetime, int] = {}
     prev_xp = None
-    for b, closing_xp in ordered:
-        gain_raw = 0 if prev_xp is None else max(0, closing_xp - prev_xp)
-        points.append(
-            {
-                "timestamp": b.strftime("%Y-%m-%d %H:%M:%S") + "Z",
-                "gain": scale_total_xp(gain_raw),
-            }
-        )
+
+    def close(b: datetime, closing_xp: int):
+        nonlocal prev_xp
+        if (since is None or b >= since) and (until is None or b < until):
+            gain_raw = 0 if prev_xp is None else max(0, closing_xp - prev_xp)
+            points.append(
+                {
+                    "timestamp": b.strftime("%Y-%m-%d %H:%M:%S") + "Z",
+                    "gain": scale_total_xp(gain_raw),
+                }
+            )
         prev_xp = closing_xp
-    return points
+
+    while (rows := (yield)) is not None:
+        for row in rows:
+            b = bucket_start(parse_snapshot_ts(row["timestamp"]), bucket)
+            for done in sorted(k for k in pending if k < b):
+                close(done, pending.pop(done))
+            pending[b] = row[value_key]
+            # An unchanged profile only advances last_seen_at, so the buckets
+            # it was re-seen in still get a (zero-gain) point.
+            last_seen = row.get("last_seen_at")
+            if last_seen is None:
+                continue
+            last_b = bucket_start(parse_snapshot_ts(last_seen), bucket)
+            fill = advance_bucket(b, bucket)
+            while fill <= last_b:
+                pending[fill] = row[value_key]
+                fill = advance_bucket(fill, bucket)
+
+    for done in sorted(pending):
+        close(done, pending[done])
+    yield points
 
 
 # ---------------------------------------------------------------------------
@@ -371,19 +315,46 @@ def build_bucket_gains(rows, bucket: str, value_key: str) -> list[dict]:
 # ---------------------------------------------------------------------------
 
 
-def get_window_baseline(cur, cutoff, latest):
-    cur.execute(
-        "SELECT * FROM snapshots WHERE timestamp <= %s ORDER BY timestamp DESC LIMIT 1",
-        (cutoff,),
+async def get_window_baseline(cur, cutoff, latest):
+    await cur.execute(
+        """
+        SELECT * FROM snapshots
+        WHERE player_id = %s AND timestamp <= %s
+        ORDER BY timestamp DESC LIMIT 1
+        """,
+        (latest["player_id"], cutoff),
     )
-    baseline = cur.fetchone()
+    baseline = await cur.fetchone()
     if baseline:
         return baseline
-    cur.execute(
-        "SELECT * FROM snapshots WHERE timestamp >= %s ORDER BY timestamp ASC LIMIT 1",
-        (cutoff,),
+    await cur.execute(
+        """
+        SELECT * FROM snapshots
+        WHERE player_id = %s AND timestamp >= %s
+        ORDER BY timestamp ASC LIMIT 1
+        """,
+        (latest["player_id"], cutoff),
     )
-    return cur.fetchone() or latest
+    return await cur.fetchone() or latest
+
+
+def unpack_skill_state(snapshot) -> list[dict]:
+    """Return a snapshot's skills as ``{"skill", "level", "xp", "rank"}`` rows.
+
+    The state is stored as arrays on the snapshot, position N holding skill
+    id N; skills missing from the payload (NULL) are left out.
+    """
+    return [
+        {"skill": SKILL_NAMES[skill_id], "level": level, "xp": xp, "rank": rank}
+        for skill_id, (xp, level, rank) in enumerate(
+            zip(
+                snapshot["skill_xp"] or [],
+                snapshot["skill_level"] or [],
+                snapshot["skill_rank"] or [],
+            )
+        )
+        if xp is not None and skill_id in SKILL_NAMES
+    ]
 
 
 def series_has_data(values: list) -> bool:
@@ -396,111 +367,260 @@ def series_has_data(values: list) -> bool:
 # ---------------------------------------------------------------------------
 
 
-def _fetch_earliest_ts(cur) -> datetime | None:
-    cur.execute("SELECT MIN(timestamp) AS min_ts FROM snapshots")
-    row = cur.fetchone()
-    return row["min_ts"] if row else None
+def _skill_subscript(skill_name: str) -> int | None:
+    """SQL array subscript of *skill_name* in the snapshot skill arrays.
+
+    Unknown names give NULL, which selects no rows.
+    """
+    skill_id = SKILL_IDS.get(skill_name)
+    return None if skill_id is None else skill_id + 1
+
+
+async def _fetch_player_history_start(cur) -> tuple[int | None, datetime | None]:
+    """Return (player_id, start of the earliest day with data) for RS3_USERNAME.
 
+    Every read path is scoped to the tracked player — roster collection
+    stores other players in the same tables.  The start comes from the daily
+    rollups, which outlive archived snapshot partitions.
+    """
+    await cur.execute(
+        """
+        SELECT
+            p.id AS player_id,
+            (
+                SELECT MIN(r.bucket_start)
+                FROM xp_rollups r
+                WHERE r.player_id = p.id AND r.granularity = 'day'
+            ) AS min_ts
+        FROM players p
+        WHERE p.username = %s
+        """,
+        (RS3_USERNAME,),
+    )
+    row = await cur.fetchone()
+    if not row:
+        return None, None
+    return row["player_id"], row["min_ts"]
+
+
+# Rollup closes for the *bucket* buckets in [start, end): rows look like raw
+# snapshots (``timestamp`` is the bucket start, the value is ``xp``), with
+# the last close before start first as the carry-forward baseline.
+# {value_sql} is an expression over xp_rollups, NULL where there is no data.
+_ROLLUP_WINDOW_SQL = """
+    (
+        SELECT bucket_start AS timestamp, {value_sql} AS xp
+        FROM xp_rollups
+        WHERE player_id = %(player_id)s AND granularity = %(bucket)s
+          AND bucket_start < %(start)s AND {value_sql} IS NOT NULL
+        ORDER BY bucket_start DESC
+        LIMIT 1
+    )
+    UNION ALL
+    (
+        SELECT bucket_start AS timestamp, {value_sql} AS xp
+        FROM xp_rollups
+        WHERE player_id = %(player_id)s AND granularity = %(bucket)s
+          AND bucket_start >= %(start)s AND bucket_start < %(end)s
+          AND {value_sql} IS NOT NULL
+        ORDER BY bucket_start ASC
+    )
+"""
 
-def get_skill_history_data(skill_name: str, timeframe: str) -> list[dict]:
+# Bucketing in Postgres.  generate_series lays out the bucket starts (the
+# windows start on a bucket boundary, so stepping by the interval gives the
+# same starts as advance_bucket, month lengths included) and width_bucket
+# places every close in its bucket, 0 being the baseline before the window.
+# DISTINCT ON keeps the last close of each bucket, which then fills every
+# bucket up to the next one with data — the carry-forward of
+# aggregate_bucket_totals / aggregate_last_snapshot_totals, NULL until the
+# first close.  The closes come back as one array.
+_BUCKET_CLOSES_SQL = """
+    WITH closes AS ({rollup_window}),
+    buckets AS (
+        SELECT array_agg(b ORDER BY b) AS starts
+        FROM generate_series(
+            %(start)s::timestamp, %(last)s::timestamp, %(step)s::interval
+        ) AS b
+    ),
+    bucketed AS (
+        SELECT DISTINCT ON (i)
+            width_bucket(c.timestamp, buckets.starts) AS i, c.xp,
+            cardinality(buckets.starts) AS n
+        FROM closes c, buckets
+        ORDER BY i, c.timestamp DESC
+    ),
+    spans AS (
+        SELECT xp, greatest(i, 1) AS first,
+               lead(i, 1, n + 1) OVER (ORDER BY i) - 1 AS last
+        FROM bucketed
+    )
+    SELECT
+        array_fill(NULL::bigint, ARRAY[min(first) - 1])
+            || array_agg(xp ORDER BY k) AS closes
+    FROM spans, generate_series(first, last) AS k
+    HAVING count(*) > 0
+"""
+_BUCKET_STEPS = {
+    "hour": "1 hour",
+    "day": "1 day",
+    "week": "7 days",
+    "month": "1 month",
+    "year": "1 year",
+}
+
+
+def _window_params(player_id, bucket: str, start: datetime, end: datetime) -> dict:
+    """Placeholders of _ROLLUP_WINDOW_SQL for the buckets from start to end."""
+    # The rollups store naive UTC bucket starts.
+    start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        "player_id": player_id,
+        "bucket": bucket,
+        "start": start,
+        "last": end,
+        "end": advance_bucket(end, bucket),
+    }
+
+
+async def _fetch_bucket_closes(
+    cur,
+    player_id,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    value_sql: str,
+    params=None,
+) -> list[int | None] | None:
+    """Carried-forward rollup close of every *bucket* bucket from start to end.
+
+    *value_sql* is an expression over xp_rollups; named placeholders in it
+    are filled from *params*.  Returns None when there is no close at all.
+    """
+    await cur.execute(
+        _BUCKET_CLOSES_SQL.format(
+            rollup_window=_ROLLUP_WINDOW_SQL.format(value_sql=value_sql)
+        ),
+        {
+            **(params or {}),
+            **_window_params(player_id, bucket, start, end),
+            "step": _BUCKET_STEPS[bucket],
+        },
+    )
+    row = await cur.fetchone()
+    return row["closes"] if row else None
+
+
+async def _stream_aggregate(conn, aggregator, query: str, params, row_factory=None):
+    """Feed *query*'s rows to *aggregator* and return its result.
+
+    The rows come from a named (server-side) cursor, STREAM_BATCH_SIZE at a
+    time, so only one batch is held in memory whatever the history length;
+    *aggregator* is one of the generators above, primed here.
+    """
+    next(aggregator)
+    async with conn.cursor(name="stream_aggregate", row_factory=row_factory) as cur:
+        await cur.execute(query, params)
+        while batch := await cur.fetchmany(STREAM_BATCH_SIZE):
+            aggregator.send(batch)
+    return aggregator.send(None)
+
+
+async def _fetch_skill_totals(
+    conn, player_id, bucket: str, start: datetime, end: datetime
+) -> tuple[list[list[int]], list[bool]]:
+    """series_totals_aggregator over the skill_xp rollups from start to end.
+
+    The rows are read as plain tuples and streamed to the aggregator, already
+    in bucket order.
+    """
+    starts = build_bucket_starts(start, end, bucket)
+    return await _stream_aggregate(
+        conn,
+        series_totals_aggregator(bucket, starts, max(SKILL_NAMES) + 1),
+        _ROLLUP_WINDOW_SQL.format(value_sql="skill_xp"),
+        _window_params(player_id, bucket, start, end),
+        tuple_row,
+    )
+
+
+@cached
+async def get_skill_history_data(skill_name: str, timeframe: str) -> list[dict]:
     """Data for /api/skill_history/{skill_name}/{timeframe}."""
-    with get_conn() as conn:
+    subscript = _skill_subscript(skill_name)
+    async with get_async_conn() as conn:
         cur = conn.cursor()
-        min_ts = _fetch_earliest_ts(cur)
+        player_id, min_ts = await _fetch_player_history_start(cur)
         now = datetime.now(timezone.utc)
         start, end, bucket = get_timeframe_window(timeframe, now, min_ts)
         starts = build_bucket_starts(start, end, bucket)
 
-        cur.execute(
-            """
-            SELECT s.timestamp, sk.xp
-            FROM skills sk
-            JOIN snapshots s ON sk.snapshot_id = s.id
-            WHERE sk.skill = %s AND s.timestamp < %s
-            ORDER BY s.timestamp ASC
-            """,
-            (skill_name, advance_bucket(end, bucket)),
+        closes = await _fetch_bucket_closes(
+            cur,
+            player_id,
+            bucket,
+            start,
+            end,
+            "skill_xp[%(subscript)s]",
+            {"subscript": subscript},
         )
-        rows = cur.fetchall()
 
-    totals = aggregate_bucket_totals(rows, bucket, starts, "xp", scale_skill_xp)
+    totals = [scale_skill_xp(close) for close in closes or [None] * len(starts)]
     labels = [format_bucket_label(b, bucket) for b in starts]
     return [{"timestamp": ts, "total": v} for ts, v in zip(labels, totals)]
 
 
-def get_skills_totals_data(timeframe: str) -> dict:
+@cached
+async def get_skills_totals_data(timeframe: str) -> dict:
     """Data for /api/skills_totals/{timeframe}."""
-    with get_conn() as conn:
+    async with get_async_conn() as conn:
         cur = conn.cursor()
-        min_ts = _fetch_earliest_ts(cur)
+        player_id, min_ts = await _fetch_player_history_start(cur)
         now = datetime.now(timezone.utc)
         start, end, bucket = get_timeframe_window(timeframe, now, min_ts)
         starts = build_bucket_starts(start, end, bucket)
 
-        cur.execute(
-            """
-            SELECT s.timestamp, sk.skill, sk.xp
-            FROM skills sk
-            JOIN snapshots s ON sk.snapshot_id = s.id
-            WHERE s.timestamp < %s
-            ORDER BY s.timestamp ASC
-            """,
-            (advance_bucket(end, bucket),),
+        totals, has_data = await _fetch_skill_totals(
+            conn, player_id, bucket, start, end
         )
-        rows = cur.fetchall()
-
-    per_skill_rows: dict[str, list] = {}
-    for row in rows:
-        per_skill_rows.setdefault(row["skill"], []).append(row)
 
     labels = [format_bucket_label(b, bucket) for b in starts]
-    order_map = {name: i for i, name in enumerate(RS3_ORDER)}
-    series = []
-    for skill in sorted(per_skill_rows, key=lambda x: order_map.get(x, 999)):
-        values = aggregate_bucket_totals(
-            per_skill_rows[skill], bucket, starts, "xp", scale_skill_xp
-        )
-        series.append({"skill": skill, "totals": values})
-
+    series = [
+        {
+            "skill": skill,
+            "totals": [closes[SKILL_IDS[skill]] / XP_SCALE_SKILL for closes in totals],
+        }
+        for skill in RS3_ORDER
+        if has_data[SKILL_IDS[skill]]
+    ]
     return {"labels": labels, "series": series}
 
 
-def get_chart_data(skill_name: str, period: str) -> dict:
+@cached
+async def get_chart_data(skill_name: str, period: str) -> dict:
     """Data for /api/chart/{skill_name}/{period}."""
-    with get_conn() as conn:
+    subscript = _skill_subscript(skill_name)
+    async with get_async_conn() as conn:
         cur = conn.cursor()
-        min_ts = _fetch_earliest_ts(cur)
+        player_id, min_ts = await _fetch_player_history_start(cur)
         now = datetime.now(timezone.utc)
         start, end, bucket = get_period_window(period, now, min_ts)
         starts = build_bucket_starts(start, end, bucket)
-        end_exclusive = advance_bucket(end, bucket)
 
         if skill_name.lower() == "total":
-            cur.execute(
-                """
-                SELECT timestamp, total_xp AS xp
-                FROM snapshots
-                WHERE timestamp < %s
-                ORDER BY timestamp ASC
-                """,
-                (end_exclusive,),
-            )
+            value_sql, params = "total_xp", None
         else:
-            cur.execute(
-                """
-                SELECT s.timestamp, sk.xp
-                FROM skills sk
-                JOIN snapshots s ON sk.snapshot_id = s.id
-                WHERE sk.skill = %s AND s.timestamp < %s
-                ORDER BY s.timestamp ASC
-                """,
-                (skill_name, end_exclusive),
-            )
-
-        rows = cur.fetchall()
+            value_sql, params = "skill_xp[%(subscript)s]", {"subscript": subscript}
+        closes = await _fetch_bucket_closes(
+            cur, player_id, bucket, start, end, value_sql, params
+        )
 
     scale_fn = scale_total_xp if skill_name.lower() == "total" else scale_skill_xp
-    totals = aggregate_last_snapshot_totals(rows, bucket, starts, "xp", scale_fn)
+    totals = [
+        None if close is None else scale_fn(close)
+        for close in closes or [None] * len(starts)
+    ]
     labels = [format_bucket_label(b, bucket) for b in starts]
 
     return {
@@ -512,11 +632,56 @@ def get_chart_data(skill_name: str, period: str) -> dict:
     }
 
 
-def get_total_xp_gains_data(timeframe: str) -> list[dict]:
-    """Data for /api/total_xp_gains/{timeframe}."""
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT timestamp, total_xp FROM snapshots ORDER BY timestamp ASC")
-        rows = cur.fetchall()
+@cached
+async def get_total_xp_gains_data(
+    timeframe: str, start: date | None = None, end: date | None = None
+) -> list[dict]:
+    """Data for /api/total_xp_gains/{timeframe}.
 
-    return build_bucket_gains(rows, normalize_bucket(timeframe), "total_xp")
+    Without a range every bucket of the history gets a point; *start* and
+    *end* (UTC days, both inclusive) keep the buckets starting within them.
+    """
+    bucket = normalize_bucket(timeframe)
+    since = until = None
+    if start is not None:
+        since = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc)
+    if end is not None:
+        until = datetime.combine(
+            end + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc
+        )
+    async with get_async_conn() as conn:
+        # The last close before the range (its gain baseline and, through
+        # last_seen_at, the source of any re-seen buckets at its start), then
+        # the range itself.
+        return await _stream_aggregate(
+            conn,
+            bucket_gains_aggregator(bucket, "total_xp", since, until),
+            """
+            WITH player AS (SELECT id FROM players WHERE username = %(username)s)
+            (
+                SELECT bucket_start AS timestamp, last_seen_at, total_xp
+                FROM xp_rollups
+                WHERE player_id = (SELECT id FROM player)
+                  AND granularity = %(bucket)s
+                  AND bucket_start < %(since)s
+                ORDER BY bucket_start DESC
+                LIMIT 1
+            )
+            UNION ALL
+            (
+                SELECT bucket_start AS timestamp, last_seen_at, total_xp
+                FROM xp_rollups
+                WHERE player_id = (SELECT id FROM player)
+                  AND granularity = %(bucket)s
+                  AND (%(since)s::timestamp IS NULL OR bucket_start >= %(since)s)
+                  AND (%(until)s::timestamp IS NULL OR bucket_start < %(until)s)
+                ORDER BY bucket_start ASC
+            )
+            """,
+            {
+                "username": RS3_USERNAME,
+                "bucket": bucket,
+                "since": since and since.replace(tzinfo=None),
+                "until": until and until.replace(tzinfo=None),
+            },
+        )
@@ -5,103 +5,265 @@ Pulls data from the DB and returns a plain dict ready for the template.
 No FastAPI / HTTP concerns here.
 """
 
-import re
+import html
 from datetime import datetime, timedelta, timezone
 
-from db import get_conn
+from config import RS3_USERNAME
+from db import get_async_conn
+from services.cache import cached
 from services.charts import (
     format_skill_xp,
     format_total_xp,
     get_window_baseline,
-    parse_activity_ts,
     scale_total_xp,
+    unpack_skill_state,
 )
 from skills import ACTIVITY_TYPE_META, RS3_ORDER, SKILL_COLORS
-from utils import calculate_progress, xp_to_next_level
+from utils import skills_progress
 
-# Maximum number of activities returned by get_activities_data.
-ACTIVITY_FEED_LIMIT = 500
+# Default and maximum page sizes for get_activities_data.
+ACTIVITY_PAGE_SIZE = 50
+ACTIVITY_PAGE_MAX = 200
 
 # ---------------------------------------------------------------------------
-# Activity helpers
+# Activities service function (used by /api/activities)
 # ---------------------------------------------------------------------------
 
+# Display metadata for the stored type_key / skill, joined in SQL so feed
+# rows come back ready to serialise.
+_ACTIVITY_META_PARAMS = {
+    "type_keys": list(ACTIVITY_TYPE_META),
+    "type_labels": [meta["label"] for meta in ACTIVITY_TYPE_META.values()],
+    "type_colors": [meta["color"] for meta in ACTIVITY_TYPE_META.values()],
+    "skill_names": list(SKILL_COLORS),
+    "skill_colors": list(SKILL_COLORS.values()),
+}
+
+# The feed's sort key, newest first; matches idx_activities_player_feed.
+# Activities whose date could not be parsed sort last.
+_FEED_KEY = "COALESCE(a.occurred_at, '-infinity'::timestamptz)"
+
+_FEED_SQL = """
+    WITH page AS (
+        SELECT a.id, a.text, a.date, a.details, a.occurred_at,
+               a.type_key, a.skill, {key} AS feed_key
+        FROM activities a
+        WHERE {where}
+        ORDER BY {key} {direction}, a.id {direction}
+        LIMIT %(limit)s
+    )
+    SELECT
+        page.id, page.text, page.date, page.details,
+        to_char(
+            page.occurred_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS"Z"'
+        ) AS date_iso,
+        page.type_key, t.label AS type_label, page.skill,
+        COALESCE(sc.color, t.color) AS color
+    FROM page
+    {meta_joins}
+    ORDER BY page.feed_key DESC, page.id DESC
+"""
 
-def detect_activity_skill(text: str | None) -> str | None:
-    lowered = (text or "").lower()
-    for skill in RS3_ORDER:
-        if re.search(rf"\b{re.escape(skill.lower())}\b", lowered):
-            return skill
-    return None
-
-
-def classify_activity_meta(text: str | None, details: str | None = None) -> dict:
-    combined = " ".join(part for part in (details, text) if part)
-    lowered = combined.lower()
-
-    type_key = "activity"
-    if "quest" in lowered:
-        type_key = "quest"
-    elif "clue" in lowered or "treasure trail" in lowered:
-        type_key = "clue"
-    elif "levelled" in lowered or "leveled" in lowered or "advanced" in lowered:
-        type_key = "level"
-    elif "killed" in lowered or "defeated" in lowered or "slain" in lowered:
-        type_key = "kill"
-    elif "drop" in lowered or "received" in lowered or "found" in lowered:
-        type_key = "loot"
-    elif "achievement" in lowered or "completed" in lowered:
-        type_key = "achievement"
-    elif "unlocked" in lowered:
-        type_key = "unlock"
-
-    skill = detect_activity_skill(combined) if type_key == "level" else None
-    fallback = ACTIVITY_TYPE_META["activity"]
-    meta = ACTIVITY_TYPE_META.get(type_key, fallback)
-    color = SKILL_COLORS.get(skill, meta["color"]) if skill else meta["color"]
-    return {
-        "type_key": type_key,
-        "type_label": meta["label"],
-        "skill": skill,
-        "color": color,
-    }
+# Quests completed since a time.  The bound is on the feed key, not on
+# occurred_at, so idx_activities_player_feed serves it; undated activities
+# map to -infinity and never count.
+_QUESTS_SINCE_SQL = f"""
+    SELECT COUNT(*) AS count
+    FROM activities a
+    WHERE a.player_id = %s AND {_FEED_KEY} >= %s AND a.type_key = 'quest'
+"""
 
+_ACTIVITY_META_JOINS = """
+    LEFT JOIN unnest(
+        %(type_keys)s::text[], %(type_labels)s::text[], %(type_colors)s::text[]
+    ) AS t(type_key, label, color) ON t.type_key = page.type_key
+    LEFT JOIN unnest(%(skill_names)s::text[], %(skill_colors)s::text[])
+        AS sc(skill, color) ON sc.skill = page.skill
+"""
+
+
+def parse_feed_cursor(value: str | None) -> int | datetime | None:
+    """Parse a feed cursor: an activity id or an ISO-8601 time (naive = UTC).
 
-def _build_activity(row) -> dict:
-    parsed = parse_activity_ts(row["date"])
-    meta = classify_activity_meta(row["text"], row["details"])
+    Raises ValueError for anything else.
+    """
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _cursor_condition(name: str, cursor: int | datetime, op: str) -> str:
+    if isinstance(cursor, int):
+        # Position of that activity in the feed order; an unknown id matches
+        # nothing.
+        return f"""({_FEED_KEY}, a.id) {op} (
+            SELECT COALESCE(c.occurred_at, '-infinity'::timestamptz), c.id
+            FROM activities c WHERE c.id = %({name})s
+        )"""
+    return f"{_FEED_KEY} {op} %({name})s"
+
+
+async def get_activities_data(
+    limit: int = ACTIVITY_PAGE_SIZE,
+    before: int | datetime | None = None,
+    after: int | datetime | None = None,
+    type_key: str | None = None,
+    skill: str | None = None,
+) -> dict:
+    """Return one page of the activity feed, newest first.
+
+    *before* / *after* are exclusive keyset cursors (see parse_feed_cursor):
+    a page with only *after* holds the activities immediately newer than
+    it.  The response carries the cursors for the neighbouring pages —
+    ``next_before`` is None once the oldest activity has been returned.
+    """
+    conditions = [
+        "a.player_id = (SELECT id FROM players WHERE username = %(username)s)"
+    ]
+    if type_key:
+        conditions.append("a.type_key = %(type_key)s")
+    if skill:
+        conditions.append("a.skill = %(skill)s")
+    if before is not None:
+        conditions.append(_cursor_condition("before", before, "<"))
+    if after is not None:
+        conditions.append(_cursor_condition("after", after, ">"))
+    # Walk forwards from *after* only when there is no *before* bound, so
+    # the page is the one adjacent to the cursor.
+    ascending = after is not None and before is None
+
+    async with get_async_conn() as conn:
+        cur = conn.cursor()
+        await cur.execute(
+            _FEED_SQL.format(
+                key=_FEED_KEY,
+                where=" AND ".join(conditions),
+                direction="ASC" if ascending else "DESC",
+                meta_joins=_ACTIVITY_META_JOINS,
+            ),
+            {
+                **_ACTIVITY_META_PARAMS,
+                "username": RS3_USERNAME,
+                "type_key": type_key,
+                "skill": skill,
+                "before": before,
+                "after": after,
+                # One extra row tells whether another page follows.
+                "limit": limit + 1,
+            },
+        )
+        rows = await cur.fetchall()
+
+    has_more = len(rows) > limit
+    if ascending:
+        items = rows[-limit:] if has_more else rows
+        has_older = bool(items)
+    else:
+        items = rows[:limit]
+        has_older = has_more
     return {
-        "id": row["id"],
-        "text": row["text"],
-        "date": row["date"],
-        "details": row["details"],
-        "date_iso": parsed.isoformat().replace("+00:00", "Z") if parsed else None,
-        "sort_ts": parsed or datetime.min.replace(tzinfo=timezone.utc),
-        **meta,
+        "items": items,
+        "next_before": items[-1]["id"] if has_older else None,
+        "next_after": items[0]["id"] if items else None,
     }
 
 
 # ---------------------------------------------------------------------------
-# Activities service function (used by /api/activities)
+# Activity search (used by /api/activities/search)
 # ---------------------------------------------------------------------------
 
+# ts_headline marks matches with control characters that cannot occur in
+# activity text; the snippet is HTML-escaped before they become <mark> tags.
+_MATCH_START, _MATCH_STOP = "\x02", "\x03"
+_HEADLINE_OPTIONS = (
+    f"StartSel={_MATCH_START}, StopSel={_MATCH_STOP}, MinWords=15, MaxWords=35"
+)
+
+# Ranks every match (the GIN index finds them) but only builds headlines for
+# the returned page.  The 'english' config matches the generated column.
+_SEARCH_SQL = """
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', %(q)s) AS query
+    ),
+    page AS (
+        SELECT a.id, a.text, a.date, a.details, a.occurred_at,
+               a.type_key, a.skill,
+               ts_rank(a.search, q.query) AS rank,
+               {key} AS feed_key
+        FROM activities a, q
+        WHERE a.search @@ q.query
+          AND a.player_id = (SELECT id FROM players WHERE username = %(username)s)
+        ORDER BY rank DESC, feed_key DESC, a.id DESC
+        LIMIT %(limit)s OFFSET %(offset)s
+    )
+    SELECT
+        page.id, page.text, page.date, page.details,
+        to_char(
+            page.occurred_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS"Z"'
+        ) AS date_iso,
+        page.type_key, t.label AS type_label, page.skill,
+        COALESCE(sc.color, t.color) AS color,
+        page.rank,
+        ts_headline(
+            'english',
+            CASE
+                WHEN page.details IS NULL OR page.details = page.text
+                    THEN page.text
+                ELSE concat_ws(' — ', page.text, page.details)
+            END,
+            q.query,
+            %(headline_options)s
+        ) AS snippet
+    FROM page
+    CROSS JOIN q
+    {meta_joins}
+    ORDER BY page.rank DESC, page.feed_key DESC, page.id DESC
+"""
+
+
+def _snippet_html(headline: str) -> str:
+    return (
+        html.escape(headline)
+        .replace(_MATCH_START, "<mark>")
+        .replace(_MATCH_STOP, "</mark>")
+    )
+
 
-def get_activities_data() -> list[dict]:
-    with get_conn() as conn:
+async def search_activities_data(
+    q: str, limit: int = ACTIVITY_PAGE_SIZE, offset: int = 0
+) -> dict:
+    """Return one page of activities matching *q*, best match first.
+
+    *q* uses web-search syntax ("quoted phrases", ``or``, ``-exclude``).
+    Each item carries its ``rank`` and an HTML ``snippet`` with the matched
+    words in ``<mark>`` tags.  ``next_offset`` is None on the last page.
+    """
+    async with get_async_conn() as conn:
         cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, text, date, details
-            FROM activities
-            ORDER BY id DESC
-            LIMIT %s
-            """,
-            (ACTIVITY_FEED_LIMIT,),
+        await cur.execute(
+            _SEARCH_SQL.format(key=_FEED_KEY, meta_joins=_ACTIVITY_META_JOINS),
+            {
+                **_ACTIVITY_META_PARAMS,
+                "q": q,
+                "username": RS3_USERNAME,
+                "headline_options": _HEADLINE_OPTIONS,
+                "limit": limit + 1,
+                "offset": offset,
+            },
         )
-        activities = [_build_activity(row) for row in cur.fetchall()]
+        rows = await cur.fetchall()
 
-    activities.sort(key=lambda a: (a["sort_ts"], a["id"]), reverse=True)
-    return [{k: v for k, v in a.items() if k != "sort_ts"} for a in activities]
+    items = rows[:limit]
+    for item in items:
+        item["snippet"] = _snippet_html(item["snippet"])
+    return {
+        "query": q,
+        "items": items,
+        "next_offset": offset + limit if len(rows) > limit else None,
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -117,47 +279,42 @@ def _ts_to_str(ts) -> str | None:
     return str(ts)
 
 
-def get_dashboard_data() -> dict | None:
-    with get_conn() as conn:
+@cached
+async def get_dashboard_data() -> dict | None:
+    async with get_async_conn() as conn:
         cur = conn.cursor()
 
-        cur.execute(
+        await cur.execute(
             """
             SELECT s.*, p.username
             FROM snapshots s
-            LEFT JOIN players p ON p.id = s.player_id
+            JOIN players p ON p.id = s.player_id
+            WHERE p.username = %s
             ORDER BY s.timestamp DESC
             LIMIT 1
-            """
+            """,
+            (RS3_USERNAME,),
         )
-        latest = cur.fetchone()
+        latest = await cur.fetchone()
         if not latest:
             return None
 
         now = datetime.now(timezone.utc)
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
-        prev_today = get_window_baseline(cur, today_start, latest)
-        prev_24h = get_window_baseline(cur, now - timedelta(hours=24), latest)
-        prev_7d = get_window_baseline(cur, now - timedelta(days=7), latest)
+        prev_today = await get_window_baseline(cur, today_start, latest)
+        prev_24h = await get_window_baseline(cur, now - timedelta(hours=24), latest)
+        prev_7d = await get_window_baseline(cur, now - timedelta(days=7), latest)
 
         # ------------------------------------------------------------------
         # Skills
         # ------------------------------------------------------------------
-        cur.execute(
-            "SELECT skill, level, xp, rank FROM skills WHERE snapshot_id = %s",
-            (latest["id"],),
-        )
-        current_skills = cur.fetchall()
+        current_skills = unpack_skill_state(latest)
 
         prev_skills_map: dict[str, int] = {}
         prev_levels_map: dict[str, int] = {}
         if prev_today:
-            cur.execute(
-                "SELECT skill, xp, level FROM skills WHERE snapshot_id = %s",
-                (prev_today["id"],),
-            )
-            for r in cur.fetchall():
+            for r in unpack_skill_state(prev_today):
                 prev_skills_map[r["skill"]] = r["xp"]
                 prev_levels_map[r["skill"]] = r["level"]
 
@@ -165,11 +322,11 @@ def get_dashboard_data() -> dict | None:
         level_candidates: list[dict] = []
         levels_gained_today = 0
 
-        for s in current_skills:
+        for s, progress in zip(current_skills, skills_progress(current_skills)):
             gain = s["xp"] - prev_skills_map.get(s["skill"], s["xp"])
             prev_level = prev_levels_map.get(s["skill"], s["level"])
             levels_gained_today += max(0, s["level"] - prev_level)
-            remaining_xp = xp_to_next_level(s["skill"], s["level"], s["xp"])
+            remaining_xp = progress["xp_to_next"]
             if remaining_xp > 0:
                 level_candidates.append(
                     {
@@ -188,7 +345,7 @@ def get_dashboard_data() -> dict | None:
                     "xp_gain": gain,
                     "xp_display": format_skill_xp(s["xp"]),
                     "xp_gain_display": format_skill_xp(gain),
-                    "progress": calculate_progress(s["skill"], s["level"], s["xp"]),
+                    "progress": progress["progress"],
                     "color": SKILL_COLORS.get(s["skill"], "#a0a0a0"),
                 }
             )
@@ -204,44 +361,70 @@ def get_dashboard_data() -> dict | None:
 
         # ------------------------------------------------------------------
         # Today's quest count — still needed for highlights, but we no longer
-        # ship the full activity list with the dashboard payload.
+        # ship the full activity list with the dashboard payload.  Every
+        # quest since midnight counts, not just those among the latest stored
+        # rows; one whose date could not be parsed has no occurred_at and
+        # is left out.
         # ------------------------------------------------------------------
-        cur.execute(
-            """
-            SELECT id, text, date, details
-            FROM activities
-            ORDER BY id DESC
-            LIMIT %s
-            """,
-            (ACTIVITY_FEED_LIMIT,),
-        )
-        today_quests_finished = 0
-        for row in cur.fetchall():
-            parsed = parse_activity_ts(row["date"])
-            if parsed and parsed >= today_start:
-                meta = classify_activity_meta(row["text"], row["details"])
-                if meta["type_key"] == "quest":
-                    today_quests_finished += 1
+        await cur.execute(_QUESTS_SINCE_SQL, (latest["player_id"], today_start))
+        today_quests_finished = (await cur.fetchone())["count"]
 
         # ------------------------------------------------------------------
         # 30-day XP history (sidebar chart)
         # ------------------------------------------------------------------
-        cur.execute(
-            """
-            SELECT timestamp, total_xp
-            FROM snapshots
-            WHERE timestamp >= NOW() - INTERVAL '30 days'
-            ORDER BY timestamp ASC
+        # A snapshot stays current until last_seen_at (unchanged profiles do
+        # not write new rows), so the last one taken before the window still
+        # counts when it was seen inside it: it contributes a point at the
+        # window start, and every last sighting is plotted as a second, flat
+        # point.  Both halves bound `timestamp`, so only the partitions for
+        # the window (and the single one holding that earlier snapshot) are
+        # scanned.
+        await cur.execute(
             """
+            WITH bounds AS (
+                SELECT (NOW() - INTERVAL '30 days')::timestamp AS start
+            )
+            SELECT GREATEST(h.timestamp, bounds.start) AS timestamp,
+                   h.last_seen_at, h.total_xp
+            FROM bounds, (
+                (
+                    SELECT timestamp, last_seen_at, total_xp
+                    FROM snapshots
+                    WHERE player_id = %(player_id)s
+                      AND timestamp < (NOW() - INTERVAL '30 days')::timestamp
+                    ORDER BY timestamp DESC
+                    LIMIT 1
+                )
+                UNION ALL
+                (
+                    SELECT timestamp, last_seen_at, total_xp
+                    FROM snapshots
+                    WHERE player_id = %(player_id)s
+                      AND timestamp >= (NOW() - INTERVAL '30 days')::timestamp
+                )
+            ) h
+            WHERE h.last_seen_at >= bounds.start
+            ORDER BY h.timestamp ASC
+            """,
+            {"player_id": latest["player_id"]},
         )
-        history = cur.fetchall()
+        history: list[tuple] = []
+        for r in await cur.fetchall():
+            history.append((r["timestamp"], r["total_xp"]))
+            if r["last_seen_at"] and r["last_seen_at"] > r["timestamp"]:
+                history.append((r["last_seen_at"], r["total_xp"]))
 
         # ------------------------------------------------------------------
         # Derived stats
         # ------------------------------------------------------------------
-        latest_dict = dict(latest)
+        latest_dict = {
+            k: v
+            for k, v in latest.items()
+            if k not in ("skill_xp", "skill_level", "skill_rank")
+        }
         latest_dict["total_xp_display"] = format_total_xp(latest["total_xp"])
         latest_dict["timestamp"] = _ts_to_str(latest_dict.get("timestamp"))
+        latest_dict["last_seen_at"] = _ts_to_str(latest_dict.get("last_seen_at"))
 
         xp_today = max(0, latest["total_xp"] - prev_today["total_xp"])
         rank_delta = prev_today["overall_rank"] - latest["overall_rank"]
@@ -281,7 +464,7 @@ def get_dashboard_data() -> dict | None:
             "closest_levels": closest_levels,
             "skills": skills_data,
             "timestamps": [
-                (_ts_to_str(r["timestamp"]) or "").rstrip("Z") + "Z" for r in history
+                (_ts_to_str(ts) or "").rstrip("Z") + "Z" for ts, _ in history
             ],
-            "xp_history": [scale_total_xp(r["total_xp"]) for r in history],
+            "xp_history": [scale_total_xp(xp) for _, xp in history],
         }
@@ -0,0 +1,137 @@
+"""
+Shared response cache: payloads precomputed at ingest, served by key.
+
+Every Cloud Run instance would otherwise compute the same charts on its
+first requests.  After committing a collection, the collector renders the
+standard dashboard / chart / timeframe combinations (RESPONSES) and stores
+the response bodies in ``response_cache``, keyed by endpoint and params.
+The public handlers look a request up with one primary-key read and fall
+back to live computation on a miss.
+
+A row is served only during the UTC hour it was computed in, since the
+chart windows end at the current hour.  The ingest transaction clears the
+table, so no instance serves pre-collection payloads once the new data is
+committed; imports, downsampling and the db.py maintenance commands clear
+it in theirs.
+"""
+
+from datetime import datetime, timezone
+
+from db import get_async_conn
+from log import get_logger
+from services.cache import fetch_watermark, request_watermark
+from services.charts import (
+    get_chart_data,
+    get_skill_history_data,
+    get_skills_totals_data,
+    get_total_xp_gains_data,
+)
+from services.dashboard import get_dashboard_data
+from skills import RS3_ORDER
+from web import FastJSONResponse, templates
+
+logger = get_logger(__name__)
+
+CHART_PERIODS = ("day", "week", "month", "year", "all")
+TIMEFRAMES = ("hour", "day", "week", "month", "all")
+GAINS_TIMEFRAMES = ("hour", "day", "week", "month")
+
+
+def _json_body(payload) -> str:
+    """The body the live JSON routes send for *payload*."""
+    return FastJSONResponse(payload).body.decode()
+
+
+async def _render_dashboard() -> str:
+    data = await get_dashboard_data()
+    return templates.get_template("index.html").render(data=data)
+
+
+# (endpoint, params, render) for every precomputed response; params are the
+# handler's path parameters, render returns the body.
+RESPONSES = [
+    ("dashboard", (), _render_dashboard),
+    *(
+        ("chart", (skill, period), get_chart_data)
+        for skill in ("Total", *RS3_ORDER)
+        for period in CHART_PERIODS
+    ),
+    *(
+        ("skill_history", (skill, timeframe), get_skill_history_data)
+        for skill in RS3_ORDER
+        for timeframe in TIMEFRAMES
+    ),
+    *(("skills_totals", (t,), get_skills_totals_data) for t in TIMEFRAMES),
+    *(("total_xp_gains", (t,), get_total_xp_gains_data) for t in GAINS_TIMEFRAMES),
+]
+
+
+def _current_hour() -> datetime:
+    return datetime.now(timezone.utc).replace(
+        minute=0, second=0, microsecond=0, tzinfo=None
+    )
+
+
+def _params_key(params) -> str:
+    return "/".join(params)
+
+
+async def get_cached_response(endpoint: str, *params: str) -> str | None:
+    """Return the stored body for *endpoint* / *params*, or None on a miss."""
+    async with get_async_conn() as conn:
+        cur = await conn.execute(
+            """
+            SELECT body FROM response_cache
+            WHERE endpoint = %s AND params = %s AND computed_hour = %s
+            """,
+            (endpoint, _params_key(params), _current_hour()),
+        )
+        row = await cur.fetchone()
+    return row["body"] if row else None
+
+
+async def clear_response_cache(conn) -> None:
+    """Drop every stored response; run inside the ingest transaction."""
+    await conn.execute("DELETE FROM response_cache")
+
+
+async def precompute_responses() -> int:
+    """Compute and store every response in RESPONSES; returns the count.
+
+    Runs after the collection commits.  A failure is logged and leaves the
+    remaining requests to live computation.
+    """
+    try:
+        # One watermark lookup for the pass, not one per cached service call.
+        token = request_watermark.set(await fetch_watermark())
+        try:
+            rows = []
+            for endpoint, params, render in RESPONSES:
+                hour = _current_hour()
+                body = await render(*params)
+                if not isinstance(body, str):
+                    body = _json_body(body)
+                rows.append((endpoint, _params_key(params), hour, body))
+        finally:
+            request_watermark.reset(token)
+
+        async with get_async_conn() as conn:
+            cur = conn.cursor()
+            await cur.executemany(
+                """
+                INSERT INTO response_cache (endpoint, params, computed_hour, body)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (endpoint, params) DO UPDATE
+                SET computed_hour = EXCLUDED.computed_hour,
+                    body = EXCLUDED.body,
+                    computed_at = CURRENT_TIMESTAMP
+                """,
+                rows,
+            )
+            await conn.commit()
+    except Exception:
+        # Live computation still serves every request, so this must not fail
+        # the collection that triggered it.
+        logger.exception("Precomputing responses failed")
+        return 0
+    return len(rows)
@@ -36,6 +36,8 @@ SKILL_NAMES: dict[int, str] = {
     28: "Necromancy",
 }
 
+SKILL_IDS: dict[str, int] = {name: skill_id for skill_id, name in SKILL_NAMES.items()}
+
 # Display order matching the in-game skills interface.
 RS3_ORDER: list[str] = [
     "Attack",
@@ -80,6 +82,10 @@ EXTENDED_120_SKILLS: list[str] = [
     "Necromancy",
 ]
 
+# Skills on the elite XP curve (utils.INVENTION_XP_TABLE) instead of the
+# standard one.
+ELITE_SKILLS: list[str] = ["Invention"]
+
 # Per-skill accent colours used in charts and cards.
 SKILL_COLORS: dict[str, str] = {
     "Attack": "#b04d3f",
@@ -1,24 +1,88 @@
-// Activity feed — fetches from /api/activities on first tab activation, then
-// groups by day and builds the card DOM.  Subsequent tab switches are instant.
-
-let feedLoaded = false;
+// Activity feed — fetches the first page of /api/activities on first tab
+// activation, then the next (older) page whenever the end of the stream
+// scrolls into view.  Cards are grouped by day; a day that spans two pages
+// stays one section.
+
+const FEED_PAGE_SIZE = 50;
+
+const feed = {
+    started: false,
+    loading: false,
+    nextBefore: null,
+    done: false,
+    groups: new Map(),   // day key -> { section, cardFlow }
+    sentinel: null,
+    observer: null,
+};
 
 async function loadAndRenderFeed() {
-    if (feedLoaded) return;
+    if (feed.started) return;
+    feed.started = true;
 
-    const rail = document.getElementById('feedRailNav');
     const stream = document.getElementById('feedStream');
     stream.innerHTML = '<div class="summary-label">Loading…</div>';
+    await loadFeedPage();
+}
+
+async function loadFeedPage() {
+    if (feed.loading || feed.done) return;
+    feed.loading = true;
+
+    const rail = document.getElementById('feedRailNav');
+    const stream = document.getElementById('feedStream');
+    const firstPage = feed.nextBefore === null;
+    const params = new URLSearchParams({ limit: FEED_PAGE_SIZE });
+    if (!firstPage) params.set('before', feed.nextBefore);
 
     try {
-        const res = await fetch('/api/activities');
+        const res = await fetch(`/api/activities?${params}`);
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
-        const activities = await res.json();
-        feedLoaded = true;
-        renderFeed(activities, rail, stream);
+        const page = await res.json();
+        if (firstPage) {
+            rail.innerHTML = '';
+            stream.innerHTML = '';
+        }
+        appendFeedItems(page.items, rail, stream);
+        feed.nextBefore = page.next_before;
+        feed.done = page.next_before === null;
+        if (!feed.groups.size) {
+            stream.innerHTML = '<div class="summary-label">No activities yet.</div>';
+        }
     } catch (err) {
-        stream.innerHTML = `<div class="summary-label feed-error">Failed to load activities: ${err.message}</div>`;
+        const message = `<div class="summary-label feed-error">Failed to load activities: ${err.message}</div>`;
+        if (firstPage) {
+            // Let the next tab activation retry from scratch.
+            stream.innerHTML = message;
+            feed.started = false;
+        } else {
+            feed.sentinel.innerHTML = message;
+        }
+        feed.done = !firstPage;
+    } finally {
+        feed.loading = false;
     }
+    updateFeedSentinel(stream);
+}
+
+// Keeps a sentinel after the last section while more pages remain; seeing
+// it loads the next page.  Re-observing after each page re-fires the
+// callback if the sentinel is still in view (short pages, tall screens).
+function updateFeedSentinel(stream) {
+    if (!feed.sentinel) {
+        feed.sentinel = document.createElement('div');
+        feed.sentinel.className = 'summary-label feed-sentinel';
+        feed.observer = new IntersectionObserver((entries) => {
+            if (entries.some((entry) => entry.isIntersecting)) loadFeedPage();
+        }, { rootMargin: '600px 0px' });
+    }
+    feed.observer.unobserve(feed.sentinel);
+    if (feed.done || !feed.started) {
+        if (!feed.sentinel.querySelector('.feed-error')) feed.sentinel.remove();
+        return;
+    }
+    feed.sentinel.textContent = 'Loading…';
+    stream.appendChild(feed.sentinel);
+    feed.observer.observe(feed.sentinel);
 }
 
 function formatDayLabel(dayDate, now) {
@@ -36,85 +100,86 @@ function groupByDay(items) {
         const dt = activity.date_iso ? new Date(activity.date_iso) : null;
         if (dt && !Number.isNaN(dt.valueOf())) {
             const key = `${dt.getFullYear()}-${String(dt.getMonth() + 1).padStart(2, '0')}-${String(dt.getDate()).padStart(2, '0')}`;
-            if (!groups.has(key)) groups.set(key, { dt, items: [] });
+            if (!groups.has(key)) groups.set(key, { key, dt, items: [] });
             groups.get(key).items.push(activity);
         } else {
-            if (!groups.has('unknown')) groups.set('unknown', { dt: null, items: [] });
+            if (!groups.has('unknown')) groups.set('unknown', { key: 'unknown', dt: null, items: [] });
             groups.get('unknown').items.push(activity);
         }
     });
     return [...groups.values()];
 }
 
-function renderFeed(items, rail, stream) {
-    rail.innerHTML = '';
-    stream.innerHTML = '';
-
-    const groups = groupByDay(items);
+function appendFeedItems(items, rail, stream) {
     const now = new Date();
 
-    if (!groups.length) {
-        stream.innerHTML = '<div class="summary-label">No activities yet.</div>';
-        return;
-    }
+    groupByDay(items).forEach((group) => {
+        let target = feed.groups.get(group.key);
+        if (!target) {
+            const section = document.createElement('section');
+            section.className = 'feed-day-group';
+
+            const label = group.dt ? formatDayLabel(group.dt, now) : 'Unknown Date';
+
+            const railBtn = document.createElement('button');
+            railBtn.type = 'button';
+            railBtn.className = 'feed-rail-link';
+            railBtn.textContent = label;
+            railBtn.addEventListener('click', () => section.scrollIntoView({ behavior: 'smooth', block: 'start' }));
+            rail.appendChild(railBtn);
+
+            const dayTitle = document.createElement('h3');
+            dayTitle.className = 'feed-day-title';
+            dayTitle.textContent = label;
+            section.appendChild(dayTitle);
 
-    groups.forEach((group) => {
-        const section = document.createElement('section');
-        section.className = 'feed-day-group';
-
-        const label = group.dt ? formatDayLabel(group.dt, now) : 'Unknown Date';
-
-        const railBtn = document.createElement('button');
-        railBtn.type = 'button';
-        railBtn.className = 'feed-rail-link';
-        railBtn.textContent = label;
-        railBtn.addEventListener('click', () => section.scrollIntoView({ behavior: 'smooth', block: 'start' }));
-        rail.appendChild(railBtn);
-
-        const dayTitle = document.createElement('h3');
-        dayTitle.className = 'feed-day-title';
-        dayTitle.textContent = label;
-        section.appendChild(dayTitle);
-
-        const cardFlow = document.createElement('div');
-        cardFlow.className = 'feed-card-flow';
-
-        group.items.forEach((activity) => {
-            const card = document.createElement('article');
-            card.className = `feed-card feed-type-${activity.type_key || 'activity'}`;
-            if (activity.color) card.style.setProperty('--card-accent', activity.color);
-
-            const cardRail = document.createElement('div');
-            cardRail.className = 'feed-card-rail';
-            const iconPath = activity.skill
-                ? `/static/skills_64/${activity.skill.toLowerCase()}.png`
-                : `/static/icons_64/${activity.type_key || 'activity'}.png`;
-            cardRail.style.setProperty('--card-icon-url', `url("${iconPath}")`);
-
-            const body = document.createElement('div');
-            body.className = 'feed-card-body';
-
-            const title = document.createElement('h4');
-            title.className = 'feed-card-title';
-            title.textContent = activity.details ?? activity.text;
-
-            const date = document.createElement('div');
-            date.className = 'feed-card-date';
-            if (activity.date_iso) {
-                const dt = new Date(activity.date_iso);
-                date.textContent = Number.isNaN(dt.valueOf())
-                    ? activity.date
-                    : dt.toLocaleString([], { dateStyle: 'medium', timeStyle: 'short' });
+            const cardFlow = document.createElement('div');
+            cardFlow.className = 'feed-card-flow';
+            section.appendChild(cardFlow);
+
+            if (feed.sentinel && feed.sentinel.parentNode === stream) {
+                stream.insertBefore(section, feed.sentinel);
             } else {
-                date.textContent = activity.date || '';
+                stream.appendChild(section);
             }
+            target = { section, cardFlow };
+            feed.groups.set(group.key, target);
+        }
+        group.items.forEach((activity) => target.cardFlow.appendChild(buildFeedCard(activity)));
+    });
+}
 
-            body.append(title, date);
-            card.append(cardRail, body);
-            cardFlow.appendChild(card);
-        });
+function buildFeedCard(activity) {
+    const card = document.createElement('article');
+    card.className = `feed-card feed-type-${activity.type_key || 'activity'}`;
+    if (activity.color) card.style.setProperty('--card-accent', activity.color);
+
+    const cardRail = document.createElement('div');
+    cardRail.className = 'feed-card-rail';
+    const iconPath = activity.skill
+        ? `/static/skills_64/${activity.skill.toLowerCase()}.png`
+        : `/static/icons_64/${activity.type_key || 'activity'}.png`;
+    cardRail.style.setProperty('--card-icon-url', `url("${iconPath}")`);
+
+    const body = document.createElement('div');
+    body.className = 'feed-card-body';
+
+    const title = document.createElement('h4');
+    title.className = 'feed-card-title';
+    title.textContent = activity.details ?? activity.text;
+
+    const date = document.createElement('div');
+    date.className = 'feed-card-date';
+    if (activity.date_iso) {
+        const dt = new Date(activity.date_iso);
+        date.textContent = Number.isNaN(dt.valueOf())
+            ? activity.date
+            : dt.toLocaleString([], { dateStyle: 'medium', timeStyle: 'short' });
+    } else {
+        date.textContent = activity.date || '';
+    }
 
-        section.appendChild(cardFlow);
-        stream.appendChild(section);
-    });
-}
\ No newline at end of file
+    body.append(title, date);
+    card.append(cardRail, body);
+    return card;
+}
@@ -0,0 +1,98 @@
+import asyncio
+import os
+
+import psycopg
+import pytest
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+# db (imported by the services) reads DATABASE_URL at import time.  Pure
+# helper tests never connect, so any URL will do when none is configured.
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/rs3_tracker")
+
+SCRATCH_TABLES = (
+    "players",
+    "snapshots",
+    "skills",
+    "activities",
+    "xp_rollups",
+    "import_checkpoints",
+    "response_cache",
+)
+
+
+@pytest.fixture(scope="session")
+def scratch_conninfo():
+    """Conninfo for a schema built the way init_db builds the database.
+
+    The schema lives in DATABASE_URL's database, is private to this run and
+    is dropped afterwards, so tests may commit — downsampling and rollup
+    rebuilds do.  Tests using it are skipped when no database is reachable.
+    """
+    import db
+
+    schema = f"pytest_{os.getpid()}"
+    try:
+        admin = psycopg.connect(db.DATABASE_URL, autocommit=True, connect_timeout=3)
+    except psycopg.OperationalError as exc:
+        pytest.skip(f"database unavailable: {exc}")
+    conninfo = make_conninfo(db.DATABASE_URL, options=f"-c search_path={schema}")
+    with admin:
+        admin.execute(f"CREATE SCHEMA {schema}")
+        try:
+            with psycopg.connect(conninfo, row_factory=dict_row) as conn:
+                db._create_base_tables(conn)
+                db.run_migrations(conn)
+                db._create_indexes(conn)
+            yield conninfo
+        finally:
+            admin.execute(f"DROP SCHEMA {schema} CASCADE")
+
+
+@pytest.fixture
+def scratch_db(scratch_conninfo):
+    """The scratch schema (see scratch_conninfo), emptied; yields its conninfo."""
+    with psycopg.connect(scratch_conninfo) as conn:
+        conn.execute(f"TRUNCATE {', '.join(SCRATCH_TABLES)} RESTART IDENTITY")
+    return scratch_conninfo
+
+
+@pytest.fixture
+def scratch_pool(scratch_db, monkeypatch):
+    """Point db.async_pool, and so get_async_conn, at the scratch schema.
+
+    The pool is returned closed: open it with ``async with`` inside the
+    test's event loop.
+    """
+    import db
+
+    pool = AsyncConnectionPool(
+        scratch_db, max_size=4, open=False, kwargs={"row_factory": dict_row}
+    )
+    monkeypatch.setattr(db, "async_pool", pool)
+    return pool
+
+
+@pytest.fixture
+def ingest(scratch_db):
+    """Write collector entries to the scratch schema; returns the function.
+
+    Each call runs collector._write_snapshots in one committed transaction,
+    as a collection or an import chunk does, and returns its result.
+    """
+    from collector import _write_snapshots
+
+    async def write(entries: list[dict]) -> list[tuple[int, bool]]:
+        async with await psycopg.AsyncConnection.connect(
+            scratch_db, row_factory=dict_row
+        ) as conn:
+            times = [entry["timestamp"] for entry in entries]
+            await conn.execute(
+                "SELECT ensure_monthly_partitions(%s, %s)", (min(times), max(times))
+            )
+            written = await _write_snapshots(conn, entries)
+            await conn.commit()
+        return written
+
+    return lambda entries: asyncio.run(write(entries))
@@ -0,0 +1,76 @@
+import itertools
+import random
+
+import pytest
+
+from activities import (
+    ACTIVITY_TYPE_KEYWORDS,
+    classify_activities,
+    classify_activity,
+    detect_activity_skill,
+)
+from benchmarks.bench_classify import (
+    legacy_classify_activity,
+    legacy_detect_activity_skill,
+    synthetic_corpus,
+)
+from skills import RS3_ORDER
+
+KEYWORDS = [keyword for group in ACTIVITY_TYPE_KEYWORDS.values() for keyword in group]
+
+EDGE_CASES = [
+    (None, None),
+    ("", ""),
+    ("Visited the Wishing Well", None),
+    (None, "I levelled my Magic skill."),
+    ("QUEST COMPLETE: Desperate Times", "I LEVELLED my ranged skill."),
+    ("Levelled up Magic.", "I levelled Ranged and Magic at once."),
+    ("I advanced my Magical skills", None),  # no whole-word skill
+    ("Levelled Woodcutting", "woodcuttingfletching"),
+    ("I defeated Telos and found a drop.", None),  # kill outranks loot
+    ("Clue scroll completed", "I completed a hard treasure trail."),
+    ("achievementreasure trail", None),  # keywords overlapping
+    ("Dropped in on Zoë — levelled Herblore!", "Ünlocked… Herblore?"),
+]
+
+
+def fuzz_corpus(rows: int, seed: int = 1) -> list[tuple[str | None, str | None]]:
+    """Keyword / skill fragments glued with and without separators."""
+    rng = random.Random(seed)
+    fragments = [*KEYWORDS, *RS3_ORDER, *(s.lower() for s in RS3_ORDER)]
+    fragments += ["", " ", ".", "-", "I", "my", "x", "é", "ing"]
+
+    def text():
+        if rng.random() < 0.1:
+            return None
+        return rng.choice(["", " "]).join(
+            rng.choice(fragments) for _ in range(rng.randint(0, 6))
+        )
+
+    return [(text(), text()) for _ in range(rows)]
+
+
+def test_every_keyword_pair_matches_reference():
+    for first, second in itertools.product(KEYWORDS, repeat=2):
+        for text, details in [(first + second, None), (first, f"Magic {second}")]:
+            assert classify_activity(text, details) == legacy_classify_activity(
+                text, details
+            ), (text, details)
+
+
+@pytest.mark.parametrize(
+    "corpus",
+    [EDGE_CASES, synthetic_corpus(5_000), fuzz_corpus(20_000)],
+    ids=["edge-cases", "synthetic", "fuzz"],
+)
+def test_classification_matches_reference(corpus):
+    expected = [legacy_classify_activity(*row) for row in corpus]
+    assert [classify_activity(*row) for row in corpus] == expected
+    assert classify_activities(corpus) == expected
+    assert classify_activities(iter(corpus)) == expected
+
+
+def test_skill_detection_matches_reference():
+    for text, details in EDGE_CASES + fuzz_corpus(5_000, seed=2):
+        assert detect_activity_skill(text) == legacy_detect_activity_skill(text)
+        assert detect_activity_skill(details) == legacy_detect_activity_skill(details)
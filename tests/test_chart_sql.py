@@ -0,0 +1,194 @@
+"""
+Chart bucketing over the rollups (services.charts._fetch_bucket_closes in
+SQL, _fetch_skill_totals in one pass) against the per-row bucketing in
+benchmarks.chart_reference, on fixture rollups written in a transaction
+that is rolled back.  Needs a migrated database at DATABASE_URL; skipped
+otherwise.
+"""
+
+import asyncio
+import os
+import random
+from datetime import datetime, timezone
+
+import psycopg
+import pytest
+from psycopg.rows import dict_row
+
+from benchmarks.chart_reference import (
+    aggregate_bucket_totals,
+    aggregate_last_snapshot_totals,
+)
+from services.charts import (
+    _ROLLUP_WINDOW_SQL,
+    _fetch_bucket_closes,
+    _fetch_skill_totals,
+    advance_bucket,
+    bucket_start,
+    build_bucket_starts,
+    get_period_window,
+    get_timeframe_window,
+    scale_skill_xp,
+    scale_total_xp,
+)
+from skills import SKILL_NAMES
+
+PLAYER_ID = -1  # no real player has it; the rows never outlive the test
+SKILL_COUNT = max(SKILL_NAMES) + 1
+HISTORY_START = datetime(2024, 11, 20, 5, tzinfo=timezone.utc)
+NOWS = [
+    datetime(2026, 3, 14, 15, 9, 26, tzinfo=timezone.utc),
+    datetime(2025, 2, 28, 23, 30, tzinfo=timezone.utc),
+    datetime(2024, 12, 31, 0, 5, tzinfo=timezone.utc),
+    datetime(2024, 11, 19, 12, tzinfo=timezone.utc),  # before any data
+]
+WINDOWS = [
+    *((get_timeframe_window, t) for t in ("hour", "day", "week", "month", "all")),
+    *((get_period_window, p) for p in ("day", "week", "month", "year", "all")),
+]
+
+
+def fixture_rollups(bucket: str, seed: int) -> list[dict]:
+    """Rollup rows for *bucket* from HISTORY_START, with gaps and NULLs."""
+    rng = random.Random(seed)
+    total = rng.randint(0, 10_000_000)
+    skills = [rng.randint(0, 1_000_000) for _ in range(SKILL_COUNT)]
+    late_skill = rng.randrange(SKILL_COUNT)  # no data for its first buckets
+    end = datetime(2026, 3, 20, tzinfo=timezone.utc)
+    rows = []
+    for i, start in enumerate(
+        build_bucket_starts(bucket_start(HISTORY_START, bucket), end, bucket)
+    ):
+        if rng.random() < 0.4:
+            continue  # no snapshots in this bucket
+        total += rng.choice([0, rng.randint(1, 500_000)])
+        for skill_id in rng.sample(range(SKILL_COUNT), 3):
+            skills[skill_id] += rng.randint(1, 50_000)
+        skill_xp = list(skills)
+        if i < 20:
+            skill_xp[late_skill] = None
+        rows.append(
+            {
+                "bucket_start": start.replace(tzinfo=None),
+                "total_xp": None if rng.random() < 0.05 else total,
+                "skill_xp": None if rng.random() < 0.05 else skill_xp,
+            }
+        )
+    return rows
+
+
+async def python_rows(cur, bucket: str, start, end, value_sql: str) -> list[dict]:
+    """The window rows the Python aggregators bucketed before."""
+    await cur.execute(
+        _ROLLUP_WINDOW_SQL.format(value_sql=value_sql),
+        {
+            "player_id": PLAYER_ID,
+            "bucket": bucket,
+            "start": start.replace(tzinfo=None),
+            "end": advance_bucket(end, bucket).replace(tzinfo=None),
+        },
+    )
+    return await cur.fetchall()
+
+
+def per_skill_rows(rows: list[dict]) -> dict[int, list[dict]]:
+    by_skill: dict[int, list[dict]] = {}
+    for row in rows:
+        for skill_id, xp in enumerate(row["xp"] or []):
+            if xp is not None and skill_id in SKILL_NAMES:
+                by_skill.setdefault(skill_id, []).append(
+                    {"timestamp": row["timestamp"], "xp": xp}
+                )
+    return by_skill
+
+
+async def check_windows(conn) -> int:
+    cur = conn.cursor()
+    for seed, bucket in enumerate(("hour", "day", "week", "month")):
+        await cur.executemany(
+            """
+            INSERT INTO xp_rollups (
+                player_id, granularity, bucket_start, snapshot_id, close_at,
+                total_xp, skill_xp
+            )
+            VALUES (%s, %s, %s, 0, %s, %s, %s)
+            """,
+            [
+                (
+                    PLAYER_ID,
+                    bucket,
+                    row["bucket_start"],
+                    row["bucket_start"],
+                    row["total_xp"],
+                    row["skill_xp"],
+                )
+                for row in fixture_rollups(bucket, seed)
+            ],
+        )
+
+    checked = 0
+    for now in NOWS:
+        for window, name in WINDOWS:
+            start, end, bucket = window(name, now, HISTORY_START.replace(tzinfo=None))
+            starts = build_bucket_starts(start, end, bucket)
+            args = (cur, PLAYER_ID, bucket, start, end)
+            empty = [None] * len(starts)
+
+            closes = await _fetch_bucket_closes(*args, "total_xp")
+            rows = await python_rows(cur, bucket, start, end, "total_xp")
+            assert [
+                None if close is None else scale_total_xp(close)
+                for close in closes or empty
+            ] == aggregate_last_snapshot_totals(
+                rows, bucket, starts, "xp", scale_total_xp
+            ), (now, name)
+
+            subscript = {"subscript": 5}
+            value_sql = "skill_xp[%(subscript)s]"
+            closes = await _fetch_bucket_closes(*args, value_sql, subscript)
+            rows = await python_rows(cur, bucket, start, end, "skill_xp[5]")
+            assert [
+                scale_skill_xp(close) for close in closes or empty
+            ] == aggregate_bucket_totals(rows, bucket, starts, "xp", scale_skill_xp), (
+                now,
+                name,
+            )
+
+            totals, has_data = await _fetch_skill_totals(conn, *args[1:])
+            rows = await python_rows(cur, bucket, start, end, "skill_xp")
+            expected = per_skill_rows(rows)
+            assert [i for i, seen in enumerate(has_data) if seen] == sorted(expected), (
+                now,
+                name,
+            )
+            for skill_id, skill_rows in expected.items():
+                assert [
+                    scale_skill_xp(closes[skill_id]) for closes in totals
+                ] == aggregate_bucket_totals(
+                    skill_rows, bucket, starts, "xp", scale_skill_xp
+                ), (now, name, skill_id)
+            checked += 1
+    return checked
+
+
+async def run_against_database(url: str) -> int:
+    try:
+        conn = await psycopg.AsyncConnection.connect(
+            url, row_factory=dict_row, connect_timeout=3
+        )
+    except psycopg.OperationalError as exc:
+        pytest.skip(f"database unavailable: {exc}")
+    async with conn:
+        cur = conn.cursor()
+        await cur.execute("SELECT to_regclass('xp_rollups') AS rollups")
+        if (await cur.fetchone())["rollups"] is None:
+            pytest.skip("database is not migrated")
+        try:
+            return await check_windows(conn)
+        finally:
+            await conn.rollback()
+
+
+def test_sql_bucketing_matches_python_aggregators():
+    checked = asyncio.run(run_against_database(os.environ["DATABASE_URL"]))
+    assert checked == len(NOWS) * len(WINDOWS)
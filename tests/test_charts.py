@@ -0,0 +1,195 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.chart_reference import aggregate_bucket_totals
+from services.charts import (
+    advance_bucket,
+    bucket_gains_aggregator,
+    bucket_start,
+    build_bucket_starts,
+    scale_total_xp,
+    series_totals_aggregator,
+)
+
+NOW = datetime(2026, 3, 14, 15, 9, 26, tzinfo=timezone.utc)
+WINDOWS = {"hour": timedelta(hours=23), "day": timedelta(days=30)}
+WINDOWS |= {"week": timedelta(weeks=7), "month": timedelta(days=300)}
+
+
+def synthetic_rows(seed: int, count: int, span: timedelta) -> list[dict]:
+    """Snapshot-like rows around a window ending at NOW, in random order."""
+    rng = random.Random(seed)
+    xp = rng.randint(0, 10_000_000)
+    rows = []
+    for _ in range(count):
+        offset = timedelta(seconds=rng.uniform(-0.2, 1.1) * span.total_seconds())
+        ts = (NOW - span + offset).replace(tzinfo=None)
+        if rng.random() < 0.1:
+            ts = ts.replace(minute=0, second=0, microsecond=0)  # on an edge
+        xp += rng.choice([0, 0, rng.randint(1, 50_000), -rng.randint(1, 1_000)])
+        rows.append({"timestamp": ts, "xp": xp})
+    rng.shuffle(rows)
+    return rows
+
+
+def window(bucket: str) -> list[datetime]:
+    end = bucket_start(NOW, bucket)
+    return build_bucket_starts(bucket_start(end - WINDOWS[bucket], bucket), end, bucket)
+
+
+def feed(aggregator, rows, batch_size: int):
+    next(aggregator)
+    for i in range(0, len(rows), batch_size):
+        aggregator.send(rows[i : i + batch_size])
+    return aggregator.send(None)
+
+
+def series_totals(rows, bucket: str, starts: list[datetime], width: int):
+    """series_totals_aggregator over *rows* in one batch."""
+    return feed(series_totals_aggregator(bucket, starts, width), rows, len(rows) or 1)
+
+
+def series_rows(seed: int, count: int, span: timedelta, width: int) -> list[tuple]:
+    """``(timestamp, values)`` rollup-like rows in time order, with NULLs."""
+    rng = random.Random(seed)
+    values = [rng.randint(0, 1_000_000) for _ in range(width)]
+    rows = []
+    for row in sorted(synthetic_rows(seed, count, span), key=lambda r: r["timestamp"]):
+        for series in rng.sample(range(width), 3):
+            values[series] += rng.randint(1, 50_000)
+        row_values = [None if rng.random() < 0.1 else v for v in values]
+        rows.append((row["timestamp"], None if rng.random() < 0.05 else row_values))
+    return rows
+
+
+@pytest.mark.parametrize("bucket", ["hour", "day", "week", "month"])
+def test_series_totals_match_per_series_reference(bucket):
+    width = 6
+    starts = window(bucket)
+    for seed in range(40):
+        rows = series_rows(seed, seed * 7, WINDOWS[bucket], width)
+        totals, has_data = series_totals(rows, bucket, starts, width)
+        assert len(totals) == len(starts)
+        assert all(len(closes) == width for closes in totals)
+        for series in range(width):
+            expected_rows = [
+                {"timestamp": ts, "xp": values[series]}
+                for ts, values in rows
+                if values and values[series] is not None
+            ]
+            assert has_data[series] == bool(expected_rows)
+            assert [closes[series] for closes in totals] == aggregate_bucket_totals(
+                expected_rows, bucket, starts, "xp", int
+            )
+
+
+def test_series_totals_edge_cases():
+    starts = window("day")
+    first = starts[0].replace(tzinfo=None)
+    totals, has_data = series_totals([], "day", starts, 2)
+    assert totals == [[0, 0]] * len(starts) and has_data == [False, False]
+
+    rows = [
+        (first - timedelta(days=3), [5, None]),  # baseline only
+        (first + timedelta(days=40), [9, 9]),  # past the window
+    ]
+    totals, has_data = series_totals(rows, "day", starts, 2)
+    assert totals == [[5, 0]] * len(starts)
+    assert has_data == [True, False]
+
+    # Extra values beyond *width* are ignored; equal timestamps: later wins.
+    rows = [(first, [1, 2, 3]), (first, [4, None, 6])]
+    totals, _ = series_totals(rows, "day", starts, 2)
+    assert totals[0] == [4, 2]
+    assert series_totals(rows, "day", [], 2) == ([], [False, False])
+
+
+def reference_bucket_gains(rows, bucket: str, since=None, until=None) -> list[dict]:
+    """Bucket gains as computed before streaming, with a range filter."""
+    closing_xp: dict[datetime, int] = {}
+    for row in rows:
+        b = bucket_start(row["timestamp"].replace(tzinfo=timezone.utc), bucket)
+        closing_xp[b] = row["total_xp"]
+        if row["last_seen_at"] is None:
+            continue
+        last_b = bucket_start(row["last_seen_at"].replace(tzinfo=timezone.utc), bucket)
+        b = advance_bucket(b, bucket)
+        while b <= last_b:
+            closing_xp[b] = row["total_xp"]
+            b = advance_bucket(b, bucket)
+    points, prev_xp = [], None
+    for b, xp in sorted(closing_xp.items()):
+        if (since is None or b >= since) and (until is None or b < until):
+            gain = 0 if prev_xp is None else max(0, xp - prev_xp)
+            points.append(
+                {
+                    "timestamp": b.strftime("%Y-%m-%d %H:%M:%S") + "Z",
+                    "gain": scale_total_xp(gain),
+                }
+            )
+        prev_xp = xp
+    return points
+
+
+def rollup_rows(seed: int, count: int, bucket: str) -> list[dict]:
+    """Rollup-like gains rows in bucket order, some re-seen in later buckets."""
+    rng = random.Random(seed)
+    b = bucket_start(NOW - WINDOWS[bucket], bucket)
+    xp = rng.randint(0, 10_000_000)
+    rows = []
+    for _ in range(count):
+        b = advance_bucket(b, bucket)
+        if rng.random() < 0.3:
+            continue
+        xp += rng.choice([0, rng.randint(1, 50_000), -rng.randint(1, 1_000)])
+        last_seen = None
+        if rng.random() < 0.3:
+            # Re-seen up to a few buckets on, possibly past the next row.
+            last_seen = b
+            for _ in range(rng.randint(0, 3)):
+                last_seen = advance_bucket(last_seen, bucket)
+        rows.append(
+            {
+                "timestamp": b.replace(tzinfo=None),
+                "last_seen_at": last_seen and last_seen.replace(tzinfo=None),
+                "total_xp": xp,
+            }
+        )
+    return rows
+
+
+@pytest.mark.parametrize("bucket", ["hour", "day", "week", "month"])
+def test_gains_aggregator_matches_reference_in_any_batches(bucket):
+    for seed in range(30):
+        rows = rollup_rows(seed, seed * 3, bucket)
+        expected = reference_bucket_gains(rows, bucket)
+        for batch_size in (1, 2, 7, 1000):
+            aggregator = bucket_gains_aggregator(bucket, "total_xp")
+            assert feed(aggregator, rows, batch_size) == expected
+
+
+@pytest.mark.parametrize("bucket", ["hour", "day", "week", "month"])
+def test_gains_aggregator_range(bucket):
+    starts = window(bucket)
+    for seed in range(30):
+        rng = random.Random(seed)
+        rows = rollup_rows(seed, 40, bucket)
+        since = rng.choice([None, *starts])
+        until = rng.choice([None, *starts])
+        expected = reference_bucket_gains(rows, bucket, since, until)
+        aggregator = bucket_gains_aggregator(bucket, "total_xp", since, until)
+        assert feed(aggregator, rows, 5) == expected
+
+
+def test_series_totals_aggregator_in_batches():
+    starts = window("day")
+    rows = series_rows(3, 200, WINDOWS["day"], 4)
+    expected, expected_has_data = series_totals(rows, "day", starts, 4)
+    for batch_size in (1, 3, 64):
+        totals, has_data = feed(
+            series_totals_aggregator("day", starts, 4), rows, batch_size
+        )
+        assert totals == expected
+        assert has_data == expected_has_data
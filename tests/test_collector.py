@@ -0,0 +1,323 @@
+import asyncio
+import copy
+import random
+from datetime import datetime, timedelta, timezone
+
+import psycopg
+from psycopg.rows import dict_row
+
+import collector
+from collector import legacy_hash_activity, snapshot_fingerprint
+from db import ROLLUP_GRANULARITIES, mark_history_changed, rebuild_rollups
+from skills import SKILL_NAMES
+
+T0 = datetime(2025, 6, 1, 12)
+
+
+def profile(gain: int = 0, activities: list[dict] | None = None) -> dict:
+    """A RuneMetrics profile; *gain* XP is added to Magic (id 6)."""
+    skillvalues = [
+        {"id": skill_id, "level": 99, "xp": 130_000_000 + skill_id, "rank": 5_000}
+        for skill_id in SKILL_NAMES
+    ]
+    skillvalues[6]["xp"] += gain
+    return {
+        "totalxp": sum(skill["xp"] for skill in skillvalues) // 10,
+        "totalskill": 2_900,
+        "rank": "12,345",
+        "combatlevel": 138,
+        "skillvalues": skillvalues,
+        "activities": activities or [],
+    }
+
+
+def entry(data: dict, hours: float, username: str = "Tester") -> dict:
+    return {
+        "username": username,
+        "data": data,
+        "timestamp": T0 + timedelta(hours=hours),
+    }
+
+
+def query(conninfo: str, sql: str, params=None) -> list[dict]:
+    with psycopg.connect(conninfo, row_factory=dict_row) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def test_fingerprint_covers_stored_fields_only():
+    base = profile()
+    reordered = copy.deepcopy(base)
+    reordered["skillvalues"].reverse()
+    reordered["rank"] = 12_345  # same number, unformatted
+    reordered["activities"] = [{"text": "Quest complete", "date": "01-Jun-2025"}]
+    assert snapshot_fingerprint(reordered) == snapshot_fingerprint(base)
+
+    assert snapshot_fingerprint(profile(gain=1)) != snapshot_fingerprint(base)
+    ranked = copy.deepcopy(base)
+    ranked["skillvalues"][0]["rank"] += 1
+    assert snapshot_fingerprint(ranked) != snapshot_fingerprint(base)
+
+
+def test_unchanged_profile_advances_last_seen_at(scratch_db, ingest):
+    assert ingest([entry(profile(), 0)]) == [(1, True)]
+    assert ingest([entry(profile(), 1)]) == [(1, False)]
+    assert ingest([entry(profile(gain=10), 2)]) == [(2, True)]
+    # A snapshot is compared with the player's own latest one only.
+    other = entry(profile(gain=10), 3, username="Other")
+    assert ingest([other]) == [(3, True)]
+
+    rows = query(scratch_db, "SELECT id, timestamp, last_seen_at FROM snapshots")
+    assert sorted((r["id"], r["timestamp"], r["last_seen_at"]) for r in rows) == [
+        (1, T0, T0 + timedelta(hours=1)),
+        (2, T0 + timedelta(hours=2), T0 + timedelta(hours=2)),
+        (3, T0 + timedelta(hours=3), T0 + timedelta(hours=3)),
+    ]
+
+
+def test_repeated_profiles_in_one_chunk_collapse(scratch_db, ingest):
+    entries = [
+        entry(profile(), 0),
+        entry(profile(), 1),
+        entry(profile(gain=10), 2),
+        entry(profile(gain=10), 3),
+        entry(profile(), 4),  # back to an earlier state: a new snapshot
+    ]
+    written = ingest(entries)
+    ids = [snapshot_id for snapshot_id, _ in written]
+    assert ids[0] == ids[1] != ids[2] == ids[3] != ids[4] != ids[0]
+    assert all(created for _, created in written)
+
+    rows = query(scratch_db, "SELECT last_seen_at FROM snapshots ORDER BY timestamp")
+    assert [row["last_seen_at"] for row in rows] == [
+        T0 + timedelta(hours=1),
+        T0 + timedelta(hours=3),
+        T0 + timedelta(hours=4),
+    ]
+
+
+def test_backfill_compares_with_the_snapshot_before_it(ingest):
+    ingest([entry(profile(gain=10), 10)])
+    # Older than everything stored: nothing to compare with, so it is kept.
+    assert ingest([entry(profile(), 0)]) == [(2, True)]
+    # Same as the snapshot just before it, at hour 0.
+    assert ingest([entry(profile(), 5)]) == [(2, False)]
+    # Same as the latest snapshot, at hour 10.
+    assert ingest([entry(profile(gain=10), 11)]) == [(1, False)]
+
+
+def event(n: int) -> dict:
+    """The n-th activity, hourly from T0; every fourth is a Magic level-up."""
+    when = (T0 + timedelta(hours=n)).strftime("%d-%b-%Y %H:%M")
+    if n % 4 == 0:
+        return {"text": "Levelled up Magic.", "date": when, "details": f"Level {n}"}
+    return {"text": f"I killed {n} Nex.", "date": when, "details": None}
+
+
+def history() -> list[dict]:
+    """Hourly profiles, each listing its last three activities newest first.
+
+    Hours 3 and 4 repeat hour 2's skills, so they fold into its snapshot and
+    bring their new activities along.
+    """
+    gains = [0, 10, 20, 20, 20, 30, 40]
+    return [
+        entry(profile(gain, [event(n) for n in range(i, i - 3, -1) if n >= 0]), i)
+        for i, gain in enumerate(gains)
+    ]
+
+
+def stored_state(conninfo: str) -> dict:
+    """Everything the ingest stored, keyed by snapshot time instead of ids."""
+    return {
+        "snapshots": query(
+            conninfo,
+            """
+            SELECT timestamp, last_seen_at, fingerprint, total_xp, total_level,
+                overall_rank, combat_level, quests_started, quests_complete,
+                quests_not_started, skill_xp, skill_level, skill_rank
+            FROM snapshots ORDER BY timestamp
+            """,
+        ),
+        "skills": query(
+            conninfo,
+            """
+            SELECT s.timestamp, sk.taken_at, sk.player_id = s.player_id AS same,
+                sk.skill, sk.level, sk.xp, sk.rank
+            FROM skills sk JOIN snapshots s ON s.id = sk.snapshot_id
+            ORDER BY s.timestamp, sk.skill
+            """,
+        ),
+        "activities": query(
+            conninfo,
+            """
+            SELECT s.timestamp, a.player_id = s.player_id AS same, a.text, a.date,
+                a.details, a.occurred_at, a.type_key, a.skill
+            FROM activities a JOIN snapshots s ON s.id = a.snapshot_id
+            ORDER BY a.id
+            """,
+        ),
+    }
+
+
+def test_chunk_writes_the_same_rows_as_single_profiles(scratch_db, ingest, monkeypatch):
+    monkeypatch.setattr("collector.SKILL_STORAGE_MODE", "full")
+    ingest(history())
+    chunked = stored_state(scratch_db)
+
+    with psycopg.connect(scratch_db) as conn:
+        conn.execute("TRUNCATE players, snapshots, skills, activities, xp_rollups")
+    for single in history():
+        ingest([single])
+    assert stored_state(scratch_db) == chunked
+
+    assert len(chunked["snapshots"]) == 5
+    assert len(chunked["skills"]) == 5 * len(SKILL_NAMES)
+    assert all(row["same"] for row in chunked["skills"] + chunked["activities"])
+    assert all(row["timestamp"] == row["taken_at"] for row in chunked["skills"])
+    # Each activity once, in the order it was first reported; the ones first
+    # reported by the folded hours 3 and 4 belong to hour 2's snapshot.
+    activities = chunked["activities"]
+    assert [row["occurred_at"] for row in activities] == [
+        (T0 + timedelta(hours=n)).replace(tzinfo=timezone.utc) for n in range(7)
+    ]
+    assert [row["timestamp"].hour for row in activities] == [12, 13, 14, 14, 14, 17, 18]
+    assert activities[4]["type_key"] == "level" and activities[4]["skill"] == "Magic"
+    assert activities[1]["type_key"] == "kill" and activities[1]["skill"] is None
+
+
+def test_skill_arrays_are_indexed_by_skill_id(scratch_db, ingest):
+    data = profile()
+    del data["skillvalues"][3]  # not reported: NULL in its slot
+    ingest([entry(data, 0)])
+    [row] = stored_state(scratch_db)["snapshots"]
+    assert len(row["skill_xp"]) == max(SKILL_NAMES) + 1
+    assert row["skill_xp"][3] is None and row["skill_level"][3] is None
+    assert row["skill_xp"][6] == 130_000_006 and row["skill_rank"][6] == 5_000
+    assert row["overall_rank"] == 12_345
+    assert stored_state(scratch_db)["skills"] == []  # "wide", the default
+
+
+def test_activities_already_stored_are_skipped(scratch_db, ingest):
+    legacy, current = event(1), event(2)
+    with psycopg.connect(scratch_db) as conn:
+        conn.execute(
+            "INSERT INTO activities (text, date, details, hash) "
+            "VALUES (%s, %s, %s, %s)",
+            (
+                legacy["text"],
+                legacy["date"],
+                legacy["details"],
+                legacy_hash_activity(legacy["text"], legacy["date"]),
+            ),
+        )
+    ingest([entry(profile(0, [current, legacy]), 0)])
+    ingest([entry(profile(10, [event(3), current]), 1)])
+
+    texts = [row["text"] for row in query(scratch_db, "SELECT text FROM activities")]
+    assert sorted(texts) == sorted(e["text"] for e in (legacy, current, event(3)))
+
+
+def rollups(conninfo: str) -> list[dict]:
+    return query(
+        conninfo,
+        """
+        SELECT player_id, granularity, bucket_start, snapshot_id, close_at,
+            last_seen_at, total_xp, skill_xp
+        FROM xp_rollups
+        ORDER BY player_id, granularity, bucket_start
+        """,
+    )
+
+
+def test_incremental_rollups_match_a_rebuild(scratch_db, ingest):
+    rng = random.Random(7)
+    entries, hours, gain = [], 0.0, 0
+    while hours < 24 * 40:  # across a month end, several weeks
+        if rng.random() < 0.7:
+            gain += rng.randint(1, 5_000)  # else unchanged: folds or stays
+        entries.append(entry(profile(gain), hours))
+        hours += rng.choice([0.25, 1, 3, 7, 20])
+    chunks = [entries[i : i + 9] for i in range(0, len(entries), 9)]
+    rng.shuffle(chunks)  # most chunks land as backfills before stored ones
+    for chunk in chunks:
+        ingest(chunk)
+    incremental = rollups(scratch_db)
+    assert {row["granularity"] for row in incremental} == set(ROLLUP_GRANULARITIES)
+
+    with psycopg.connect(scratch_db, row_factory=dict_row) as conn:
+        rebuild_rollups(conn)
+        conn.commit()
+    assert rollups(scratch_db) == incremental
+
+
+def test_rollups_keep_the_latest_close(ingest, scratch_db):
+    [(latest, _)] = ingest([entry(profile(20), 0.5)])
+    for later in [
+        entry(profile(10), 0.1),  # backfilled into the same buckets
+        entry(profile(20), 0.9),  # unchanged: refreshes last_seen_at
+    ]:
+        ingest([later])
+        for row in rollups(scratch_db):
+            assert row["snapshot_id"] == latest, row["granularity"]
+            assert row["close_at"] == T0 + timedelta(hours=0.5)
+            assert row["skill_xp"][6] == 130_000_006 + 20
+    assert {row["last_seen_at"] for row in rollups(scratch_db)} == {
+        T0 + timedelta(hours=0.9)
+    }
+
+
+def test_every_write_bumps_the_data_version(scratch_db, ingest):
+    def versions():
+        rows = query(scratch_db, "SELECT username, data_version FROM players")
+        return {row["username"]: row["data_version"] for row in rows}
+
+    ingest([entry(profile(), 0)])
+    assert versions() == {"Tester": 0}  # a new player starts at the default
+    ingest([entry(profile(), 1)])  # unchanged
+    ingest([entry(profile(gain=10), 2), entry(profile(), 3, username="Other")])
+    assert versions() == {"Tester": 2, "Other": 0}
+
+    with psycopg.connect(scratch_db, row_factory=dict_row) as conn:
+        mark_history_changed(conn, [1])
+        mark_history_changed(conn)
+    assert versions() == {"Tester": 4, "Other": 1}
+
+
+def test_roster_is_written_in_one_batch(scratch_pool, monkeypatch):
+    profiles = {
+        "Alpha": profile(),
+        "Beta": profile(gain=10),
+        "Gamma": {"error": "NO_PROFILE"},
+        "Delta": None,  # the fetch failed
+    }
+    writes = []
+    write_snapshots = collector._write_snapshots
+
+    async def fetch(client, username):
+        return copy.deepcopy(profiles[username])
+
+    async def write(conn, entries):
+        writes.append([entry["username"] for entry in entries])
+        return await write_snapshots(conn, entries)
+
+    async def precompute():
+        pass
+
+    monkeypatch.setattr(collector, "get_http_client", lambda: None)
+    monkeypatch.setattr(collector, "_fetch_runemetrics_data", fetch)
+    monkeypatch.setattr(collector, "_write_snapshots", write)
+    monkeypatch.setattr(collector, "precompute_responses", precompute)
+
+    async def scenario():
+        async with scratch_pool:
+            return [await collector.collect_roster(list(profiles)) for _ in range(2)]
+
+    first, second = asyncio.run(scenario())
+    assert writes == [["Alpha", "Beta"]] * 2
+    assert [r["status"] for r in first] == ["ok", "ok", "invalid", "failed"]
+    assert [r["status"] for r in second] == [
+        "unchanged",
+        "unchanged",
+        "invalid",
+        "failed",
+    ]
@@ -0,0 +1,151 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+import web
+from routes import compression
+from routes.compression import CompressionMiddleware, choose_coding
+from web import FastJSONResponse
+
+SERIES = {
+    "labels": [f"2026-03-{day:02d}" for day in range(1, 29)],
+    "series": [
+        {"skill": "Magic", "totals": [1234567.8 + i for i in range(28)]},
+        {"skill": "Necromancy", "totals": [None, 0.0, 1e20, 2.5] * 7},
+    ],
+    "name": "Zoë ✓",
+}
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_fast_json_matches_the_default_encoding(monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(web, "orjson", None)
+    body = FastJSONResponse(SERIES).body
+    default = JSONResponse(jsonable_encoder(SERIES)).body
+    assert json.loads(body) == json.loads(default)
+    if not fast:
+        assert body == default
+
+
+@pytest.mark.parametrize(
+    "header, brotli_installed, expected",
+    [
+        ("gzip, deflate, br", True, "br"),
+        ("gzip, deflate, br", False, "gzip"),
+        ("br;q=0, gzip;q=0.5", True, "gzip"),
+        ("GZIP", True, "gzip"),
+        ("identity", True, None),
+        ("", True, None),
+    ],
+)
+def test_choose_coding(monkeypatch, header, brotli_installed, expected):
+    monkeypatch.setattr(compression, "brotli", object() if brotli_installed else None)
+    assert choose_coding(header) == expected
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "app.js").write_text("let x = 1;\n" * 100)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    app.mount("/static", StaticFiles(directory=tmp_path))
+
+    @app.get("/big")
+    async def big():
+        response = FastJSONResponse(SERIES)
+        response.headers["ETag"] = '"abc"'
+        return response
+
+    @app.get("/small")
+    async def small():
+        return FastJSONResponse({"ok": True})
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"x" * 500]), media_type="text/html")
+
+    @app.get("/chunked")
+    async def chunked():
+        # What BaseHTTPMiddleware and FileResponse send: a known length,
+        # several body messages.
+        return StreamingResponse(
+            iter([b"x" * 300] * 2),
+            media_type="text/html",
+            headers={"Content-Length": "600"},
+        )
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_compresses_large_bodies_and_tags_them(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"abc-gzip"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(FastJSONResponse(SERIES).body)
+    assert response.json() == json.loads(FastJSONResponse(SERIES).body)
+
+    raw = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+    assert raw.headers["etag"] == '"abc"'
+    assert raw.headers["vary"] == "Accept-Encoding"
+
+
+def test_compresses_chunked_bodies_of_known_length(client):
+    response = client.get("/chunked", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "x" * 600
+
+
+def test_leaves_small_and_streamed_bodies_alone(client):
+    for path in ("/small", "/stream"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip, br"})
+        assert "content-encoding" not in response.headers, path
+
+
+def test_leaves_partial_responses_alone(client):
+    response = client.get(
+        "/static/app.js", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-549"}
+    )
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.text == "let x = 1;\n" * 50
+
+
+def test_revalidates_compressed_bodies(client):
+    response = client.get("/static/app.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert etag.endswith('-gzip"')
+
+    # The app compares its own ETag; the client gets its tag back.
+    for if_none_match in (etag, f'"other", W/{etag}'):
+        response = client.get(
+            "/static/app.js",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": if_none_match},
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    # Only the coding this request would get is a match.
+    for accept_encoding in ("identity", "br;q=0, deflate"):
+        response = client.get(
+            "/static/app.js",
+            headers={"Accept-Encoding": accept_encoding, "If-None-Match": etag},
+        )
+        assert response.status_code == 200, accept_encoding
+
+
+def test_gzip_is_deterministic():
+    body = FastJSONResponse(SERIES).body
+    assert compression.compress(body, "gzip") == compression.compress(body, "gzip")
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
@@ -0,0 +1,205 @@
+import asyncio
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import psycopg
+import pytest
+from psycopg.rows import dict_row
+
+import db
+from services.dashboard import (
+    _QUESTS_SINCE_SQL,
+    get_activities_data,
+    get_dashboard_data,
+    parse_feed_cursor,
+)
+from skills import SKILL_NAMES
+
+ACTIVITY_DATE = "%d-%b-%Y %H:%M"
+
+
+def profile(activities: list[dict]) -> dict:
+    return {
+        "totalxp": 1_000_000,
+        "skillvalues": [
+            {"id": skill_id, "level": 99, "xp": 13_034_431, "rank": 1}
+            for skill_id in SKILL_NAMES
+        ],
+        "activities": activities,
+    }
+
+
+def activity(text: str, when: datetime | str | None, details=None) -> dict:
+    date = when.strftime(ACTIVITY_DATE) if isinstance(when, datetime) else when
+    return {"text": text, "date": date, "details": details}
+
+
+def test_backfill_classifies_stored_activities(scratch_db, ingest, monkeypatch):
+    [(snapshot_id, _)] = ingest(
+        [{"username": "Tester", "data": profile([]), "timestamp": datetime(2025, 6, 1)}]
+    )
+    rows = [
+        activity("Quest complete: Desperate Times", "01-Jun-2025 10:15"),
+        activity("Levelled up Magic.", "01-Jun-2025 11:00:30", "Level 99"),
+        activity("I killed 5 Nex.", "sometime"),  # unparseable: no occurred_at
+        activity("Visited the Wishing Well", None),
+        activity("I found a rare drop.", "02-Jun-2025 00:00"),
+    ]
+    with psycopg.connect(scratch_db, row_factory=dict_row) as conn:
+        # As stored before 0007: no player_id and nothing classified.
+        for i, row in enumerate(rows):
+            conn.execute(
+                """
+                INSERT INTO activities (snapshot_id, text, date, details, hash)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (snapshot_id, row["text"], row["date"], row["details"], str(i)),
+            )
+        monkeypatch.setattr(db, "ACTIVITY_BACKFILL_BATCH", 2)
+        db._migration_activity_metadata(conn)
+        stored = conn.execute(
+            """
+            SELECT player_id, occurred_at, type_key, skill
+            FROM activities ORDER BY id
+            """
+        ).fetchall()
+        [player] = conn.execute("SELECT id FROM players").fetchall()
+
+    utc = timezone.utc
+    assert stored == [
+        {
+            "player_id": player["id"],
+            "occurred_at": occurred_at,
+            "type_key": type_key,
+            "skill": skill,
+        }
+        for occurred_at, type_key, skill in [
+            (datetime(2025, 6, 1, 10, 15, tzinfo=utc), "quest", None),
+            (datetime(2025, 6, 1, 11, 0, 30, tzinfo=utc), "level", "Magic"),
+            (None, "kill", None),
+            (None, "activity", None),
+            (datetime(2025, 6, 2, tzinfo=utc), "loot", None),
+        ]
+    ]
+
+
+def test_quests_today_counts_every_dated_quest(scratch_pool, ingest, monkeypatch):
+    monkeypatch.setattr("services.dashboard.RS3_USERNAME", "Tester")
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    activities = [
+        activity("Quest complete: Desperate Times", today),
+        activity("Quest complete: Plague's End", today + timedelta(minutes=1)),
+        activity("Quest complete: Sliske's Endgame", today - timedelta(minutes=1)),
+        # Counted by occurred_at only; one that could not be parsed has none.
+        activity("Quest complete: Fate of the Gods", "sometime"),
+        # Well past the old 500-row feed window, the quests above still count.
+        *(
+            activity(f"I killed {n} Nex.", today + timedelta(minutes=2))
+            for n in range(600)
+        ),
+    ]
+    ingest([{"username": "Tester", "data": profile(activities), "timestamp": now}])
+
+    async def dashboard():
+        async with scratch_pool:
+            return await get_dashboard_data.__wrapped__()
+
+    highlights = asyncio.run(dashboard())["today_highlights"]
+    assert highlights["quests_finished_today"] == 2
+
+
+def test_quests_today_uses_the_feed_index(scratch_db):
+    with psycopg.connect(scratch_db) as conn:
+        conn.execute("SET enable_seqscan = off")
+        plan = "\n".join(
+            row[0]
+            for row in conn.execute(
+                f"EXPLAIN {_QUESTS_SINCE_SQL}", (1, datetime(2025, 6, 1))
+            )
+        )
+    assert "idx_activities_player_feed" in plan, plan
+    [index_cond] = [line for line in plan.splitlines() if "Index Cond" in line]
+    assert "COALESCE" in index_cond, plan
+
+
+def test_parse_feed_cursor():
+    assert parse_feed_cursor(None) is None
+    assert parse_feed_cursor("") is None
+    assert parse_feed_cursor("4031") == 4031
+    assert parse_feed_cursor("2025-06-01T12:00") == datetime(
+        2025, 6, 1, 12, tzinfo=timezone.utc
+    )
+    offset = parse_feed_cursor("2025-06-01T12:00:00+02:00")
+    assert offset == datetime(2025, 6, 1, 10, tzinfo=timezone.utc)
+    for bad in ("-1", "4031a", "yesterday"):
+        with pytest.raises(ValueError):
+            parse_feed_cursor(bad)
+
+
+def feed_history() -> list[dict]:
+    """Activities with shared times, undated ones and several types."""
+    start = datetime(2025, 6, 1)
+    entries = []
+    for hour in range(6):
+        events = [
+            activity(f"I killed {hour * 10 + n} Nex.", start + timedelta(hours=hour))
+            for n in range(3)  # three at the same minute: ties broken by id
+        ]
+        events.append(activity(f"Quest complete: Quest {hour}", start))
+        events.append(activity(f"Visited place {hour}", "sometime"))
+        entries.append(
+            {
+                "username": "Tester",
+                "data": profile(events),
+                "timestamp": start + timedelta(hours=hour),
+            }
+        )
+    return entries
+
+
+def test_feed_pages_walk_the_whole_feed(scratch_pool, ingest, monkeypatch):
+    monkeypatch.setattr("services.dashboard.RS3_USERNAME", "Tester")
+    for entry in feed_history():
+        ingest([entry])
+
+    async def scenario():
+        async with scratch_pool:
+            everything = await get_activities_data(limit=200)
+            feed = everything["items"]
+            assert everything["next_before"] is None
+
+            # Older pages, following next_before.
+            pages, before = [], None
+            while True:
+                page = await get_activities_data(limit=4, before=before)
+                pages.append(page["items"])
+                before = page["next_before"]
+                if before is None:
+                    break
+            assert [row for items in pages for row in items] == feed
+            assert all(len(items) == 4 for items in pages[:-1])
+
+            # after returns the newer page adjacent to the cursor.
+            for newer, older in itertools.pairwise(pages):
+                page = await get_activities_data(limit=4, after=older[0]["id"])
+                assert page["items"] == newer[-4:]
+            assert (await get_activities_data(after=feed[0]["id"]))["items"] == []
+
+            # A time cursor and filters narrow the same ordering.
+            cutoff = datetime(2025, 6, 1, 3, tzinfo=timezone.utc)
+            page = await get_activities_data(limit=200, before=cutoff)
+            assert page["items"] == [
+                row
+                for row in feed
+                if row["date_iso"] is None or row["date_iso"] < "2025-06-01T03:00"
+            ]
+            page = await get_activities_data(limit=200, type_key="quest")
+            assert page["items"] == [r for r in feed if r["type_key"] == "quest"]
+            return feed
+
+    feed = asyncio.run(scenario())
+    assert len(feed) == len({row["id"] for row in feed}) == 30
+    keys = [row["date_iso"] or "" for row in feed]
+    assert keys == sorted(keys, reverse=True)  # undated ones last
+    assert feed[-1]["date_iso"] is None
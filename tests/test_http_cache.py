@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from routes import http_cache
+from routes.http_cache import (
+    ConditionalGetMiddleware,
+    etag_matches,
+    make_etag,
+    next_change,
+)
+from services.cache import request_watermark
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "minute, now, expected",
+    [
+        (0, utc(2026, 3, 14, 15, 9, 26), utc(2026, 3, 14, 16)),
+        (0, utc(2026, 3, 14, 23, 59), utc(2026, 3, 15)),
+        (10, utc(2026, 3, 14, 15, 9, 26), utc(2026, 3, 14, 15, 10)),
+        (10, utc(2026, 3, 14, 15, 10), utc(2026, 3, 14, 16)),
+    ],
+)
+def test_next_change(monkeypatch, minute, now, expected):
+    monkeypatch.setattr(http_cache, "COLLECT_MINUTE", minute)
+    assert next_change(now) == expected
+
+
+def test_etag_matching():
+    etag = make_etag("/api/chart/Magic/day?", (1, None), utc(2026, 3, 14, 15))
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag != make_etag("/api/chart/Magic/day?", (2, None), utc(2026, 3, 14, 15))
+    assert etag != make_etag("/api/chart/Magic/day?", (1, None), utc(2026, 3, 14, 16))
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    state = {"watermark": (1, None), "computed": 0}
+
+    async def fetch_watermark():
+        return state["watermark"]
+
+    monkeypatch.setattr(http_cache, "fetch_watermark", fetch_watermark)
+    app = FastAPI()
+    app.add_middleware(ConditionalGetMiddleware)
+
+    @app.get("/api/data")
+    async def data():
+        state["computed"] += 1
+        return {"watermark": request_watermark.get()}
+
+    @app.get("/api/broken")
+    async def broken():
+        raise HTTPException(status_code=400)
+
+    @app.get("/admin")
+    async def admin():
+        return {}
+
+    with TestClient(app) as client:
+        yield client, state
+
+
+def test_not_modified_skips_the_handler(client):
+    client, state = client
+    response = client.get("/api/data")
+    etag = response.headers["etag"]
+    assert response.json() == {"watermark": [1, None]}
+    assert "max-age=" in response.headers["cache-control"]
+
+    response = client.get("/api/data", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and not response.content
+    assert response.headers["etag"] == etag
+    assert state["computed"] == 1
+
+    state["watermark"] = (2, None)  # a collection landed
+    response = client.get("/api/data", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
+    assert state["computed"] == 2
+
+
+def test_only_successful_reads_get_validators(client):
+    client, _ = client
+    assert "etag" not in client.get("/api/broken").headers
+    assert "etag" not in client.get("/admin").headers
+    first = client.get("/api/data?x=1").headers["etag"]
+    assert first != client.get("/api/data?x=2").headers["etag"]
@@ -0,0 +1,77 @@
+import asyncio
+import re
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import SERVICE_CACHE_SIZE
+from services.cache import request_watermark
+from services.response_cache import CHART_PERIODS, RESPONSES, _json_body
+from skills import RS3_ORDER
+
+PAYLOADS = [
+    {"labels": ["2026-03-14"], "series": [{"skill": "Magic", "totals": [1.5, 2.0]}]},
+    [{"timestamp": "2026-03-14 15:00:00Z", "gain": 0}],
+    {"totals": [None, 10.1, 1e20], "skill": "Dungeoneering", "name": "Zoë ✓"},
+    None,
+]
+
+
+def test_stored_body_matches_a_live_json_response():
+    app = FastAPI()
+
+    @app.get("/{i}")
+    async def payload(i: int):
+        return PAYLOADS[i]
+
+    with TestClient(app) as client:
+        for i, payload in enumerate(PAYLOADS):
+            assert client.get(f"/{i}").text == _json_body(payload)
+
+
+def test_keys_are_unique():
+    keys = [(endpoint, params) for endpoint, params, _ in RESPONSES]
+    assert len(keys) == len(set(keys))
+
+
+def test_dashboard_chart_requests_are_precomputed():
+    template = Path(__file__).parent.parent / "templates" / "index.html"
+    periods = re.findall(r'data-period="(\w+)"', template.read_text())
+    assert periods and set(periods) <= set(CHART_PERIODS)
+    chart_keys = {params for endpoint, params, _ in RESPONSES if endpoint == "chart"}
+    for skill in RS3_ORDER:
+        for period in periods:
+            assert (skill, period) in chart_keys
+
+
+def test_service_cache_holds_a_precompute_pass():
+    assert len(RESPONSES) <= SERVICE_CACHE_SIZE
+
+
+def test_precompute_reads_the_watermark_once_and_logs_failures(monkeypatch, caplog):
+    from services import response_cache
+
+    lookups, seen = [], []
+
+    async def fetch_watermark():
+        lookups.append(1)
+        return (42, "seen")
+
+    async def render(name):
+        seen.append(request_watermark.get())
+        if name == "broken":
+            raise KeyError(name)  # not a database error
+        return {"name": name}
+
+    monkeypatch.setattr(response_cache, "fetch_watermark", fetch_watermark)
+    monkeypatch.setattr(
+        response_cache,
+        "RESPONSES",
+        [("chart", (name,), render) for name in ("a", "b", "broken")],
+    )
+    assert asyncio.run(response_cache.precompute_responses()) == 0
+    assert lookups == [1]
+    assert seen == [(42, "seen")] * 3
+    assert request_watermark.get() is None
+    assert "Precomputing responses failed" in caplog.text
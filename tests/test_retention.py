@@ -0,0 +1,150 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import psycopg
+from psycopg.rows import dict_row
+
+from db import downsample_snapshots, rebuild_rollups
+from skills import SKILL_NAMES
+
+DAILY_DAYS = 30
+WEEKLY_DAYS = 60
+HISTORY_DAYS = WEEKLY_DAYS + 200  # several month ends fall mid-week
+STEP = timedelta(hours=5)
+
+
+def profile(xp: int) -> dict:
+    return {
+        "totalxp": xp,
+        "skillvalues": [
+            {"id": skill_id, "level": 99, "xp": xp + skill_id, "rank": 1}
+            for skill_id in SKILL_NAMES
+        ],
+    }
+
+
+def history() -> list[dict]:
+    """A snapshot every five hours, each with one new activity."""
+    midnight = datetime.now(timezone.utc).replace(
+        tzinfo=None, hour=0, minute=0, second=0, microsecond=0
+    )
+    start = midnight - timedelta(days=HISTORY_DAYS, hours=3)
+    entries = []
+    for i in range(int(timedelta(days=HISTORY_DAYS) / STEP)):
+        ts = start + i * STEP
+        data = profile(1_000 * i)
+        data["activities"] = [{"text": f"Event {i}", "date": f"{i}", "details": None}]
+        entries.append({"username": "Tester", "data": data, "timestamp": ts})
+    return entries
+
+
+def expected_survivors(timestamps: list[datetime]) -> list[datetime]:
+    midnight = datetime.now(timezone.utc).replace(
+        tzinfo=None, hour=0, minute=0, second=0, microsecond=0
+    )
+    daily_before = midnight - timedelta(days=DAILY_DAYS)
+    weekly_day = midnight - timedelta(days=WEEKLY_DAYS)
+    weekly_before = weekly_day - timedelta(days=weekly_day.weekday())
+
+    def bucket(ts: datetime):
+        day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+        if ts < weekly_before:
+            week = day - timedelta(days=day.weekday())
+            return max(week, day.replace(day=1))
+        if ts < daily_before:
+            return day
+        return ts
+
+    return [max(group) for _, group in itertools.groupby(timestamps, bucket)]
+
+
+def fetch(conn, sql: str) -> list[dict]:
+    return conn.execute(sql).fetchall()
+
+
+ROLLUPS_SQL = """
+    SELECT granularity, bucket_start, snapshot_id, close_at, last_seen_at,
+        total_xp, skill_xp
+    FROM xp_rollups
+    ORDER BY granularity, bucket_start
+"""
+
+
+def by_granularity(rows: list[dict], *granularities: str) -> list[dict]:
+    return [row for row in rows if row["granularity"] in granularities]
+
+
+def test_downsampling_keeps_period_closes(scratch_db, ingest, monkeypatch):
+    monkeypatch.setattr("collector.SKILL_STORAGE_MODE", "full")
+    entries = history()
+    for chunk in itertools.batched(entries, 500):
+        ingest(list(chunk))
+
+    with psycopg.connect(scratch_db, row_factory=dict_row) as conn:
+        conn.execute(
+            "INSERT INTO response_cache (endpoint, params, computed_hour, body) "
+            "VALUES ('dashboard', '', LOCALTIMESTAMP, '')"
+        )
+        conn.commit()
+        before = fetch(conn, ROLLUPS_SQL)
+        [version] = fetch(conn, "SELECT data_version FROM players")
+
+        stats = downsample_snapshots(conn, DAILY_DAYS, WEEKLY_DAYS, batch_size=50)
+
+        snapshots = fetch(conn, "SELECT id, timestamp FROM snapshots ORDER BY 2")
+        timestamps = [entry["timestamp"] for entry in entries]
+        assert [row["timestamp"] for row in snapshots] == expected_survivors(timestamps)
+        assert stats["snapshots"] == len(entries) - len(snapshots)
+        assert stats["batches"] == -(-stats["snapshots"] // 50)
+
+        assert fetch(conn, "SELECT * FROM response_cache") == []
+        [player] = fetch(conn, "SELECT data_version FROM players")
+        assert player["data_version"] == version["data_version"] + stats["batches"]
+
+        # Activities of removed snapshots now belong to survivors.
+        [orphans] = fetch(
+            conn,
+            """
+            SELECT COUNT(*) AS activities,
+                COUNT(*) FILTER (WHERE NOT EXISTS (
+                    SELECT 1 FROM snapshots s WHERE s.id = a.snapshot_id
+                )) AS orphaned
+            FROM activities a
+            """,
+        )
+        assert orphans == {"activities": len(entries), "orphaned": 0}
+        assert stats["activities"] > 0
+
+        # Skills rows ("full" mode) go with their snapshots.
+        [skills] = fetch(
+            conn,
+            """
+            SELECT COUNT(*) AS rows, COUNT(DISTINCT snapshot_id) AS snapshots
+            FROM skills
+            """,
+        )
+        assert skills == {
+            "rows": len(snapshots) * len(SKILL_NAMES),
+            "snapshots": len(snapshots),
+        }
+        assert stats["skills"] == stats["snapshots"] * len(SKILL_NAMES)
+
+        # Charts read the same day/week/month closes, before and after a
+        # rebuild; only the hourly buckets of removed snapshots are gone.
+        after = fetch(conn, ROLLUPS_SQL)
+        coarse = ("day", "week", "month")
+        assert by_granularity(after, *coarse) == by_granularity(before, *coarse)
+        kept_ids = {row["id"] for row in snapshots}
+        assert by_granularity(after, "hour") == [
+            row
+            for row in by_granularity(before, "hour")
+            if row["snapshot_id"] in kept_ids
+        ]
+        rebuild_rollups(conn)
+        conn.commit()
+        rebuilt = fetch(conn, ROLLUPS_SQL)
+        assert by_granularity(rebuilt, "week", "month") == by_granularity(
+            before, "week", "month"
+        )
+
+        assert downsample_snapshots(conn, DAILY_DAYS, WEEKLY_DAYS)["snapshots"] == 0
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from services.cache import ServiceCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def counting(result="value", delay=0.0):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return compute, calls
+
+
+def test_hit_after_miss():
+    cache = ServiceCache(4)
+    compute, calls = counting()
+
+    async def scenario():
+        assert await cache.get_or_compute("k", compute) == "value"
+        assert await cache.get_or_compute("k", compute) == "value"
+
+    run(scenario())
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 4}
+
+
+def test_least_recently_used_is_evicted():
+    cache = ServiceCache(2)
+
+    async def scenario():
+        for key in ("a", "b", "a", "c"):  # "b" is the least recently used
+            await cache.get_or_compute(key, counting(key)[0])
+
+    run(scenario())
+    assert list(cache._entries) == ["a", "c"]
+
+
+def test_concurrent_misses_compute_once():
+    cache = ServiceCache(4)
+    compute, calls = counting(delay=0.01)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(cache.get_or_compute("k", compute) for _ in range(10))
+        )
+
+    assert run(scenario()) == ["value"] * 10
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (9, 1)
+
+
+def test_failures_reach_waiters_and_are_not_cached():
+    cache = ServiceCache(4)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(
+            cache.get_or_compute("k", fail),
+            cache.get_or_compute("k", fail),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await cache.get_or_compute("k", counting()[0]) == "value"
+
+    run(scenario())
+
+
+def test_invalidate_drops_entries_and_in_flight_results():
+    cache = ServiceCache(4)
+    compute, calls = counting(delay=0.01)
+
+    async def scenario():
+        await cache.get_or_compute("a", compute)
+        pending = asyncio.create_task(cache.get_or_compute("b", compute))
+        await asyncio.sleep(0)
+        cache.invalidate()
+        assert await pending == "value"
+        assert cache.stats()["size"] == 0  # "b" started before the invalidation
+        await cache.get_or_compute("a", compute)
+
+    run(scenario())
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("maxsize", [1, 3])
+def test_size_is_bounded(maxsize):
+    cache = ServiceCache(maxsize)
+
+    async def scenario():
+        for key in range(10):
+            await cache.get_or_compute(key, counting()[0])
+
+    run(scenario())
+    assert cache.stats()["size"] == maxsize
+
+
+def test_waiters_retry_when_the_computing_caller_is_cancelled():
+    cache = ServiceCache(4)
+    compute, calls = counting(delay=0.01)
+
+    async def scenario():
+        first = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await asyncio.gather(*waiters) == ["value"] * 3
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # A cancelled waiter leaves the computation to the others.
+        waiter = asyncio.create_task(cache.get_or_compute("w", compute))
+        other = asyncio.create_task(cache.get_or_compute("w", compute))
+        await asyncio.sleep(0)
+        other.cancel()
+        assert await waiter == "value"
+        assert "k" in cache._entries and not cache._inflight
+
+    run(scenario())
+    assert len(calls) == 3  # "k" twice (cancelled, retried) and "w" once
+    assert cache.misses == 3
+
+
+def test_watermark_moves_with_every_collection(scratch_pool, ingest, monkeypatch):
+    from datetime import datetime
+
+    from services.cache import fetch_watermark
+    from skills import SKILL_NAMES
+
+    monkeypatch.setattr("services.cache.RS3_USERNAME", "Tester")
+    profile = {
+        "totalxp": 1,
+        "skillvalues": [{"id": i, "level": 1, "xp": 0} for i in SKILL_NAMES],
+    }
+
+    async def scenario():
+        async with scratch_pool:
+            assert await fetch_watermark() == (None, None)
+            for hour in range(3):  # the same profile: only last_seen_at moves
+                entry = {
+                    "username": "Tester",
+                    "data": profile,
+                    "timestamp": datetime(2025, 6, 1, hour),
+                }
+                await asyncio.to_thread(ingest, [entry])
+                assert await fetch_watermark() == (1, hour)
+
+    run(scenario())
@@ -0,0 +1,132 @@
+import pytest
+
+from skills import EXTENDED_120_SKILLS, RS3_ORDER
+from utils import (
+    INVENTION_XP_TABLE,
+    STANDARD_XP_TABLE,
+    XP_PRECISION,
+    calculate_progress,
+    level_for_xp,
+    skills_progress,
+    xp_for_level,
+    xp_to_next_level,
+)
+
+# The formulas utils used before the tables were precomputed.
+
+
+def reference_standard_xp(level: int) -> int:
+    total = 0
+    for i in range(1, level):
+        total += int(i + 300 * (2 ** (i / 7.0)))
+    return total // 4
+
+
+def reference_invention_xp(level: int) -> int:
+    idx = level - 1
+    if 0 <= idx < len(INVENTION_XP_TABLE):
+        return int(INVENTION_XP_TABLE[idx])
+    return int(36000000 * ((level / 99.0) ** 3.5))
+
+
+def reference_level_xp(skill: str, level: int) -> int:
+    if skill == "Invention":
+        return reference_invention_xp(level)
+    return reference_standard_xp(level)
+
+
+def reference_is_max_level(skill: str, level: int) -> bool:
+    return level >= 120 or (level >= 99 and skill not in EXTENDED_120_SKILLS)
+
+
+def reference_xp_to_next_level(skill: str, level: int, xp: int) -> int:
+    if reference_is_max_level(skill, level):
+        return 0
+    remaining = max(0.0, reference_level_xp(skill, level + 1) - xp / XP_PRECISION)
+    return round(remaining * XP_PRECISION)
+
+
+def reference_calculate_progress(skill: str, level: int, xp: int) -> float:
+    normalized_xp = xp / XP_PRECISION
+    if reference_is_max_level(skill, level):
+        return 1.0
+    current_level_xp = reference_level_xp(skill, level)
+    next_level_xp = reference_level_xp(skill, level + 1)
+    if normalized_xp >= next_level_xp or next_level_xp == current_level_xp:
+        return 1.0
+    progress = (normalized_xp - current_level_xp) / (next_level_xp - current_level_xp)
+    return max(0.0, min(1.0, progress))
+
+
+def sample_xp(skill: str, level: int) -> list[int]:
+    """Stored (XP_PRECISION) XP values around and inside *level*."""
+    start = reference_level_xp(skill, level) * XP_PRECISION
+    end = reference_level_xp(skill, level + 1) * XP_PRECISION
+    return sorted({0, start - 1, start, start + 7, (start + end) // 2, end - 1, end})
+
+
+def test_standard_table_matches_formula():
+    assert len(STANDARD_XP_TABLE) == 150
+    for level in range(1, 151):
+        assert STANDARD_XP_TABLE[level - 1] == reference_standard_xp(level)
+
+
+def test_xp_for_level_matches_formula():
+    for skill in ("Attack", "Slayer", "Invention"):
+        for level in range(-1, 160):
+            if skill == "Invention" and level < 0:
+                continue  # the old fallback is complex-valued below level 0
+            assert xp_for_level(skill, level) == reference_level_xp(skill, level)
+
+
+@pytest.mark.parametrize("skill", RS3_ORDER)
+def test_progress_matches_formula(skill):
+    for level in range(1, 122):
+        for xp in sample_xp(skill, level):
+            assert calculate_progress(skill, level, xp) == (
+                reference_calculate_progress(skill, level, xp)
+            )
+            assert xp_to_next_level(skill, level, xp) == (
+                reference_xp_to_next_level(skill, level, xp)
+            )
+
+
+@pytest.mark.parametrize("skill", ["Attack", "Slayer", "Invention"])
+def test_level_for_xp_matches_thresholds(skill):
+    cap = 120 if skill in EXTENDED_120_SKILLS else 99
+    virtual_cap = 150 if skill in EXTENDED_120_SKILLS else 120
+    if skill == "Invention":
+        virtual_cap = len(INVENTION_XP_TABLE)
+
+    for level in range(1, virtual_cap + 1):
+        start = reference_level_xp(skill, level) * XP_PRECISION
+        assert level_for_xp(skill, start, virtual=True) == level
+        if level > 1:
+            assert level_for_xp(skill, start - 1, virtual=True) == level - 1
+        assert level_for_xp(skill, start) == min(level, cap)
+
+    assert level_for_xp(skill, 0) == 1
+    assert level_for_xp(skill, 2_000_000_000, virtual=True) <= virtual_cap
+
+
+def test_virtual_levels():
+    # 200M XP is level 99 / 120, and virtual 126 on the standard curve.
+    assert level_for_xp("Attack", 2_000_000_000) == 99
+    assert level_for_xp("Attack", 2_000_000_000, virtual=True) == 120
+    assert level_for_xp("Slayer", 2_000_000_000) == 120
+    assert level_for_xp("Slayer", 2_000_000_000, virtual=True) == 126
+
+
+def test_skills_progress_batch_matches_single_calls():
+    profile = [
+        {"skill": skill, "level": level, "xp": xp}
+        for skill, level in zip(RS3_ORDER, range(70, 70 + len(RS3_ORDER)))
+        for xp in [sample_xp(skill, level)[3]]
+    ]
+    results = skills_progress(profile)
+
+    assert [r["skill"] for r in results] == RS3_ORDER
+    for s, result in zip(profile, results):
+        assert result["progress"] == calculate_progress(s["skill"], s["level"], s["xp"])
+        assert result["xp_to_next"] == xp_to_next_level(s["skill"], s["level"], s["xp"])
+        assert result["virtual_level"] == level_for_xp(s["skill"], s["xp"], True)
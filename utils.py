@@ -1,7 +1,15 @@
-from skills import EXTENDED_120_SKILLS
+from bisect import bisect_right
+from collections.abc import Iterable
+from itertools import accumulate
+
+from skills import ELITE_SKILLS, EXTENDED_120_SKILLS
 
 XP_PRECISION = 10
 
+# Highest virtual level reported for 120-cap skills (99-cap skills stop at
+# 120).
+VIRTUAL_LEVEL_CAP = 150
+
 # Optional exact cumulative XP table for Invention.
 # Index by level (e.g. index 0 => level 1 cumulative XP, index 119 => level 120).
 INVENTION_XP_TABLE = [
@@ -128,17 +136,34 @@ INVENTION_XP_TABLE = [
 ]
 
 
-def _is_max_level(skill: str, level: int) -> bool:
-    return level >= 120 or (level >= 99 and skill not in EXTENDED_120_SKILLS)
+# Cumulative XP by level for the standard curve, computed once.  Index by
+# level like INVENTION_XP_TABLE; it runs to virtual level 150.
+STANDARD_XP_TABLE: list[int] = [
+    total // 4
+    for total in accumulate(
+        (int(i + 300 * (2 ** (i / 7.0))) for i in range(1, VIRTUAL_LEVEL_CAP)),
+        initial=0,
+    )
+]
 
 
-def _standard_xp(level: int) -> int:
+def _standard_curve(level: int) -> int:
     total = 0
     for i in range(1, level):
         total += int(i + 300 * (2 ** (i / 7.0)))
     return total // 4
 
 
+def _is_max_level(skill: str, level: int) -> bool:
+    return level >= 120 or (level >= 99 and skill not in EXTENDED_120_SKILLS)
+
+
+def _standard_xp(level: int) -> int:
+    if 1 <= level <= len(STANDARD_XP_TABLE):
+        return STANDARD_XP_TABLE[level - 1]
+    return _standard_curve(level)
+
+
 def _invention_xp(level: int) -> int:
     idx = level - 1
     if 0 <= idx < len(INVENTION_XP_TABLE):
@@ -147,15 +172,40 @@ def _invention_xp(level: int) -> int:
     return int(36000000 * ((level / 99.0) ** 3.5))
 
 
+def _xp_table(skill: str) -> list[int]:
+    return INVENTION_XP_TABLE if skill in ELITE_SKILLS else STANDARD_XP_TABLE
+
+
+def xp_for_level(skill: str, level: int) -> int:
+    """Cumulative in-game XP (not XP_PRECISION units) needed for *level*."""
+    if skill in ELITE_SKILLS:
+        return _invention_xp(level)
+    return _standard_xp(level)
+
+
+def level_for_xp(skill: str, xp: int, virtual: bool = False) -> int:
+    """Level reached with *xp* (XP_PRECISION units), by binary search.
+
+    Capped at the skill's maximum (99 or 120); with *virtual*, at 120 or
+    150 instead — or at the end of its XP table, which for elite skills is
+    level 120.
+    """
+    table = _xp_table(skill)
+    extended = skill in EXTENDED_120_SKILLS
+    if virtual:
+        cap = VIRTUAL_LEVEL_CAP if extended else 120
+    else:
+        cap = 120 if extended else 99
+    level = bisect_right(table, xp / XP_PRECISION)
+    return max(1, min(level, cap, len(table)))
+
+
 def xp_to_next_level(skill: str, level: int, xp: int) -> int:
     if _is_max_level(skill, level):
         return 0
 
     normalized_xp = xp / XP_PRECISION
-    if skill == "Invention":
-        next_level_xp = _invention_xp(level + 1)
-    else:
-        next_level_xp = _standard_xp(level + 1)
+    next_level_xp = xp_for_level(skill, level + 1)
 
     remaining = max(0.0, next_level_xp - normalized_xp)
     return int(round(remaining * XP_PRECISION))
@@ -168,15 +218,30 @@ def calculate_progress(skill: str, level: int, xp: int) -> float:
     if _is_max_level(skill, level):
         return 1.0
 
-    if skill == "Invention":
-        current_level_xp = _invention_xp(level)
-        next_level_xp = _invention_xp(level + 1)
-    else:
-        current_level_xp = _standard_xp(level)
-        next_level_xp = _standard_xp(level + 1)
+    current_level_xp = xp_for_level(skill, level)
+    next_level_xp = xp_for_level(skill, level + 1)
 
     if normalized_xp >= next_level_xp or next_level_xp == current_level_xp:
         return 1.0
 
     progress = (normalized_xp - current_level_xp) / (next_level_xp - current_level_xp)
     return max(0.0, min(1.0, progress))
+
+
+def skills_progress(skills: Iterable[dict]) -> list[dict]:
+    """Progress for a whole profile in one call.
+
+    Takes ``{"skill", "level", "xp"}`` rows (e.g. unpack_skill_state output)
+    and returns, in the same order, ``{"skill", "progress", "xp_to_next",
+    "virtual_level"}`` with the values calculate_progress, xp_to_next_level
+    and level_for_xp(virtual=True) give.
+    """
+    return [
+        {
+            "skill": s["skill"],
+            "progress": calculate_progress(s["skill"], s["level"], s["xp"]),
+            "xp_to_next": xp_to_next_level(s["skill"], s["level"], s["xp"]),
+            "virtual_level": level_for_xp(s["skill"], s["xp"], virtual=True),
+        }
+        for s in skills
+    ]
@@ -1,10 +1,31 @@
 """
-Shared Jinja2Templates instance.
+Shared Jinja2Templates instance and JSON response class.
 
 Import from here so both route modules use the same object and template
 directory is declared in exactly one place.
 """
 
+from fastapi.responses import JSONResponse
 from fastapi.templating import Jinja2Templates
 
+try:
+    import orjson
+except ImportError:  # optional: pip install ".[fast]"
+    orjson = None
+
 templates = Jinja2Templates(directory="templates")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for payloads that are already plain JSON data.
+
+    Returned straight from a handler it skips FastAPI's jsonable_encoder
+    walk, which for the chart series visits every float; with orjson
+    installed the serialization itself is one C call too.  Only for dicts
+    and lists of str / int / float / bool / None.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return super().render(content)